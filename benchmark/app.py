@@ -0,0 +1,169 @@
+"""
+Helpers to run the app in-process for the load benchmarks.
+
+:func:`use_memory_storage` must be called before importing anything of the app,
+as the storage engine is picked on import.
+"""
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+# Seeded accounts are named with this prefix, so they can be removed without touching the others
+SEED_USERNAME_PREFIX = "benchmark-"
+
+_memory_seeded_count = 0
+
+
+def use_memory_storage():
+    """Use the in-process storage engine regardless of the config, so the benchmarks run without ``mongod``."""
+    # Mongo client is still created, but never connects
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost")
+
+    from kl_api_common import const
+
+    const.STORAGE_ENGINE = "memory"
+
+
+def raise_open_file_limit():
+    """Raise the soft limit of the open files to the hard limit, as each connection takes a file descriptor."""
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+
+
+def get_rss_bytes() -> int:
+    """Current resident set size of this process. Falls back to the peak on platforms without ``/proc``."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB on the others
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def get_percentiles(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+
+    if len(values) == 1:
+        return {"count": 1, "p50": values[0], "p95": values[0], "p99": values[0], "max": values[0]}
+
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+
+    return {"count": len(values), "p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": max(values)}
+
+
+def get_seed_username(idx: int) -> str:
+    return f"{SEED_USERNAME_PREFIX}{idx}"
+
+
+def seed_accounts(
+    count: int, *,
+    hashed_password: str = "",
+    admin_count: int = 0,
+    batch_size: int = 5000,
+):
+    """
+    Insert ``count`` active accounts named by :func:`get_seed_username`, replacing the previously seeded ones.
+
+    The first ``admin_count`` accounts are admins.
+    The memory storage can't remove accounts, so only the accounts missing from the previous seeding are inserted,
+    and the count should not decrease between the calls.
+    """
+    global _memory_seeded_count
+
+    from kl_api_common.const import STORAGE_ENGINE
+    from kl_api_account.db import DEFAULT_ACCOUNT_PERMISSIONS, user_repository
+
+    if STORAGE_ENGINE == "memory":
+        if count < _memory_seeded_count:
+            raise ValueError(f"{_memory_seeded_count} accounts are seeded already, can't seed {count} accounts")
+
+        start_idx = _memory_seeded_count
+        _memory_seeded_count = count
+    else:
+        remove_seeded_accounts()
+        start_idx = 0
+
+    expiry = datetime.now(timezone.utc) + timedelta(days=30)
+
+    for batch_start in range(start_idx, count, batch_size):
+        user_repository.insert_many([
+            {
+                "_id": ObjectId(),
+                "username": get_seed_username(idx),
+                "email": None,
+                "expiry": expiry,
+                "blocked": False,
+                "admin": idx < admin_count,
+                "permissions": DEFAULT_ACCOUNT_PERMISSIONS,
+                "hashed_password": hashed_password,
+                "signup_key": None,
+            }
+            for idx in range(batch_start, min(batch_start + batch_size, count))
+        ])
+
+
+def remove_seeded_accounts():
+    """Remove the seeded accounts and their configs and sessions from Mongo. Nothing to do for the memory storage."""
+    from kl_api_common.const import STORAGE_ENGINE
+    from kl_api_account.db import auth_db_users, user_db_config, user_db_session
+
+    if STORAGE_ENGINE != "mongo":
+        return
+
+    account_ids = auth_db_users.distinct("_id", {"username": {"$regex": f"^{SEED_USERNAME_PREFIX}"}})
+
+    user_db_config.delete_many({"account_id": {"$in": account_ids}})
+    user_db_session.delete_many({"account_id": {"$in": account_ids}})
+    auth_db_users.delete_many({"_id": {"$in": account_ids}})
+
+
+class AppServer:
+    """Runs the app with ``uvicorn`` on a thread of this process, which has its own event loop."""
+
+    def __init__(self, *, host: str = "127.0.0.1", port: int = 8787):
+        import uvicorn
+
+        from kl_api_account.app import fast_api
+
+        self.host = host
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(
+            fast_api,
+            host=host,
+            port=port,
+            log_level="warning",
+            # Large enough to not limit the clients
+            backlog=16384,
+        ))
+        self._thread = threading.Thread(target=self._server.run, name="AppServer", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "AppServer":
+        self._thread.start()
+
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("App server failed to start")
+
+            time.sleep(0.05)
+
+        return self
+
+    def __exit__(self, *_):
+        self._server.should_exit = True
+        self._thread.join()
@@ -0,0 +1,389 @@
+"""
+Throughput benchmark of the HTTP endpoints with scripted traffic mixes.
+
+Requests go to the app through ASGI in this process, so no network is involved.
+The app uses the configured storage, or the in-process storage with ``--in-memory``.
+
+For each dataset size in ``--datasets``, the accounts are seeded, then ``--concurrency`` virtual users
+send requests back-to-back for ``--duration`` secs. Each request picks an endpoint by the weights of ``--mix``
+and a random seeded account. Requests in the first ``--warmup`` secs are not counted.
+
+Reports the throughput and the latency percentiles of each endpoint.
+
+Run from the repo root without ``DEV``, as the console logs would dominate:
+
+- ``python -m benchmark.http_load --in-memory --mix login-burst``
+- ``python -m benchmark.http_load --mix config-editing --datasets 1000,10000,100000 --output report.json``
+- ``python -m benchmark.http_load --weights /auth/me=3,/auth/token-check=1`` for a custom mix.
+- ``python -m benchmark.http_load --baseline report.json`` to fail if any endpoint regressed past ``--tolerance``.
+
+Seeded accounts are removed afterwards when running against Mongo.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, TypedDict
+
+from benchmark.app import get_percentiles, get_seed_username, remove_seeded_accounts, seed_accounts, use_memory_storage
+
+SEED_PASSWORD = "benchmark-password"
+
+# Admin accounts among the seeded ones, which call `/admin/accounts`
+SEED_ADMIN_COUNT = 10
+
+
+class TrafficMix(TypedDict):
+    description: str
+    concurrency: int
+    weights: dict[str, float]
+
+
+TRAFFIC_MIXES: dict[str, TrafficMix] = {
+    "login-burst": {
+        "description": "Market open, users sign in and the chart clients check the tokens.",
+        "concurrency": 100,
+        "weights": {"/auth/token": 6, "/auth/token-check": 2, "/auth/me": 2},
+    },
+    "config-editing": {
+        "description": "Steady state, users edit the chart configs while the tokens get checked and refreshed.",
+        "concurrency": 20,
+        "weights": {
+            "/user/config/update": 6, "/auth/token-check": 2, "/auth/me": 1.5, "/auth/token-refresh": 0.5,
+        },
+    },
+    "mixed": {
+        "description": "All endpoints, including the account list of the admins.",
+        "concurrency": 20,
+        "weights": {
+            "/auth/token": 1, "/auth/token-refresh": 1, "/auth/token-check": 3, "/auth/me": 2,
+            "/user/config/update": 3, "/admin/accounts": 0.1,
+        },
+    },
+}
+
+DEFAULT_DATASETS = "1000,10000,100000"
+
+_LAYOUT_TYPES = ["1-1x1", "2-1x2", "2-2x1", "4-2x2"]
+
+
+class EndpointResult(TypedDict):
+    count: int
+    requestsPerSec: float
+    statuses: dict[str, int]
+    latencyMs: dict[str, float] | None
+
+
+class DatasetResult(TypedDict):
+    accounts: int
+    concurrency: int
+    durationSec: float
+    requestsPerSec: float
+    errorRate: float
+    endpoints: dict[str, EndpointResult]
+
+
+class LoadContext:
+    """Seeded accounts and the credentials to make the requests."""
+
+    def __init__(self, account_count: int, *, client_id: str, client_secret: str):
+        from kl_api_common.env import FASTAPI_AUTH_CALLBACK
+        from kl_api_account.endpoints.auth.secret import create_access_token
+
+        self.account_count = account_count
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.callback = FASTAPI_AUTH_CALLBACK
+
+        # Minted lazily, as minting 100k tokens upfront is slow
+        self._create_access_token = create_access_token
+        self._tokens: dict[int, str] = {}
+
+    def get_token(self, idx: int) -> str:
+        if not (token := self._tokens.get(idx)):
+            token = self._tokens[idx] = self._create_access_token(
+                username=get_seed_username(idx), expiry_delta=timedelta(hours=1)
+            )
+
+        return token
+
+    def get_auth_headers(self, idx: int) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.get_token(idx)}"}
+
+    def pick_account(self) -> int:
+        return random.randrange(self.account_count)
+
+    def pick_admin(self) -> int:
+        return random.randrange(min(SEED_ADMIN_COUNT, self.account_count))
+
+
+RequestArgs = tuple[str, dict[str, Any]]
+
+# Endpoint path to the function making the HTTP method and the `httpx` request kwargs
+_REQUEST_MAKERS: dict[str, Callable[[LoadContext], RequestArgs]] = {
+    "/auth/token": lambda ctx: ("POST", {"data": {
+        "grant_type": "password",
+        "username": get_seed_username(ctx.pick_account()),
+        "password": SEED_PASSWORD,
+        "client_id": ctx.client_id,
+        "redirect_uri": ctx.callback,
+    }}),
+    "/auth/token-refresh": lambda ctx: ("POST", {
+        "json": {"client_id": ctx.client_id, "client_secret": ctx.client_secret},
+        "headers": ctx.get_auth_headers(ctx.pick_account()),
+    }),
+    "/auth/token-check": lambda ctx: ("POST", {"json": {"token": ctx.get_token(ctx.pick_account())}}),
+    "/auth/me": lambda ctx: ("GET", {"headers": ctx.get_auth_headers(ctx.pick_account())}),
+    "/user/config/update": lambda ctx: ("POST", {
+        "json": random.choice([
+            {"key": "layout_type", "data": random.choice(_LAYOUT_TYPES)},
+            {"key": "slot_map", "data": {slot: f"NQ@{random.choice([1, 5, 15])}" for slot in "ABCD"}},
+        ]),
+        "headers": ctx.get_auth_headers(ctx.pick_account()),
+    }),
+    "/admin/accounts": lambda ctx: ("GET", {"headers": ctx.get_auth_headers(ctx.pick_admin())}),
+}
+
+
+def parse_weights(weights: str) -> dict[str, float]:
+    parsed: dict[str, float] = {}
+
+    for entry in weights.split(","):
+        path, weight = entry.split("=")
+
+        if path not in _REQUEST_MAKERS:
+            raise ValueError(f"Unknown endpoint `{path}`, available: {', '.join(_REQUEST_MAKERS)}")
+
+        parsed[path] = float(weight)
+
+    return parsed
+
+
+def get_validation_secrets() -> tuple[str, str]:
+    """Get the validation secrets, and create them if not exist, as the existing ones could be in use."""
+    from kl_api_account.db import validation_secrets_repository
+
+    if all_secrets := validation_secrets_repository.get_all():
+        secrets = all_secrets[-1]
+    else:
+        secrets = {"client_id": "benchmark-client", "client_secret": "benchmark-secret"}
+        validation_secrets_repository.replace(secrets)
+
+    return secrets["client_id"], secrets["client_secret"]
+
+
+async def run_load(
+    ctx: LoadContext, *,
+    weights: dict[str, float],
+    concurrency: int,
+    duration_sec: float,
+    warmup_sec: float,
+) -> DatasetResult:
+    import httpx
+
+    from kl_api_account.app import fast_api
+
+    paths = list(weights)
+    path_weights = list(weights.values())
+    latencies_ms: dict[str, list[float]] = {path: [] for path in paths}
+    statuses: dict[str, dict[str, int]] = {path: {} for path in paths}
+
+    start_sec = time.perf_counter()
+    measure_start_sec = start_sec + warmup_sec
+    end_sec = measure_start_sec + duration_sec
+
+    async def run_user(client: httpx.AsyncClient):
+        while (request_start_sec := time.perf_counter()) < end_sec:
+            path = random.choices(paths, path_weights)[0]
+            method, kwargs = _REQUEST_MAKERS[path](ctx)
+
+            try:
+                status = str((await client.request(method, path, **kwargs)).status_code)
+            except Exception as ex:  # noqa
+                status = type(ex).__name__
+
+            if request_start_sec < measure_start_sec:
+                continue
+
+            latencies_ms[path].append((time.perf_counter() - request_start_sec) * 1000)
+            statuses[path][status] = statuses[path].get(status, 0) + 1
+
+    transport = httpx.ASGITransport(app=fast_api, raise_app_exceptions=False)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        await asyncio.gather(*(run_user(client) for _ in range(concurrency)))
+
+    # Requests in flight at the end make the actual duration longer
+    actual_duration_sec = time.perf_counter() - measure_start_sec
+    total_count = sum(len(latencies) for latencies in latencies_ms.values())
+    error_count = sum(
+        count
+        for path_statuses in statuses.values()
+        for status, count in path_statuses.items()
+        if not status.startswith("2")
+    )
+
+    return {
+        "accounts": ctx.account_count,
+        "concurrency": concurrency,
+        "durationSec": actual_duration_sec,
+        "requestsPerSec": total_count / actual_duration_sec,
+        "errorRate": error_count / total_count if total_count else 0,
+        "endpoints": {
+            path: {
+                "count": len(latencies_ms[path]),
+                "requestsPerSec": len(latencies_ms[path]) / actual_duration_sec,
+                "statuses": statuses[path],
+                "latencyMs": get_percentiles(latencies_ms[path]),
+            }
+            for path in paths
+        },
+    }
+
+
+def print_dataset_result(result: DatasetResult):
+    print(
+        f"\n{result['accounts']:,} accounts / {result['concurrency']} concurrency: "
+        f"{result['requestsPerSec']:,.1f} req/s, {result['errorRate']:.2%} errors"
+    )
+    print(
+        f"{'Endpoint':<22} {'Count':>8} {'Req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} "
+        f"{'Max (ms)':>10}  Statuses"
+    )
+
+    for path, endpoint in result["endpoints"].items():
+        latency = endpoint["latencyMs"]
+        statuses = ", ".join(f"{status}: {count:,}" for status, count in endpoint["statuses"].items())
+
+        if not latency:
+            print(f"{path:<22} {0:>8}")
+            continue
+
+        print(
+            f"{path:<22} {endpoint['count']:>8,} {endpoint['requestsPerSec']:>10,.1f} {latency['p50']:>10,.1f} "
+            f"{latency['p95']:>10,.1f} {latency['p99']:>10,.1f} {latency['max']:>10,.1f}  {statuses}"
+        )
+
+
+def compare_to_baseline(
+    results: dict[str, DatasetResult],
+    baseline: dict[str, DatasetResult],
+    tolerance: float,
+) -> bool:
+    """Print the p95 latency changes against ``baseline``, and return ``False`` if any regressed past ``tolerance``."""
+    passed = True
+
+    print(f"\n{'Accounts':>9} {'Endpoint':<22} {'Baseline p95':>13} {'Current p95':>13} {'Change':>8}")
+
+    for accounts, result in results.items():
+        for path, endpoint in result["endpoints"].items():
+            baseline_latency = baseline.get(accounts, {}).get("endpoints", {}).get(path, {}).get("latencyMs")
+
+            if not baseline_latency or not endpoint["latencyMs"]:
+                continue
+
+            change = endpoint["latencyMs"]["p95"] / baseline_latency["p95"] - 1
+            regressed = change > tolerance
+            passed = passed and not regressed
+
+            print(
+                f"{int(accounts):>9,} {path:<22} {baseline_latency['p95']:>13,.1f} "
+                f"{endpoint['latencyMs']['p95']:>13,.1f} {change:>+8.1%}{'  REGRESSED' if regressed else ''}"
+            )
+
+    return passed
+
+
+async def run_datasets(args: argparse.Namespace, weights: dict[str, float], concurrency: int) -> dict[str, Any]:
+    from kl_api_account.app import fast_api
+    from kl_api_account.endpoints.auth.secret import get_password_hash
+
+    await fast_api.router.startup()
+
+    client_id, client_secret = get_validation_secrets()
+    hashed_password = get_password_hash(SEED_PASSWORD)
+    results: dict[str, DatasetResult] = {}
+
+    try:
+        # Ascending, as the memory storage can only add accounts
+        for account_count in sorted(int(count) for count in args.datasets.split(",")):
+            print(f"Seeding {account_count:,} accounts...")
+            await asyncio.to_thread(
+                seed_accounts, account_count, hashed_password=hashed_password, admin_count=SEED_ADMIN_COUNT
+            )
+
+            result = results[str(account_count)] = await run_load(
+                LoadContext(account_count, client_id=client_id, client_secret=client_secret),
+                weights=weights,
+                concurrency=concurrency,
+                duration_sec=args.duration,
+                warmup_sec=args.warmup,
+            )
+            print_dataset_result(result)
+    finally:
+        await asyncio.to_thread(remove_seeded_accounts)
+
+        await fast_api.router.shutdown()
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "mix": args.mix,
+        "weights": weights,
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark.http_load", description="Benchmark the HTTP endpoints.")
+    parser.add_argument("--in-memory", action="store_true", help="Use the in-process storage.")
+    parser.add_argument("--mix", choices=list(TRAFFIC_MIXES), default="mixed", help="Traffic mix to send.")
+    parser.add_argument(
+        "--weights",
+        help="Endpoint weights overriding the mix, in the format of `<Path>=<Weight>,<Path>=<Weight>`.",
+    )
+    parser.add_argument(
+        "--datasets", default=DEFAULT_DATASETS, help="Comma-separated counts of the seeded accounts to run against.",
+    )
+    parser.add_argument("--concurrency", type=int, help="Count of the virtual users. Defaults to the one of the mix.")
+    parser.add_argument("--duration", type=float, default=20, help="Secs to measure for each dataset.")
+    parser.add_argument("--warmup", type=float, default=3, help="Secs to send requests before measuring.")
+    parser.add_argument("--output", help="Path to write the report as JSON.")
+    parser.add_argument("--baseline", help="Path of a previous report to compare the p95 latencies to.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Max allowed p95 latency increase ratio of each endpoint against the baseline.",
+    )
+
+    args = parser.parse_args()
+
+    mix = TRAFFIC_MIXES[args.mix]
+    weights = parse_weights(args.weights) if args.weights else mix["weights"]
+
+    if args.in_memory:
+        use_memory_storage()
+
+    report = asyncio.run(run_datasets(args, weights, args.concurrency or mix["concurrency"]))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+        if not compare_to_baseline(report["results"], baseline["results"], args.tolerance):
+            print(f"\nRegressed by more than {args.tolerance:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
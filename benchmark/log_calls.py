@@ -0,0 +1,55 @@
+"""
+Benchmark of the log calls per second.
+
+Compares ``print_log()`` with f-string messages (markup parsed on every call)
+against ``print_log_event()`` with static templates (markup stripped once per template).
+
+Run without ``DEV`` to measure the production path: ``python -m benchmark.log_calls``.
+"""
+import time
+from typing import Callable
+
+from bson import ObjectId
+
+from kl_api_common.utils import print_log, print_log_event
+
+CALL_COUNT = 100000
+
+
+def measure_calls_per_sec(log_func: Callable[[int], None]) -> float:
+    start_sec = time.perf_counter()
+
+    for idx in range(CALL_COUNT):
+        log_func(idx)
+
+    return CALL_COUNT / (time.perf_counter() - start_sec)
+
+
+def log_by_f_string(idx: int):
+    account_id = ObjectId()
+    session_id = f"session-{idx}"
+
+    print_log(
+        f"Session [cyan]created[/] for account [yellow]{account_id}[/] - SID: `[cyan]{session_id}[/]`",
+        accountId=account_id, sessionId=session_id
+    )
+
+
+def log_by_template(idx: int):
+    print_log_event(
+        "Session [cyan]created[/] for account [yellow]{accountId}[/] - SID: `[cyan]{sessionId}[/]`",
+        accountId=ObjectId(), sessionId=f"session-{idx}"
+    )
+
+
+def main():
+    before = measure_calls_per_sec(log_by_f_string)
+    after = measure_calls_per_sec(log_by_template)
+
+    print(f"Before (f-string + markup parsing): {before:>12,.0f} calls/s")
+    print(f"After (static template):            {after:>12,.0f} calls/s")
+    print(f"Speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Microbenchmarks of the pure-Python hot paths.
+
+Each case is timed in rounds of ``timeit`` loops, and the median and the min time per call are reported.
+Comparisons use the min time, which is the least affected by the noise of the other processes.
+
+Run from the repo root:
+
+- ``python -m benchmark.micro`` to print the results.
+- ``python -m benchmark.micro --output results.json`` to also write the results as JSON.
+- ``python -m benchmark.micro --save-baseline`` to store the results as the baseline.
+- ``python -m benchmark.micro --compare`` to fail if any case is slower than the baseline by more than ``--tolerance``.
+
+Baselines are only comparable on the same machine and Python version.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, TypedDict
+
+from bson import ObjectId
+
+BenchCase = Callable[[], Callable[[], Any]]
+
+DEFAULT_BASELINE_PATH = "benchmark/micro-baseline.json"
+
+_cases: dict[str, BenchCase] = {}
+
+
+class BenchResult(TypedDict):
+    medianNs: float
+    minNs: float
+    opsPerSec: float
+    rounds: int
+    loops: int
+
+
+def bench(name: str) -> Callable[[BenchCase], BenchCase]:
+    """Register a benchmark case. The decorated function sets up the case and returns the function to time."""
+    def decorator(setup: BenchCase) -> BenchCase:
+        _cases[name] = setup
+        return setup
+
+    return decorator
+
+
+def _make_user_doc() -> dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "username": "benchmark-user",
+        "email": None,
+        "expiry": datetime.now(timezone.utc) + timedelta(days=30),
+        "blocked": False,
+        "admin": False,
+        "permissions": ["chart:view", "account:view"],
+    }
+
+
+_IDENTIFIERS = ["NQ@1", "NQ@5", "YM@1", "YM@15", "ES@1", "ES@60"]
+
+
+# region Cases
+
+@bench("auth.create_access_token")
+def bench_create_access_token():
+    from kl_api_account.endpoints.auth.secret import create_access_token
+
+    return lambda: create_access_token(username="benchmark-user")
+
+
+@bench("auth.decode_access_token")
+def bench_decode_access_token():
+    from kl_api_account.endpoints.auth.secret import create_access_token, decode_access_token
+
+    token = create_access_token(username="benchmark-user")
+
+    return lambda: decode_access_token(token)
+
+
+@bench("model.UserDataModel")
+def bench_user_data_model():
+    from kl_api_account.db import UserDataModel
+
+    doc = _make_user_doc()
+
+    return lambda: UserDataModel(**doc)
+
+
+@bench("model.DbUserModel")
+def bench_db_user_model():
+    from kl_api_account.db import DbUserModel
+
+    doc = _make_user_doc() | {"hashed_password": "$2b$12$" + "x" * 53, "signup_key": "x" * 32}
+
+    return lambda: DbUserModel(**doc)
+
+
+@bench("model.UserDataModel.decode_trusted")
+def bench_user_data_model_decode_trusted():
+    from kl_api_common.db import decode_trusted
+    from kl_api_account.db import UserDataModel
+
+    doc = _make_user_doc() | {"hashed_password": "$2b$12$" + "x" * 53, "signup_key": "x" * 32}
+
+    return lambda: decode_trusted(UserDataModel, doc)
+
+
+@bench("model.DbUserModel.decode_trusted")
+def bench_db_user_model_decode_trusted():
+    from kl_api_common.db import decode_trusted
+    from kl_api_account.db import DbUserModel
+
+    doc = _make_user_doc() | {"hashed_password": "$2b$12$" + "x" * 53, "signup_key": "x" * 32}
+
+    return lambda: decode_trusted(DbUserModel, doc)
+
+
+@bench("model.UserDataModel.has_permission")
+def bench_user_data_model_has_permission():
+    from kl_api_account.db import UserDataModel
+
+    user = UserDataModel(**_make_user_doc())
+
+    return lambda: user.has_permission("debug:profile")
+
+
+def _make_session_doc() -> dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "account_id": ObjectId(),
+        "session_id": "x" * 20,
+        "last_check": datetime.now(timezone.utc),
+    }
+
+
+@bench("model.UserSessionModel")
+def bench_user_session_model():
+    from kl_api_account.db.session.model import UserSessionModel
+
+    doc = _make_session_doc()
+
+    return lambda: UserSessionModel(**doc)
+
+
+@bench("model.UserSessionModel.decode_trusted")
+def bench_user_session_model_decode_trusted():
+    from kl_api_common.db import decode_trusted
+    from kl_api_account.db.session.model import UserSessionModel
+
+    doc = _make_session_doc()
+
+    return lambda: decode_trusted(UserSessionModel, doc)
+
+
+def _make_config_doc() -> dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "account_id": ObjectId(),
+        "slot_map": {"A": "NQ@1", "B": "NQ@5", "C": "YM@1", "D": "YM@15"},
+        "layout_type": "4-2x2",
+        "layout_config": {slot: {"height": 300, "width": 400} for slot in "ABCD"},
+        "shared_config": {"theme": "dark", "indicators": list(range(20))},
+    }
+
+
+@bench("model.UserConfigModel")
+def bench_user_config_model():
+    from kl_api_account.db import UserConfigModel
+
+    doc = _make_config_doc()
+
+    return lambda: UserConfigModel(**doc)
+
+
+@bench("model.UserConfigModel.decode_trusted")
+def bench_user_config_model_decode_trusted():
+    from kl_api_common.db import decode_trusted
+    from kl_api_account.db import UserConfigModel
+
+    doc = _make_config_doc()
+
+    return lambda: decode_trusted(UserConfigModel, doc)
+
+
+@bench("model.UserConfigModel.dict")
+def bench_user_config_model_dict():
+    from kl_api_account.db import UserConfigModel
+
+    config = UserConfigModel(
+        account_id=ObjectId(),
+        slot_map={"A": "NQ@1", "B": "NQ@5", "C": "YM@1", "D": "YM@15"},
+        layout_type="4-2x2",
+        layout_config={slot: {"height": 300, "width": 400} for slot in "ABCD"},
+        shared_config={"theme": "dark", "indicators": list(range(20))},
+    )
+
+    return lambda: config.dict()
+
+
+def _make_account_data_list(count: int) -> list[Any]:
+    from kl_api_account.endpoints.admin.model import AccountData
+
+    expiry = datetime.now(timezone.utc) + timedelta(days=30)
+
+    return [
+        AccountData.construct(
+            id=str(ObjectId()), username=f"benchmark-{idx}", permissions=["chart:view", "account:view"],
+            expiry=expiry, blocked=False, admin=False, online=False,
+        )
+        for idx in range(count)
+    ]
+
+
+@bench("response.accounts-1000.response_model")
+def bench_response_accounts_response_model():
+    import asyncio
+
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from kl_api_common.utils import FastApiORJSONResponse
+    from kl_api_account.endpoints.admin.model import AccountData
+
+    accounts = _make_account_data_list(1000)
+    field = create_response_field(name="Response", type_=list[AccountData])
+    loop = asyncio.new_event_loop()
+
+    # Same as what FastAPI does on the returned content if the endpoint has `response_model`
+    return lambda: FastApiORJSONResponse(loop.run_until_complete(
+        serialize_response(field=field, response_content=accounts, is_coroutine=True)
+    ))
+
+
+@bench("response.accounts-1000.direct")
+def bench_response_accounts_direct():
+    from kl_api_common.utils import FastApiORJSONResponse
+
+    accounts = _make_account_data_list(1000)
+
+    return lambda: FastApiORJSONResponse(accounts)
+
+
+@bench("json.FastApiSioJSONSerializer.dumps")
+def bench_sio_json_dumps():
+    from kl_api_common.utils import FastApiSioJSONSerializer
+
+    data = ["init", {"config": {
+        "account_id": ObjectId(),
+        "slot_map": {"A": "NQ@1", "B": "NQ@5"},
+        "layout_type": "2-2x1",
+        "layout_config": {slot: {"height": 300, "width": 400} for slot in "AB"},
+        "shared_config": None,
+    }}]
+
+    return lambda: FastApiSioJSONSerializer.dumps(data)
+
+
+@bench("log.log_message_via_logger")
+def bench_log_message_via_logger():
+    from kl_api_common.utils.log import log_message_via_logger
+
+    log_data = {
+        "application": "Benchmark",
+        "level": "DEBUG",
+        "timestamp": 1666000000000,
+        "threadId": 1,
+        "message": "Session created for account 63444f5b3ed2b5d3c4c5a6b7",
+        "accountId": ObjectId(),
+        "sessionId": "session-id",
+    }
+
+    return lambda: log_message_via_logger("DEBUG", log_data)
+
+
+@bench("room.make_px_sub_room_name")
+def bench_make_px_sub_room_name():
+    from kl_api_account.utils import make_px_sub_room_name
+
+    return lambda: make_px_sub_room_name(_IDENTIFIERS)
+
+
+@bench("room.get_px_sub_securities_from_room_name")
+def bench_get_px_sub_securities_from_room_name():
+    from kl_api_account.utils import get_px_sub_securities_from_room_name, make_px_sub_room_name
+
+    room_name = make_px_sub_room_name(_IDENTIFIERS)
+
+    return lambda: get_px_sub_securities_from_room_name(room_name)
+
+
+@bench("room.make_px_data_room_name")
+def bench_make_px_data_room_name():
+    from kl_api_account.utils import make_px_data_room_name
+
+    return lambda: make_px_data_room_name(_IDENTIFIERS)
+
+
+@bench("room.get_px_data_identifiers_from_room_name")
+def bench_get_px_data_identifiers_from_room_name():
+    from kl_api_account.utils import get_px_data_identifiers_from_room_name, make_px_data_room_name
+
+    room_name = make_px_data_room_name(_IDENTIFIERS)
+
+    return lambda: get_px_data_identifiers_from_room_name(room_name)
+
+
+@bench("db.PyObjectId.validate")
+def bench_py_object_id_validate():
+    from kl_api_common.db import PyObjectId
+
+    object_id = str(ObjectId())
+
+    return lambda: PyObjectId.validate(object_id)
+
+# endregion
+
+
+def run_case(setup: BenchCase, *, rounds: int) -> BenchResult:
+    timer = timeit.Timer(setup())
+    # Loops per round to take at least 0.2 secs
+    loops, _ = timer.autorange()
+
+    times_ns = [time_sec / loops * 1E9 for time_sec in timer.repeat(repeat=rounds, number=loops)]
+    median_ns = statistics.median(times_ns)
+
+    return {
+        "medianNs": median_ns,
+        "minNs": min(times_ns),
+        "opsPerSec": 1E9 / median_ns,
+        "rounds": rounds,
+        "loops": loops,
+    }
+
+
+def compare_to_baseline(results: dict[str, BenchResult], baseline: dict[str, BenchResult], tolerance: float) -> bool:
+    """Print the changes against ``baseline``, and return ``False`` if any case regressed past ``tolerance``."""
+    passed = True
+
+    print(f"\n{'Case':<45} {'Baseline (ns)':>14} {'Current (ns)':>14} {'Change':>8}")
+
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<45} {'-':>14} {result['minNs']:>14,.0f} {'new':>8}")
+            continue
+
+        baseline_ns = baseline[name]["minNs"]
+        change = result["minNs"] / baseline_ns - 1
+        regressed = change > tolerance
+        passed = passed and not regressed
+
+        print(
+            f"{name:<45} {baseline_ns:>14,.0f} {result['minNs']:>14,.0f} {change:>+8.1%}"
+            f"{'  REGRESSED' if regressed else ''}"
+        )
+
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark.micro", description="Run the microbenchmarks.")
+    parser.add_argument("--filter", help="Only run the cases whose name contains this.")
+    parser.add_argument("--rounds", type=int, default=7, help="Count of the timed rounds of each case.")
+    parser.add_argument("--output", help="Path to write the results as JSON.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Path of the baseline results.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline.")
+    parser.add_argument("--compare", action="store_true", help="Compare the results to the baseline.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1,
+        help="Max allowed slowdown ratio of each case against the baseline in comparison.",
+    )
+
+    args = parser.parse_args()
+
+    results: dict[str, BenchResult] = {}
+
+    print(f"{'Case':<45} {'Median (ns)':>14} {'Min (ns)':>14} {'Ops/s':>14}")
+
+    for name, setup in _cases.items():
+        if args.filter and args.filter not in name:
+            continue
+
+        result = results[name] = run_case(setup, rounds=args.rounds)
+        print(f"{name:<45} {result['medianNs']:>14,.0f} {result['minNs']:>14,.0f} {result['opsPerSec']:>14,.0f}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+        if baseline["python"] != report["python"]:
+            print(f"\nBaseline is from Python {baseline['python']}, the comparison could be inaccurate")
+
+        if not compare_to_baseline(results, baseline["results"], args.tolerance):
+            print(f"\nRegressed by more than {args.tolerance:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
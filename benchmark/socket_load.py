@@ -0,0 +1,462 @@
+"""
+Load test of the socket.io connections of the chart clients.
+
+Runs the app in this process against the configured storage, or the in-process storage with ``--in-memory``,
+then opens ``--clients`` socket.io clients from ``--procs`` worker processes.
+Each client stays for ``--duration`` secs after connecting, during which it:
+
+- Sends ``init`` with the access token of its own seeded account.
+- Sends ``ping`` every ``--ping-interval`` and ``auth`` every ``--auth-interval`` secs.
+- Reconnects at a random time with the probability of ``--reconnect-ratio``.
+  The new session of the same account makes the server kick the old one,
+  and the time from sending ``init`` of the new session to the old session getting disconnected is reported.
+
+Reports connects/sec, event latency percentiles, server memory per connection and error rates.
+Memory per connection is the growth of the RSS of this process, so the clients run in other processes.
+
+Run from the repo root without ``DEV``, as the console logs would dominate:
+``python -m benchmark.socket_load --in-memory --clients 2000``.
+
+Seeded accounts are removed afterwards when running against Mongo.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, TypedDict
+
+from benchmark.app import (
+    AppServer, get_percentiles, get_rss_bytes, get_seed_username, raise_open_file_limit, remove_seeded_accounts,
+    seed_accounts, use_memory_storage,
+)
+
+SOCKET_IO_PATH = "/ws/socket.io/?EIO=4&transport=websocket"
+
+LATENCY_EVENTS = ("init", "ping", "auth", "kick")
+
+
+class LoadOptions(TypedDict):
+    url: str
+    duration_sec: float
+    ping_interval_sec: float
+    auth_interval_sec: float
+    reconnect_ratio: float
+    connect_concurrency: int
+    timeout_sec: float
+
+
+class WorkerStats(TypedDict):
+    attempted: int
+    connected: int
+    rampSec: float
+    connectMs: list[float]
+    latencyMs: dict[str, list[float]]
+    reconnects: int
+    kicks: int
+    requests: int
+    errors: dict[str, int]
+
+
+class ServerError(Exception):
+    pass
+
+
+class LoadClient:
+    """
+    Minimal socket.io client over WebSocket only, cheap enough to open thousands in a process.
+
+    Sends one request of an event at a time, and takes the next message of the same event as its response.
+    """
+
+    def __init__(self, url: str, *, timeout_sec: float):
+        self.url = url
+        self.timeout_sec = timeout_sec
+
+        self.kicked: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+
+        self._ws = None
+        self._reader: asyncio.Task | None = None
+        self._pending: dict[str, asyncio.Future] = {}
+
+    async def connect(self):
+        import websockets
+
+        self._ws = await websockets.connect(
+            self.url, open_timeout=self.timeout_sec, ping_interval=None, max_size=None, compression=None
+        )
+
+        # Engine.IO open packet
+        await asyncio.wait_for(self._ws.recv(), self.timeout_sec)
+        # Socket.IO connect to the default namespace
+        await self._ws.send("40")
+
+        while not (message := await asyncio.wait_for(self._ws.recv(), self.timeout_sec)).startswith("40"):
+            if message.startswith("44"):
+                raise ServerError(f"connect:{message[2:]}")
+
+        self._reader = asyncio.create_task(self._read())
+
+    def _fail_pending(self, ex: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ex)
+
+        self._pending.clear()
+
+    async def _read(self):
+        try:
+            async for message in self._ws:
+                if message == "2":
+                    await self._ws.send("3")
+                elif message.startswith("42"):
+                    event, *data = json.loads(message[2:])
+
+                    if event == "error":
+                        self._fail_pending(ServerError(f"error:{data[0] if data else ''}"))
+                    elif (future := self._pending.pop(event, None)) and not future.done():
+                        future.set_result(data)
+                elif message.startswith("41") and not self.kicked.done():
+                    self.kicked.set_result(time.perf_counter())
+        except Exception:  # noqa
+            pass
+        finally:
+            self._fail_pending(ConnectionError("disconnected"))
+
+            if not self.kicked.done():
+                self.kicked.set_result(time.perf_counter())
+
+    async def send(self, event: str, data: Any):
+        await self._ws.send("42" + json.dumps([event, data]))
+
+    async def request(self, event: str, data: Any) -> float:
+        """Send ``event`` and wait for its response. Returns the latency in ms."""
+        future = self._pending[event] = asyncio.get_running_loop().create_future()
+        start_sec = time.perf_counter()
+
+        await self.send(event, data)
+        await asyncio.wait_for(future, self.timeout_sec)
+
+        return (time.perf_counter() - start_sec) * 1000
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+        if self._reader is not None:
+            await self._reader
+
+
+def _record_error(stats: WorkerStats, ex: BaseException):
+    key = str(ex) if isinstance(ex, ServerError) else type(ex).__name__
+    stats["errors"][key] = stats["errors"].get(key, 0) + 1
+
+
+async def _connect_and_init(token: str, options: LoadOptions, stats: WorkerStats) -> LoadClient:
+    client = LoadClient(options["url"], timeout_sec=options["timeout_sec"])
+
+    start_sec = time.perf_counter()
+    await client.connect()
+    stats["connectMs"].append((time.perf_counter() - start_sec) * 1000)
+
+    stats["requests"] += 1
+
+    try:
+        stats["latencyMs"]["init"].append(await client.request("init", token))
+    except Exception:
+        await client.close()
+        raise
+
+    return client
+
+
+async def _reconnect(client: LoadClient, token: str, options: LoadOptions, stats: WorkerStats) -> LoadClient:
+    new_client = LoadClient(options["url"], timeout_sec=options["timeout_sec"])
+    await new_client.connect()
+
+    stats["reconnects"] += 1
+    stats["requests"] += 1
+    init_sent_sec = time.perf_counter()
+    stats["latencyMs"]["init"].append(await new_client.request("init", token))
+
+    try:
+        kicked_sec = await asyncio.wait_for(asyncio.shield(client.kicked), options["timeout_sec"])
+        stats["kicks"] += 1
+        stats["latencyMs"]["kick"].append((kicked_sec - init_sent_sec) * 1000)
+    except asyncio.TimeoutError:
+        stats["errors"]["kick-timeout"] = stats["errors"].get("kick-timeout", 0) + 1
+
+    await client.close()
+
+    return new_client
+
+
+async def _run_session(client: LoadClient, token: str, options: LoadOptions, stats: WorkerStats, end_sec: float):
+    now = time.perf_counter()
+    # Spread the requests of the clients
+    next_ping_sec = now + random.uniform(0, options["ping_interval_sec"])
+    next_auth_sec = now + random.uniform(0, options["auth_interval_sec"])
+    reconnect_sec = (
+        now + random.uniform(0, end_sec - now) if random.random() < options["reconnect_ratio"] else None
+    )
+
+    while (now := time.perf_counter()) < end_sec:
+        due_sec = min(next_ping_sec, next_auth_sec, reconnect_sec or end_sec, end_sec)
+
+        if due_sec > now:
+            await asyncio.sleep(due_sec - now)
+            continue
+
+        try:
+            if reconnect_sec is not None and reconnect_sec <= now:
+                reconnect_sec = None
+                client = await _reconnect(client, token, options, stats)
+            elif next_ping_sec <= now:
+                next_ping_sec += options["ping_interval_sec"]
+                stats["requests"] += 1
+                stats["latencyMs"]["ping"].append(await client.request("ping", None))
+            elif next_auth_sec <= now:
+                next_auth_sec += options["auth_interval_sec"]
+                stats["requests"] += 1
+                stats["latencyMs"]["auth"].append(await client.request("auth", {"token": token}))
+        except (asyncio.TimeoutError, ConnectionError, ServerError, OSError) as ex:
+            _record_error(stats, ex)
+
+            if client.kicked.done():
+                # Disconnected unexpectedly, the session ends
+                return
+
+    await client.close()
+
+
+async def _run_clients(tokens: list[str], options: LoadOptions) -> WorkerStats:
+    stats: WorkerStats = {
+        "attempted": len(tokens),
+        "connected": 0,
+        "rampSec": 0,
+        "connectMs": [],
+        "latencyMs": {event: [] for event in LATENCY_EVENTS},
+        "reconnects": 0,
+        "kicks": 0,
+        "requests": 0,
+        "errors": {},
+    }
+    connect_semaphore = asyncio.Semaphore(options["connect_concurrency"])
+    ramp_start_sec = time.perf_counter()
+
+    async def run_client(token: str):
+        async with connect_semaphore:
+            try:
+                client = await _connect_and_init(token, options, stats)
+            except Exception as ex:  # noqa
+                _record_error(stats, ex)
+                return
+            finally:
+                stats["rampSec"] = time.perf_counter() - ramp_start_sec
+
+        stats["connected"] += 1
+        await _run_session(client, token, options, stats, time.perf_counter() + options["duration_sec"])
+
+    await asyncio.gather(*(run_client(token) for token in tokens))
+
+    return stats
+
+
+def run_worker(tokens: list[str], options: LoadOptions) -> WorkerStats:
+    raise_open_file_limit()
+
+    return asyncio.run(_run_clients(tokens, options))
+
+
+def merge_stats(worker_stats: list[WorkerStats]) -> WorkerStats:
+    merged = worker_stats[0]
+
+    for stats in worker_stats[1:]:
+        for key in ("attempted", "connected", "reconnects", "kicks", "requests"):
+            merged[key] += stats[key]
+
+        merged["rampSec"] = max(merged["rampSec"], stats["rampSec"])
+        merged["connectMs"].extend(stats["connectMs"])
+
+        for event in LATENCY_EVENTS:
+            merged["latencyMs"][event].extend(stats["latencyMs"][event])
+
+        merged["errors"] = dict(Counter(merged["errors"]) + Counter(stats["errors"]))
+
+    return merged
+
+
+class ServerSampler:
+    """Samples the RSS of this process and the count of the connected sockets of the server."""
+
+    def __init__(self, *, interval_sec: float = 0.25):
+        from kl_api_account.const import fast_api_socket
+
+        self.interval_sec = interval_sec
+        self.baseline_rss_bytes = get_rss_bytes()
+        self.peak_rss_bytes = self.baseline_rss_bytes
+        self.peak_connections = 0
+
+        self._sockets = fast_api_socket.eio.sockets
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="ServerSampler", daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval_sec):
+            connections = len(self._sockets)
+
+            if connections >= self.peak_connections:
+                self.peak_connections = connections
+                self.peak_rss_bytes = max(self.peak_rss_bytes, get_rss_bytes())
+
+    def __enter__(self) -> "ServerSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._stop.set()
+        self._thread.join()
+
+    def get_bytes_per_connection(self) -> float | None:
+        if not self.peak_connections:
+            return None
+
+        return (self.peak_rss_bytes - self.baseline_rss_bytes) / self.peak_connections
+
+
+def make_report(stats: WorkerStats, sampler: ServerSampler) -> dict[str, Any]:
+    from kl_api_common.utils.metrics import get_metrics
+
+    error_count = sum(stats["errors"].values())
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "clients": stats["attempted"],
+        "connected": stats["connected"],
+        "connectsPerSec": stats["connected"] / stats["rampSec"] if stats["rampSec"] else None,
+        "connectMs": get_percentiles(stats["connectMs"]),
+        "latencyMs": {event: get_percentiles(values) for event, values in stats["latencyMs"].items()},
+        "reconnects": stats["reconnects"],
+        "kicks": stats["kicks"],
+        "memory": {
+            "baselineRssBytes": sampler.baseline_rss_bytes,
+            "peakRssBytes": sampler.peak_rss_bytes,
+            "peakConnections": sampler.peak_connections,
+            "bytesPerConnection": sampler.get_bytes_per_connection(),
+        },
+        "requests": stats["requests"],
+        "errors": stats["errors"],
+        "errorRate": error_count / (stats["attempted"] + stats["requests"]) if stats["attempted"] else 0,
+        "serverMetrics": get_metrics(),
+    }
+
+
+def print_report(report: dict[str, Any]):
+    print(f"Connected: {report['connected']:,} / {report['clients']:,}")
+
+    if report["connectsPerSec"] is not None:
+        print(f"Connects/sec: {report['connectsPerSec']:,.1f}")
+
+    print(f"\n{'Latency (ms)':<14} {'Count':>8} {'p50':>10} {'p95':>10} {'p99':>10} {'Max':>10}")
+
+    for name, percentiles in [("connect", report["connectMs"]), *report["latencyMs"].items()]:
+        if not percentiles:
+            print(f"{name:<14} {0:>8}")
+            continue
+
+        print(
+            f"{name:<14} {percentiles['count']:>8,} {percentiles['p50']:>10,.1f} {percentiles['p95']:>10,.1f} "
+            f"{percentiles['p99']:>10,.1f} {percentiles['max']:>10,.1f}"
+        )
+
+    print(f"\nKicks: {report['kicks']:,} / {report['reconnects']:,} reconnects")
+
+    memory = report["memory"]
+    print(
+        f"Server RSS: {memory['baselineRssBytes'] / 1048576:,.1f} MiB -> {memory['peakRssBytes'] / 1048576:,.1f} MiB "
+        f"at {memory['peakConnections']:,} connections"
+    )
+
+    if memory["bytesPerConnection"] is not None:
+        print(f"Memory/connection: {memory['bytesPerConnection'] / 1024:,.1f} KiB")
+
+    print(
+        f"\nError rate: {report['errorRate']:.2%} of {report['clients'] + report['requests']:,} connects and requests"
+    )
+
+    for error, count in sorted(report["errors"].items(), key=lambda item: -item[1]):
+        print(f"  {error}: {count:,}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark.socket_load", description="Load test the socket.io.")
+    parser.add_argument("--in-memory", action="store_true", help="Use the in-process storage.")
+    parser.add_argument("--port", type=int, default=8787, help="Port of the app server.")
+    parser.add_argument("--clients", type=int, default=1000, help="Count of the clients, each has its own account.")
+    parser.add_argument("--procs", type=int, default=1, help="Count of the client processes.")
+    parser.add_argument("--duration", type=float, default=30, help="Secs of each client to stay after connecting.")
+    parser.add_argument("--ping-interval", type=float, default=5, help="Interval of `ping` of each client in secs.")
+    parser.add_argument("--auth-interval", type=float, default=15, help="Interval of `auth` of each client in secs.")
+    parser.add_argument(
+        "--reconnect-ratio", type=float, default=0.1,
+        help="Ratio of the clients to reconnect once during the test, which kicks the old session.",
+    )
+    parser.add_argument(
+        "--connect-concurrency", type=int, default=100, help="Max concurrent connects of each client process.",
+    )
+    parser.add_argument("--timeout", type=float, default=10, help="Timeout of each connect and request in secs.")
+    parser.add_argument("--output", help="Path to write the report as JSON.")
+
+    args = parser.parse_args()
+
+    if args.in_memory:
+        use_memory_storage()
+
+    raise_open_file_limit()
+
+    from kl_api_account.endpoints.auth.secret import create_access_token
+
+    seed_accounts(args.clients)
+    tokens = [
+        create_access_token(username=get_seed_username(idx), expiry_delta=timedelta(hours=1))
+        for idx in range(args.clients)
+    ]
+
+    try:
+        with AppServer(port=args.port) as server, ServerSampler() as sampler:
+            options: LoadOptions = {
+                "url": server.base_url.replace("http://", "ws://") + SOCKET_IO_PATH,
+                "duration_sec": args.duration,
+                "ping_interval_sec": args.ping_interval,
+                "auth_interval_sec": args.auth_interval,
+                "reconnect_ratio": args.reconnect_ratio,
+                "connect_concurrency": args.connect_concurrency,
+                "timeout_sec": args.timeout,
+            }
+
+            # Spawned instead of forked, as this process has the server thread running
+            with multiprocessing.get_context("spawn").Pool(args.procs) as pool:
+                worker_stats = pool.starmap(
+                    run_worker, [(tokens[idx::args.procs], options) for idx in range(args.procs)]
+                )
+
+        report = make_report(merge_stats(worker_stats), sampler)
+    finally:
+        remove_seeded_accounts()
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, default=str)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark of the cold start, which is importing the app from ``main`` in a new process, as each worker does.
+
+Fails if the median of the cold start time exceeds the budget, and optionally reports the modules
+taking the most time to import, using ``python -X importtime``.
+
+Run from the repo root: ``python -m benchmark.startup --report``.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+ENTRY_MODULE = "main"
+
+# `main` imports the app on attribute access
+ENTRY_STATEMENT = f"from {ENTRY_MODULE} import fast_api"
+
+PROJECT_PACKAGES = ("kl_api_account", "kl_api_common", ENTRY_MODULE)
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+_MEASURE_SCRIPT = f"""
+import time
+start_sec = time.perf_counter()
+{ENTRY_STATEMENT}
+print(time.perf_counter() - start_sec)
+"""
+
+
+def measure_start_ms() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SCRIPT], check=True, capture_output=True, text=True
+    ).stdout
+
+    return float(output.strip().splitlines()[-1]) * 1000
+
+
+def get_import_times_us() -> list[tuple[str, int]]:
+    """Get the module names and their self import time in microseconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ENTRY_STATEMENT],
+        check=True, capture_output=True, text=True
+    ).stderr
+
+    return [
+        (match.group(4), int(match.group(1)))
+        for line in stderr.splitlines()
+        if (match := _IMPORT_TIME_LINE.match(line))
+    ]
+
+
+def print_import_report(top: int):
+    import_times = get_import_times_us()
+
+    self_us_by_package = Counter()
+    for module_name, self_us in import_times:
+        self_us_by_package[module_name.split(".")[0]] += self_us
+
+    print(f"Total import time: {sum(self_us for _, self_us in import_times) / 1000:,.1f} ms")
+
+    print(f"\nTop {top} packages by import time:")
+    for package_name, self_us in self_us_by_package.most_common(top):
+        print(f"{self_us / 1000:>10,.1f} ms  {package_name}")
+
+    print(f"\nTop {top} project modules by self import time:")
+    project_import_times = [item for item in import_times if item[0].startswith(PROJECT_PACKAGES)]
+    for module_name, self_us in sorted(project_import_times, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:>10,.1f} ms  {module_name}")
+
+    print()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark.startup", description="Benchmark the cold start.")
+    parser.add_argument("--runs", type=int, default=5, help="Count of the measured cold starts.")
+    parser.add_argument("--budget-ms", type=float, default=800, help="Max allowed median of the cold start time.")
+    parser.add_argument("--report", action="store_true", help="Report the modules taking the most time to import.")
+    parser.add_argument("--top", type=int, default=15, help="Count of the modules in the report.")
+
+    args = parser.parse_args()
+
+    # Warm up, so the bytecode cache and the config validation stamp are written
+    measure_start_ms()
+
+    if args.report:
+        print_import_report(args.top)
+
+    start_times_ms = [measure_start_ms() for _ in range(args.runs)]
+    median_ms = statistics.median(start_times_ms)
+
+    print(
+        f"Cold start: median {median_ms:,.1f} ms / "
+        f"min {min(start_times_ms):,.1f} ms / max {max(start_times_ms):,.1f} ms"
+    )
+
+    if median_ms > args.budget_ms:
+        print(f"Exceeded the budget of {args.budget_ms:,.0f} ms")
+        return 1
+
+    print(f"Within the budget of {args.budget_ms:,.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
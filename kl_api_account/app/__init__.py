@@ -1 +1 @@
-from .main import start_server_app
+from .main import fast_api, start_server_app
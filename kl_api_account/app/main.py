@@ -1,5 +1,14 @@
+import asyncio
 from datetime import datetime, timedelta
 
+from pymongo.errors import PyMongoError
+
+from kl_api_common.const import MONGO_ENSURE_INDEXES_ON_STARTUP, STORAGE_ENGINE, print_configs
+from kl_api_common.db import ensure_indexes
+from kl_api_common.env import APP_NAME
+from kl_api_common.utils import print_log_event, set_current_process_scheduling
+from kl_api_account.db import user_repository, validation_secrets_repository
+from kl_api_account.const import fast_api, loop_stall_watchdog
 from .routes import register_api_routes
 from .socket import register_handlers
 
@@ -9,3 +18,57 @@ latest_date: datetime = datetime.utcnow() + timedelta(hours=1)
 def start_server_app():
     register_handlers()
     register_api_routes()
+
+
+async def log_ensure_indexes():
+    report = await asyncio.to_thread(ensure_indexes)
+
+    for index_name in report["created"]:
+        print_log_event("Created index [yellow]{indexName}[/]", indexName=index_name)
+
+    for drift in report["drifts"]:
+        print_log_event(
+            "Index drift ([red]{type}[/]) of [yellow]{namespace}.{name}[/] - "
+            "Declared: {declared} / Actual: {actual}",
+            fields={"declared": str(drift["declared"]), "actual": str(drift["actual"])},
+            type=drift["type"], namespace=drift["namespace"], name=drift["name"]
+        )
+
+    for error in report["errors"]:
+        print_log_event("[red]Failed to ensure indexes[/]: {error}", error=error)
+
+
+async def log_fill_permission_bits():
+    try:
+        filled_count = await asyncio.to_thread(user_repository.fill_permission_bits)
+    except PyMongoError as ex:
+        print_log_event("[red]Failed to fill permission bits[/]: {error}", error=str(ex))
+        return
+
+    if filled_count:
+        print_log_event("Filled permission bits of [yellow]{count}[/] accounts", count=filled_count)
+
+
+# Registered here instead of in `main.py`, which is imported again by each spawned worker
+@fast_api.on_event("startup")
+async def startup_event():
+    print_configs()
+    start_server_app()
+    set_current_process_scheduling()
+
+    if loop_stall_watchdog:
+        loop_stall_watchdog.start()
+
+    if MONGO_ENSURE_INDEXES_ON_STARTUP and STORAGE_ENGINE == "mongo":
+        await log_ensure_indexes()
+
+    await log_fill_permission_bits()
+
+    validation_secrets_repository.start_watching()
+
+    print_log_event("App name: [blue]{appName}[/]", appName=APP_NAME)
+
+
+@fast_api.on_event("shutdown")
+async def shutdown_event():
+    await asyncio.to_thread(validation_secrets_repository.stop_watching)
@@ -10,11 +10,11 @@ from kl_api_account.enums import GeneralSocketEvent
 from kl_api_account.model import PxCheckAuthMessage
 from kl_api_account.socket import socket_send_to_session
 from kl_api_account.utils import to_socket_message_init_data
-from .utils import get_tasks_with_session_control, on_http_exception
+from .utils import get_tasks_with_session_control, on_http_exception, on_socket_event
 
 
 def register_handlers_general():
-    @fast_api_socket.on(GeneralSocketEvent.INIT)
+    @on_socket_event(GeneralSocketEvent.INIT)
     async def on_request_init_data(session_id: str, access_token: str):
         print_socket_event(GeneralSocketEvent.INIT, session_id=session_id)
 
@@ -32,13 +32,13 @@ def register_handlers_general():
         except HTTPException as ex:
             await on_http_exception(ex, session_id)
 
-    @fast_api_socket.on(GeneralSocketEvent.PING)
+    @on_socket_event(GeneralSocketEvent.PING)
     async def on_request_ping(session_id: str, *_):
         print_socket_event(GeneralSocketEvent.PING, session_id=session_id)
 
         await socket_send_to_session(GeneralSocketEvent.PING, "pong", session_id)
 
-    @fast_api_socket.on(GeneralSocketEvent.AUTH)
+    @on_socket_event(GeneralSocketEvent.AUTH)
     async def on_px_check_auth(session_id: str, auth_message: PxCheckAuthMessage):
         try:
             # Calling the method checks token validity
@@ -1,6 +1,12 @@
+from functools import wraps
+from typing import Awaitable, Callable
+
 from fastapi import HTTPException
 
+from kl_api_common.const import ADMISSION_SOCKET_EVENTS
 from kl_api_common.db import PyObjectId
+from kl_api_common.utils import AdmissionRejected, set_loop_activity
+from kl_api_account.const import admission_controller, fast_api_socket, loop_stall_watchdog
 from kl_api_account.db import record_session_connected
 from kl_api_account.enums import GeneralSocketEvent
 from kl_api_account.socket import socket_disconnect_session, socket_send_to_session
@@ -17,3 +23,34 @@ async def get_tasks_with_session_control(account_id: PyObjectId, session_id: str
 
     if session_id_to_disconnect:
         await socket_disconnect_session(session_id_to_disconnect)
+
+
+def on_socket_event(event: str):
+    """
+    Register the decorated function as the handler of the socket ``event``, admitted by the admission controller.
+
+    If the admission is rejected, a socket ``error`` event is sent instead of calling the handler.
+    The handling task is marked with the event for the loop stall logs.
+    """
+    def decorator(handler: Callable[..., Awaitable[None]]):
+        cost_class = ADMISSION_SOCKET_EVENTS.get(event, "normal")
+        activity = f"socket:{event}"
+
+        @wraps(handler)
+        async def handler_admitted(session_id: str, *args):
+            if loop_stall_watchdog:
+                set_loop_activity(activity)
+
+            if not admission_controller:
+                await handler(session_id, *args)
+                return
+
+            try:
+                async with admission_controller.admit(cost_class):
+                    await handler(session_id, *args)
+            except AdmissionRejected as ex:
+                await socket_send_to_session(GeneralSocketEvent.ERROR, f"Server busy ({ex.reason})", session_id)
+
+        return fast_api_socket.on(event)(handler_admitted)
+
+    return decorator
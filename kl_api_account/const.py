@@ -3,20 +3,85 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_socketio import SocketManager
 
+from kl_api_common.const import (
+    ADMISSION_CLASSES, ADMISSION_ENABLED, ADMISSION_MAX_CONCURRENCY, ADMISSION_ROUTES, COMPRESSION_BROTLI_LEVEL,
+    COMPRESSION_ENABLED, COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_SIZE_BYTES, COMPRESSION_SOCKET_HTTP_COMPRESSION,
+    COMPRESSION_SOCKET_THRESHOLD_BYTES, COMPRESSION_THREAD_MIN_SIZE_BYTES, LOOP_WATCHDOG_ENABLED,
+    LOOP_WATCHDOG_INTERVAL_MS, LOOP_WATCHDOG_MAX_LOGS_PER_MIN, LOOP_WATCHDOG_THRESHOLD_MS,
+)
 from kl_api_common.env import DEVELOPMENT_MODE
-from kl_api_common.utils import FastApiSioJSONSerializer
+from kl_api_common.utils import (
+    AdmissionClassLimit, AdmissionController, AdmissionMiddleware, CompressionMiddleware, FastApiORJSONResponse,
+    FastApiSioJSONSerializer, LoopActivityMiddleware, LoopStallWatchdog, get_single_flight_metrics,
+    register_metrics_source,
+)
 
 fast_api = FastAPI(
     title="KL.Account API",
     version="0.5.0",
     # Disable docs if not in dev mode
     openapi_url="/openapi.json" if DEVELOPMENT_MODE else None,
+    default_response_class=FastApiORJSONResponse,
 )
 # Set `cors_allowed_origins` to `None` and let `CORSMiddleware` handle CORS things
 # > Calling ``SocketManager`` patches `fast_api` with attribute `sio`
-SocketManager(app=fast_api, cors_allowed_origins=[], json=FastApiSioJSONSerializer)
+# > Websocket per-message deflate is negotiated by the server instead, see `run_server()`
+SocketManager(
+    app=fast_api,
+    cors_allowed_origins=[],
+    json=FastApiSioJSONSerializer,
+    http_compression=COMPRESSION_SOCKET_HTTP_COMPRESSION,
+    compression_threshold=COMPRESSION_SOCKET_THRESHOLD_BYTES,
+)
 fast_api_socket: socketio.AsyncServer = fast_api.sio
 
+admission_controller: AdmissionController | None = AdmissionController(
+    max_concurrency=ADMISSION_MAX_CONCURRENCY,
+    class_limits={
+        cost_class: AdmissionClassLimit(
+            max_concurrency=limit["max-concurrency"],
+            max_queue=limit["max-queue"],
+            max_wait_ms=limit["max-wait-ms"],
+        )
+        for cost_class, limit in ADMISSION_CLASSES.items()
+    },
+) if ADMISSION_ENABLED else None
+
+if admission_controller:
+    # Added before `CORSMiddleware`, so the 503 responses still have the CORS headers
+    fast_api.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        get_cost_class=lambda path: ADMISSION_ROUTES.get(path, "normal"),
+        # Socket.IO transport, socket events are admitted by the event handlers instead
+        excluded_path_prefixes=("/ws/",),
+    )
+    register_metrics_source("admission", admission_controller.get_metrics)
+
+register_metrics_source("singleFlight", get_single_flight_metrics)
+
+# Started on app startup, as it needs the running event loop
+loop_stall_watchdog: LoopStallWatchdog | None = LoopStallWatchdog(
+    interval_ms=LOOP_WATCHDOG_INTERVAL_MS,
+    threshold_ms=LOOP_WATCHDOG_THRESHOLD_MS,
+    max_logs_per_min=LOOP_WATCHDOG_MAX_LOGS_PER_MIN,
+) if LOOP_WATCHDOG_ENABLED else None
+
+if loop_stall_watchdog:
+    fast_api.add_middleware(LoopActivityMiddleware)
+    register_metrics_source("loop", loop_stall_watchdog.get_metrics)
+
+if COMPRESSION_ENABLED:
+    fast_api.add_middleware(
+        CompressionMiddleware,
+        min_size_bytes=COMPRESSION_MIN_SIZE_BYTES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_level=COMPRESSION_BROTLI_LEVEL,
+        thread_min_size_bytes=COMPRESSION_THREAD_MIN_SIZE_BYTES,
+        # Socket.IO transport compresses its responses by itself
+        excluded_path_prefixes=("/ws/",),
+    )
+
 fast_api.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -0,0 +1,40 @@
+import argparse
+import json
+import sys
+
+from kl_api_common.db import IndexReport, convert_to_capped, ensure_indexes, get_index_drifts
+
+# Import the collections so their indexes are registered
+import kl_api_account.db  # noqa: F401
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m kl_api_account.db", description="Manage the Mongo indexes.")
+    parser.add_argument(
+        "command",
+        choices=["ensure-indexes", "index-drift", "convert-to-capped"],
+        help="`ensure-indexes` creates the declared indexes which don't exist yet. "
+             "`index-drift` only reports the differences between the declared and the actual indexes. "
+             "`convert-to-capped` converts the existing collections declared as capped but not capped, "
+             "which locks the collections and drops their indexes, so run `ensure-indexes` afterwards.",
+    )
+    parser.add_argument("--max-workers", type=int, default=8, help="Max count of collections processed concurrently.")
+
+    args = parser.parse_args()
+
+    report: IndexReport
+
+    if args.command == "convert-to-capped":
+        report = convert_to_capped()
+    else:
+        report = (ensure_indexes if args.command == "ensure-indexes" else get_index_drifts)(
+            max_workers=args.max_workers
+        )
+
+    print(json.dumps(report, indent=2, default=str))
+
+    return 1 if report["errors"] or report["drifts"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
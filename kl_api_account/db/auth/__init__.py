@@ -1,3 +1,7 @@
 from .const import DEFAULT_ACCOUNT_PERMISSIONS, auth_db, auth_db_signup_key, auth_db_users, auth_db_validation
 from .model import DbUserModel, SignupKeyGenerationModel, SignupKeyModel, UserDataModel, ValidationSecretsModel
-from .type import Permission
+from .repository import (
+    SignupKeyRepository, UserRepository, ValidationSecretsRepository, signup_key_repository, user_repository,
+    validation_secrets_repository,
+)
+from .type import PERMISSION_BITS, Permission, get_permission_bits
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 from pymongo.collection import Collection
 from pymongo.database import Database
 
-from kl_api_common.db import mongo_client
+from kl_api_common.db import mongo_client, register_capped_collection, register_index
 from .type import Permission
 
 if TYPE_CHECKING:
@@ -11,14 +11,17 @@ if TYPE_CHECKING:
 
 auth_db: Database = mongo_client.get_database("auth")
 
-auth_db_users: Collection["DbUserModel"] = Collection(auth_db, "users")
-auth_db_users.create_index("username", unique=True)
+auth_db_users: Collection["DbUserModel"] = auth_db.get_collection("users")
+register_index(auth_db_users, "username", unique=True)
+# For finding the accounts having a permission
+register_index(auth_db_users, "permissions")
 
-auth_db_validation: Collection["ValidationSecretsModel"] = auth_db.get_collection("validation")
-if auth_db_validation is None:
-    auth_db_validation = auth_db.create_collection("validation", capped=True, size=4096, max=1)
+auth_db_validation: Collection["ValidationSecretsModel"] = register_capped_collection(
+    auth_db, "validation", size=4096, max_count=1
+)
 
-auth_db_signup_key: Collection["SignupKeyModel"] = Collection(auth_db, "signup_key")
-auth_db_signup_key.create_index("expiry", expireAfterSeconds=0)
+auth_db_signup_key: Collection["SignupKeyModel"] = auth_db.get_collection("signup_key")
+register_index(auth_db_signup_key, "expiry", expire_after_seconds=0)
+register_index(auth_db_signup_key, "signup_key", unique=True)
 
 DEFAULT_ACCOUNT_PERMISSIONS: list[Permission] = ["chart:view"]
@@ -2,10 +2,10 @@ from datetime import datetime
 from typing import Any
 
 from bson import ObjectId
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, PrivateAttr
 
 from kl_api_common.db import PyObjectId
-from .type import Permission
+from .type import PERMISSION_BITS, Permission, get_permission_bits
 
 
 class UserDataModel(BaseModel):
@@ -21,16 +21,26 @@ class UserDataModel(BaseModel):
         description="List of permissions that the account holder has."
     )
 
+    # Computed from `permissions` on the first permission check
+    _permission_bits: int | None = PrivateAttr(None)
+
     class Config:
         allow_population_by_field_name = True
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
 
+    @property
+    def permission_bits(self) -> int:
+        if self._permission_bits is None:
+            self._permission_bits = get_permission_bits(self.permissions)
+
+        return self._permission_bits
+
     def has_permission(self, permission: Permission) -> bool:
         if self.admin:
             return True
 
-        return permission in self.permissions
+        return bool(self.permission_bits & PERMISSION_BITS[permission])
 
     def dict(
         self,
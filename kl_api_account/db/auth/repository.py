@@ -0,0 +1,476 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable
+
+from pymongo import CursorType, ReturnDocument
+from pymongo.client_session import ClientSession
+from pymongo.errors import PyMongoError
+
+from kl_api_common.const import STORAGE_ENGINE
+from kl_api_common.db import MemoryCollection, PyObjectId, run_mongo_txn
+from kl_api_common.utils import SingleFlight, print_log_event
+from .const import auth_db_signup_key, auth_db_users, auth_db_validation
+from .type import PERMISSION_BITS, Permission, get_permission_bits
+
+
+class SignupKeyRepository(ABC):
+    @abstractmethod
+    def insert(self, doc: dict[str, Any]):
+        raise NotImplementedError()
+
+
+class UserRepository(ABC):
+    """Accounts. Inserting an account with a duplicated username raises ``DuplicateKeyError``."""
+
+    @abstractmethod
+    def get_by_id(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_by_username(self, username: str) -> dict[str, Any] | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def count(self) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_all_except(self, account_id: PyObjectId) -> Iterable[dict[str, Any]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def find_with_permission(self, permission: Permission) -> Iterable[dict[str, Any]]:
+        """Accounts having ``permission`` explicitly. Admins not having it are not included."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def insert(self, doc: dict[str, Any]):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def insert_many(self, docs: list[dict[str, Any]]):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def insert_with_signup_key(self, signup_key: str, make_doc: Callable[[dict[str, Any]], dict[str, Any]]) -> bool:
+        """
+        Consume ``signup_key`` and insert the account made by ``make_doc`` from the signup key entry atomically.
+
+        Returns ``False`` if ``signup_key`` does not exist. Nothing changes if the insertion fails.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_fields(self, account_id: PyObjectId, fields: dict[str, Any]) -> dict[str, Any] | None:
+        """Returns the updated account; ``None`` if the account does not exist. Same for the other updates."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_permissions(
+        self,
+        account_id: PyObjectId,
+        add: list[Permission],
+        remove: list[Permission],
+    ) -> dict[str, Any] | None:
+        """Add then remove the permissions in one operation. Permissions in both ``add`` and ``remove`` are removed."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def fill_permission_bits(self) -> int:
+        """Add ``permission_bits`` to the accounts stored without it. Returns the count of the updated accounts."""
+        raise NotImplementedError()
+
+
+class ValidationSecretsRepository(ABC):
+    """
+    Validation secrets in use.
+
+    Replacing the secrets keeps the earlier ones valid if the storage holds them, such as the collection
+    created before it's declared capped to 1 document.
+    """
+
+    @abstractmethod
+    def get_all(self) -> list[dict[str, Any]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def replace(self, doc: dict[str, Any]):
+        raise NotImplementedError()
+
+    def start_watching(self):
+        """Start following the secrets replaced by the other processes. Nothing to do if not shared."""
+
+    def stop_watching(self):
+        pass
+
+
+def _with_permission_bits(doc: dict[str, Any]) -> dict[str, Any]:
+    """
+    Set ``permission_bits`` of the account ``doc`` from its ``permissions``, and return ``doc``.
+
+    ``permission_bits`` is the bitmask of :data:`PERMISSION_BITS`, stored along with ``permissions``.
+    """
+    doc["permission_bits"] = get_permission_bits(doc["permissions"])
+
+    return doc
+
+
+# region Mongo
+
+class MongoSignupKeyRepository(SignupKeyRepository):
+    def insert(self, doc: dict[str, Any]):
+        auth_db_signup_key.insert_one(doc)
+
+
+def _get_permission_bits_expr(permissions_expr: Any) -> dict[str, Any]:
+    return {"$sum": [
+        {"$cond": [{"$in": [permission, permissions_expr]}, bit, 0]}
+        for permission, bit in PERMISSION_BITS.items()
+    ]}
+
+
+class MongoUserRepository(UserRepository):
+    def __init__(self):
+        # Concurrent requests of the same user, such as multiple tabs or reconnections, share one query
+        self._username_lookups: SingleFlight[dict[str, Any] | None] = SingleFlight("user.username")
+
+    def get_by_id(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        return auth_db_users.find_one({"_id": account_id})
+
+    def get_by_username(self, username: str) -> dict[str, Any] | None:
+        doc = self._username_lookups.do(username, lambda: auth_db_users.find_one({"username": username}))
+
+        # Copied as the result is shared between the collapsed calls
+        return dict(doc) if doc else None
+
+    def count(self) -> int:
+        return auth_db_users.count_documents({})
+
+    def find_all_except(self, account_id: PyObjectId) -> Iterable[dict[str, Any]]:
+        # Secrets are not needed for listing the accounts, so don't transfer them
+        return auth_db_users.find(
+            {"_id": {"$ne": account_id}},
+            projection={"hashed_password": False, "signup_key": False},
+        )
+
+    def find_with_permission(self, permission: Permission) -> Iterable[dict[str, Any]]:
+        return auth_db_users.find(
+            {"permissions": permission},
+            projection={"hashed_password": False, "signup_key": False},
+        )
+
+    def insert(self, doc: dict[str, Any]):
+        auth_db_users.insert_one(_with_permission_bits(doc))
+        self._username_lookups.forget(doc["username"])
+
+    def insert_many(self, docs: list[dict[str, Any]]):
+        auth_db_users.insert_many([_with_permission_bits(doc) for doc in docs])
+        self._username_lookups.forget_all()
+
+    def insert_with_signup_key(self, signup_key: str, make_doc: Callable[[dict[str, Any]], dict[str, Any]]) -> bool:
+        def signup_in_txn(session: ClientSession) -> bool:
+            signup_key_entry = auth_db_signup_key.find_one_and_delete({"signup_key": signup_key}, session=session)
+            if not signup_key_entry:
+                return False
+
+            doc = _with_permission_bits(make_doc(signup_key_entry))
+            auth_db_users.insert_one(doc, session=session)
+            inserted_usernames.append(doc["username"])
+            return True
+
+        inserted_usernames: list[str] = []
+
+        # Signups using the same key conflict anyway, so exclude them early instead of retrying on write conflict
+        signed_up = run_mongo_txn(signup_in_txn, lock_keys=[f"signup-key:{signup_key}"])
+
+        for username in inserted_usernames:
+            self._username_lookups.forget(username)
+
+        return signed_up
+
+    def _update(
+        self,
+        account_id: PyObjectId,
+        update: dict[str, Any] | list[dict[str, Any]],
+        conditions: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | None:
+        updated = auth_db_users.find_one_and_update(
+            {"_id": account_id} | (conditions or {}), update, return_document=ReturnDocument.AFTER
+        )
+
+        # Lookups are keyed by username, which is not known here
+        self._username_lookups.forget_all()
+
+        return updated
+
+    def update_fields(self, account_id: PyObjectId, fields: dict[str, Any]) -> dict[str, Any] | None:
+        return self._update(account_id, {"$set": fields})
+
+    def update_permissions(
+        self,
+        account_id: PyObjectId,
+        add: list[Permission],
+        remove: list[Permission],
+    ) -> dict[str, Any] | None:
+        add = [permission for permission in dict.fromkeys(add) if permission not in remove]
+
+        # Adding only or removing only is one update with `$bit`, matching only the accounts having `permission_bits`,
+        # as `$bit` takes a missing field as 0
+        bit_update: dict[str, Any] | None = None
+        if add and not remove:
+            bit_update = {
+                "$addToSet": {"permissions": {"$each": add}},
+                "$bit": {"permission_bits": {"or": get_permission_bits(add)}},
+            }
+        elif remove and not add:
+            bit_update = {
+                "$pullAll": {"permissions": remove},
+                "$bit": {"permission_bits": {"and": ~get_permission_bits(remove)}},
+            }
+
+        if bit_update and (updated := self._update(account_id, bit_update, {"permission_bits": {"$exists": True}})):
+            return updated
+
+        # `$addToSet` and `$pullAll` can't update the same field in one update, so update both in a pipeline instead,
+        # which also works on the accounts stored without `permission_bits`
+        return self._update(account_id, [
+            {"$set": {"permissions": {"$concatArrays": [
+                {"$filter": {"input": "$permissions", "cond": {"$not": [{"$in": ["$$this", remove]}]}}},
+                {"$filter": {"input": add, "cond": {"$not": [{"$in": ["$$this", "$permissions"]}]}}},
+            ]}}},
+            {"$set": {"permission_bits": _get_permission_bits_expr("$permissions")}},
+        ])
+
+    def fill_permission_bits(self) -> int:
+        return auth_db_users.update_many(
+            {"permission_bits": {"$exists": False}},
+            [{"$set": {"permission_bits": _get_permission_bits_expr("$permissions")}}],
+        ).modified_count
+
+
+class MongoValidationSecretsRepository(ValidationSecretsRepository):
+    """
+    Caches the secrets in memory while watching.
+
+    Watching tails the capped collection on a thread, so the secrets replaced by the other workers are cached
+    as they are inserted. The cache is only used while the tailing cursor is alive, and the secrets are queried
+    otherwise, for example, before the collection has any secrets.
+    """
+
+    # All documents are queried at once, so all lookups share the same key
+    _LOOKUP_KEY = "validation"
+
+    def __init__(self, *, retry_interval_sec: float = 5):
+        self.retry_interval_sec = retry_interval_sec
+
+        self._lookups: SingleFlight[list[dict[str, Any]]] = SingleFlight("validation-secrets")
+
+        self._lock = threading.Lock()
+        self._cached: list[dict[str, Any]] = []
+        self._cache_valid = False
+
+        self._stopped = threading.Event()
+        self._watcher: threading.Thread | None = None
+        # Logged once until tailing succeeds, as tailing is retried every `retry_interval_sec`
+        self._tail_failure_logged = False
+
+    @staticmethod
+    def _find_all() -> list[dict[str, Any]]:
+        return list(auth_db_validation.find())
+
+    def get_all(self) -> list[dict[str, Any]]:
+        with self._lock:
+            if self._cache_valid:
+                return [dict(doc) for doc in self._cached]
+
+        # Copied as the result is shared between the collapsed calls
+        return [dict(doc) for doc in self._lookups.do(self._LOOKUP_KEY, self._find_all)]
+
+    def replace(self, doc: dict[str, Any]):
+        # Inserting removes the old secrets if the collection is capped to 1 document
+        auth_db_validation.insert_one(doc)
+        self._lookups.forget(self._LOOKUP_KEY)
+
+        # Not waiting for the tailing, so the new secrets are usable in this process right away
+        docs = self._find_all()
+
+        with self._lock:
+            self._cached = docs
+
+    def _tail(self) -> bool:
+        """Cache the secrets from a tailing cursor until it dies. Returns if the cursor has been alive."""
+        tailing = False
+        cursor = None
+
+        try:
+            cursor = auth_db_validation.find(cursor_type=CursorType.TAILABLE_AWAIT)
+
+            while not self._stopped.is_set():
+                # Waits for the new secrets for a while, then stops if none
+                has_new_secrets = False
+                for _ in cursor:
+                    has_new_secrets = True
+
+                # Cursor of an empty capped collection dies right away
+                if not cursor.alive:
+                    return tailing
+
+                # Queried again instead of caching the tailed ones, as the old secrets could be removed by inserting
+                if has_new_secrets or not tailing:
+                    docs = self._find_all()
+
+                    with self._lock:
+                        self._cached = docs
+                        self._cache_valid = True
+
+                if not tailing:
+                    tailing = True
+                    self._tail_failure_logged = False
+        except PyMongoError as ex:
+            # Failing after tailing is expected, as the tailed secrets get removed when the new ones are inserted.
+            # Failing before it is not, for example, the collection is not capped.
+            if not tailing and not self._tail_failure_logged:
+                self._tail_failure_logged = True
+                print_log_event(
+                    "[yellow]Failed to tail the validation secrets, querying them instead[/]: {error}",
+                    level="WARNING", error=str(ex)
+                )
+
+            return tailing
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+            with self._lock:
+                self._cache_valid = False
+
+        return tailing
+
+    def _watch(self):
+        while not self._stopped.is_set():
+            # Tail again immediately if the cursor died after tailing, as that's mostly because of the replacement
+            if not self._tail():
+                self._stopped.wait(self.retry_interval_sec)
+
+    def start_watching(self):
+        if self._watcher:
+            return
+
+        self._stopped.clear()
+        self._watcher = threading.Thread(target=self._watch, name="ValidationSecretsWatcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if not self._watcher:
+            return
+
+        self._stopped.set()
+        self._watcher.join()
+        self._watcher = None
+
+# endregion
+
+
+# region Memory
+
+class MemorySignupKeyRepository(SignupKeyRepository):
+    def __init__(self):
+        self.signup_keys = MemoryCollection("signup_key")
+        self.signup_keys.create_index("expiry", expire_after_seconds=0)
+        self.signup_keys.create_index("signup_key", unique=True)
+
+    def insert(self, doc: dict[str, Any]):
+        self.signup_keys.insert_one(doc)
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self, signup_key_repository: MemorySignupKeyRepository):
+        self._users = MemoryCollection("users")
+        self._users.create_index("username", unique=True)
+        self._signup_keys = signup_key_repository.signup_keys
+
+    def get_by_id(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        return self._users.find_one({"_id": account_id})
+
+    def get_by_username(self, username: str) -> dict[str, Any] | None:
+        return self._users.find_one({"username": username})
+
+    def count(self) -> int:
+        return self._users.count()
+
+    def find_all_except(self, account_id: PyObjectId) -> Iterable[dict[str, Any]]:
+        return [doc for doc in self._users.find() if doc["_id"] != account_id]
+
+    def find_with_permission(self, permission: Permission) -> Iterable[dict[str, Any]]:
+        bit = PERMISSION_BITS[permission]
+
+        return [doc for doc in self._users.find() if doc["permission_bits"] & bit]
+
+    def insert(self, doc: dict[str, Any]):
+        self._users.insert_one(_with_permission_bits(doc))
+
+    def insert_many(self, docs: list[dict[str, Any]]):
+        self._users.insert_many([_with_permission_bits(doc) for doc in docs])
+
+    def insert_with_signup_key(self, signup_key: str, make_doc: Callable[[dict[str, Any]], dict[str, Any]]) -> bool:
+        with self._users.lock, self._signup_keys.lock:
+            signup_key_entry = self._signup_keys.find_one({"signup_key": signup_key})
+            if not signup_key_entry:
+                return False
+
+            # Inserted first, so the signup key stays if the insertion fails
+            self._users.insert_one(_with_permission_bits(make_doc(signup_key_entry)))
+            self._signup_keys.delete_one({"_id": signup_key_entry["_id"]})
+            return True
+
+    def update_fields(self, account_id: PyObjectId, fields: dict[str, Any]) -> dict[str, Any] | None:
+        return self._users.update_one({"_id": account_id}, lambda doc: doc.update(fields))
+
+    def update_permissions(
+        self,
+        account_id: PyObjectId,
+        add: list[Permission],
+        remove: list[Permission],
+    ) -> dict[str, Any] | None:
+        def update(doc: dict[str, Any]):
+            doc["permissions"] = [permission for permission in doc["permissions"] if permission not in remove] + [
+                permission for permission in dict.fromkeys(add)
+                if permission not in remove and permission not in doc["permissions"]
+            ]
+            _with_permission_bits(doc)
+
+        return self._users.update_one({"_id": account_id}, update)
+
+    def fill_permission_bits(self) -> int:
+        # Accounts are always inserted with `permission_bits`
+        return 0
+
+
+class MemoryValidationSecretsRepository(ValidationSecretsRepository):
+    def __init__(self):
+        self._secrets: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    def get_all(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(self._secrets)] if self._secrets else []
+
+    def replace(self, doc: dict[str, Any]):
+        with self._lock:
+            self._secrets = dict(doc)
+
+# endregion
+
+
+signup_key_repository: SignupKeyRepository
+user_repository: UserRepository
+validation_secrets_repository: ValidationSecretsRepository
+
+if STORAGE_ENGINE == "memory":
+    signup_key_repository = MemorySignupKeyRepository()
+    user_repository = MemoryUserRepository(signup_key_repository)
+    validation_secrets_repository = MemoryValidationSecretsRepository()
+else:
+    signup_key_repository = MongoSignupKeyRepository()
+    user_repository = MongoUserRepository()
+    validation_secrets_repository = MongoValidationSecretsRepository()
@@ -1,5 +1,6 @@
-from typing import Literal
+from typing import Iterable, Literal, get_args
 
+# Only append new permissions, as the bit of each permission follows this order
 Permission = Literal[
     "chart:view",
     "permission:add",
@@ -8,5 +9,17 @@ Permission = Literal[
     "account:expiry",
     "account:block",
     "account:view",
-    "config:session"
+    "config:session",
+    "debug:profile"
 ]
+
+PERMISSION_BITS: dict[Permission, int] = {permission: 1 << idx for idx, permission in enumerate(get_args(Permission))}
+
+
+def get_permission_bits(permissions: Iterable[Permission]) -> int:
+    bits = 0
+
+    for permission in permissions:
+        bits |= PERMISSION_BITS[permission]
+
+    return bits
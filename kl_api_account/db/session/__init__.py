@@ -1,2 +1,3 @@
 from .const import user_db_session
 from .control import record_session_connected, record_session_disconnected, record_session_checked
+from .repository import SessionRepository, session_repository
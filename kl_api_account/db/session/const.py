@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 from pymongo.collection import Collection
 from pymongo.database import Database
 
-from kl_api_common.db import mongo_client
+from kl_api_common.db import mongo_client, register_index
 
 if TYPE_CHECKING:
     from .model import UserSessionModel
@@ -11,7 +11,10 @@ if TYPE_CHECKING:
 
 user_db: Database = mongo_client.get_database("user")
 
-user_db_session: Collection["UserSessionModel"] = Collection(user_db, "session")
-user_db_session.create_index("account_id", unique=True)
-# Invalidate session after 300 secs
-user_db_session.create_index("last_check", expireAfterSeconds=300)
+user_db_session: Collection["UserSessionModel"] = user_db.get_collection("session")
+register_index(user_db_session, "account_id", unique=True)
+register_index(user_db_session, "session_id")
+# Invalidate session after this
+SESSION_EXPIRY_SEC = 300
+
+register_index(user_db_session, "last_check", expire_after_seconds=SESSION_EXPIRY_SEC)
@@ -1,9 +1,9 @@
 from datetime import datetime, timezone
 
-from kl_api_common.db import PyObjectId
-from kl_api_common.utils import print_log, print_socket_event
-from .const import user_db_session
+from kl_api_common.db import PyObjectId, decode_trusted
+from kl_api_common.utils import print_log_event, print_socket_event
 from .model import UserSessionModel
+from .repository import session_repository
 
 
 def record_session_connected(
@@ -15,7 +15,7 @@ def record_session_connected(
 
     Returns the session ID to disconnect; ``None`` if no session disconnection needed.
     """
-    session = user_db_session.find_one({"account_id": account_id})
+    session = session_repository.get(account_id)
 
     if not session:
         # No existing session for the account
@@ -24,44 +24,36 @@ def record_session_connected(
             session_id=session_id,
             last_check=datetime.utcnow().replace(tzinfo=timezone.utc)
         )
-        user_db_session.insert_one(model.dict())
+        session_repository.insert(model.dict())
 
-        print_log(
-            f"Session [cyan]created[/] for account [yellow]{account_id}[/] - SID: `[cyan]{session_id}[/]`",
+        print_log_event(
+            "Session [cyan]created[/] for account [yellow]{accountId}[/] - SID: `[cyan]{sessionId}[/]`",
             accountId=account_id, sessionId=session_id
         )
         return None
 
-    session_model = UserSessionModel(**session)
+    session_model = decode_trusted(UserSessionModel, session)
 
     if session_model.session_id != session_id:
         # Session conflict
-        user_db_session.update_one(
-            {"account_id": account_id},
-            {"$set": {"session_id": session_id}},
-        )
-        print_log(
-            f"Session [bold red]replaced[/] for account [yellow]{account_id}[/] - "
-            f"SID: `[cyan]{session_model.session_id}[/]` -> `[cyan]{session_id}[/]`",
+        session_repository.update_session_id(account_id, session_id)
+        print_log_event(
+            "Session [bold red]replaced[/] for account [yellow]{accountId}[/] - "
+            "SID: `[cyan]{sessionIdOld}[/]` -> `[cyan]{sessionIdNew}[/]`",
+            fields={"sessionIdOld": session_model.session_id, "sessionIdNew": session_id},
             accountId=account_id, sessionId={"old": session_model.session_id, "new": session_id}
         )
         return session_model.session_id
 
-    user_db_session.update_one(
-        {"account_id": account_id},
-        {"$set": {"session_id": session_id}},
-    )
-    print_log(f"Session [cyan]recorded[/] for account [yellow]{account_id}[/]", accountId=account_id)
+    session_repository.update_session_id(account_id, session_id)
+    print_log_event("Session [cyan]recorded[/] for account [yellow]{accountId}[/]", accountId=account_id)
     return None
 
 
 def record_session_checked(account_id: PyObjectId):
-    user_db_session.update_one(
-        {"account_id": account_id},
-        {"$set": {"last_check": datetime.utcnow().replace(tzinfo=timezone.utc)}}
-    )
+    session_repository.update_last_check(account_id, datetime.utcnow().replace(tzinfo=timezone.utc))
 
 
 def record_session_disconnected(session_id: str):
-    user_db_session.delete_one({"session_id": session_id})
+    session_repository.delete_by_session_id(session_id)
     print_socket_event("disconnect", session_id=session_id)
@@ -0,0 +1,87 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any
+
+from kl_api_common.const import STORAGE_ENGINE
+from kl_api_common.db import MemoryCollection, PyObjectId
+from .const import SESSION_EXPIRY_SEC, user_db_session
+
+
+class SessionRepository(ABC):
+    """``socket.io`` sessions of the accounts, one for each account."""
+
+    @abstractmethod
+    def get(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_account_ids(self) -> set[PyObjectId]:
+        """Get the IDs of the accounts having a session."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def insert(self, doc: dict[str, Any]):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_session_id(self, account_id: PyObjectId, session_id: str):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_last_check(self, account_id: PyObjectId, last_check: datetime):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_by_session_id(self, session_id: str):
+        raise NotImplementedError()
+
+
+class MongoSessionRepository(SessionRepository):
+    def get(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        return user_db_session.find_one({"account_id": account_id})
+
+    def get_account_ids(self) -> set[PyObjectId]:
+        return {session["account_id"] for session in user_db_session.find({}, {"account_id": 1})}
+
+    def insert(self, doc: dict[str, Any]):
+        user_db_session.insert_one(doc)
+
+    def update_session_id(self, account_id: PyObjectId, session_id: str):
+        user_db_session.update_one({"account_id": account_id}, {"$set": {"session_id": session_id}})
+
+    def update_last_check(self, account_id: PyObjectId, last_check: datetime):
+        user_db_session.update_one({"account_id": account_id}, {"$set": {"last_check": last_check}})
+
+    def delete_by_session_id(self, session_id: str):
+        user_db_session.delete_one({"session_id": session_id})
+
+
+class MemorySessionRepository(SessionRepository):
+    def __init__(self):
+        self._sessions = MemoryCollection("session")
+        self._sessions.create_index("account_id", unique=True)
+        self._sessions.create_index("session_id")
+        self._sessions.create_index("last_check", expire_after_seconds=SESSION_EXPIRY_SEC)
+
+    def get(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        return self._sessions.find_one({"account_id": account_id})
+
+    def get_account_ids(self) -> set[PyObjectId]:
+        return {session["account_id"] for session in self._sessions.find()}
+
+    def insert(self, doc: dict[str, Any]):
+        self._sessions.insert_one(doc)
+
+    def update_session_id(self, account_id: PyObjectId, session_id: str):
+        self._sessions.update_one({"account_id": account_id}, lambda doc: doc.update(session_id=session_id))
+
+    def update_last_check(self, account_id: PyObjectId, last_check: datetime):
+        self._sessions.update_one({"account_id": account_id}, lambda doc: doc.update(last_check=last_check))
+
+    def delete_by_session_id(self, session_id: str):
+        self._sessions.delete_one({"session_id": session_id})
+
+
+session_repository: SessionRepository = (
+    MemorySessionRepository() if STORAGE_ENGINE == "memory" else MongoSessionRepository()
+)
@@ -1,2 +1,3 @@
 from .const import user_db, user_db_config
 from .model import PxSlotName, LayoutType, UserConfigModel
+from .repository import ConfigRepository, config_repository
@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+from pymongo import ReturnDocument
+
+from kl_api_common.const import STORAGE_ENGINE
+from kl_api_common.db import MemoryCollection, PyObjectId
+from kl_api_common.utils import SingleFlight
+from .const import user_db_config
+
+
+class ConfigRepository(ABC):
+    """User configs, one for each account."""
+
+    @abstractmethod
+    def get(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def insert(self, doc: dict[str, Any]):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_field(self, account_id: PyObjectId, key: str, data: Any) -> dict[str, Any] | None:
+        """Returns the updated config; ``None`` if the config does not exist."""
+        raise NotImplementedError()
+
+
+class MongoConfigRepository(ConfigRepository):
+    def __init__(self):
+        self._lookups: SingleFlight[dict[str, Any] | None] = SingleFlight("config.account-id")
+
+    def get(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        doc = self._lookups.do(account_id, lambda: user_db_config.find_one({"account_id": account_id}))
+
+        # Copied as the result is shared between the collapsed calls
+        return dict(doc) if doc else None
+
+    def insert(self, doc: dict[str, Any]):
+        user_db_config.insert_one(doc)
+        self._lookups.forget(doc["account_id"])
+
+    def update_field(self, account_id: PyObjectId, key: str, data: Any) -> dict[str, Any] | None:
+        updated = user_db_config.find_one_and_update(
+            {"account_id": account_id},
+            {"$set": {key: data}},
+            return_document=ReturnDocument.AFTER
+        )
+        self._lookups.forget(account_id)
+
+        return updated
+
+
+class MemoryConfigRepository(ConfigRepository):
+    def __init__(self):
+        self._configs = MemoryCollection("config")
+        self._configs.create_index("account_id", unique=True)
+
+    def get(self, account_id: PyObjectId) -> dict[str, Any] | None:
+        return self._configs.find_one({"account_id": account_id})
+
+    def insert(self, doc: dict[str, Any]):
+        self._configs.insert_one(doc)
+
+    def update_field(self, account_id: PyObjectId, key: str, data: Any) -> dict[str, Any] | None:
+        return self._configs.update_one({"account_id": account_id}, lambda doc: doc.update({key: data}))
+
+
+config_repository: ConfigRepository = (
+    MemoryConfigRepository() if STORAGE_ENGINE == "memory" else MongoConfigRepository()
+)
@@ -1,33 +1,27 @@
+import asyncio
 from typing import Any, Callable
 
 from bson import ObjectId
-from fastapi import Body, Depends
-from pymongo import ReturnDocument
+from fastapi import Body, Depends, Query
 
-from kl_api_common.db import PyObjectId
-from kl_api_account.db import Permission, UserDataModel, auth_db_users, user_db_session
-from kl_api_account.utils import generate_bad_request_exception, generate_insufficient_permission_exception
-from .model import AccountData, BlockedUpdateModel, ExpiryUpdateModel, PermissionUpdateModel
-from ..auth import get_active_user_by_user_data
-
-
-def require_permission(executor_uid: PyObjectId | None, permission_required: Permission):
-    if not executor_uid:
-        raise generate_bad_request_exception("Invalid executor UID (None)")
-
-    executor = auth_db_users.find_one({"_id": executor_uid})
-
-    if not executor or not UserDataModel(**executor).has_permission(permission_required):
-        raise generate_insufficient_permission_exception([permission_required])
+from kl_api_common.db import decode_trusted
+from kl_api_common.utils import ProfilerBusy, get_metrics, profile_threads
+from kl_api_account.db import Permission, UserDataModel, session_repository, user_repository
+from kl_api_account.utils import generate_bad_request_exception, generate_conflict_exception
+from .model import AccountData, BlockedUpdateModel, ExpiryUpdateModel, PermissionUpdateModel, ProfileRequestModel
+from ..auth import (
+    get_active_user_by_user_data, get_active_user_with_permissions, get_admin_user_by_oauth2_token,
+    require_permissions,
+)
 
 
 def user_data_dict_to_account_data(
     user_data_raw: dict[str, Any], *,
     online: Callable[[UserDataModel], bool]
 ) -> AccountData:
-    data = UserDataModel(**user_data_raw)
+    data = decode_trusted(UserDataModel, user_data_raw)
 
-    return AccountData(
+    return AccountData.construct(
         id=str(data.id),
         username=data.username,
         permissions=data.permissions,
@@ -38,13 +32,19 @@ def user_data_dict_to_account_data(
     )
 
 
-def get_account_list(executor: UserDataModel = Depends(get_active_user_by_user_data)) -> list[AccountData]:
-    require_permission(executor.id, "account:view")
+def get_account_list(
+    executor: UserDataModel = Depends(get_active_user_with_permissions("account:view")),
+    permission: Permission | None = Query(None, description="Only list the accounts having this permission."),
+) -> list[AccountData]:
+    logged_in_account_ids = session_repository.get_account_ids()
 
-    logged_in_account_ids = {session["account_id"] for session in user_db_session.find()}
+    if permission:
+        accounts = (data for data in user_repository.find_with_permission(permission) if data["_id"] != executor.id)
+    else:
+        accounts = user_repository.find_all_except(executor.id)
 
     ret: list[AccountData] = []
-    for data in auth_db_users.find({"_id": {"$ne": executor.id}}):
+    for data in accounts:
         ret.append(user_data_dict_to_account_data(
             data,
             online=lambda user_data: user_data.id in logged_in_account_ids
@@ -54,49 +54,37 @@ def get_account_list(executor: UserDataModel = Depends(get_active_user_by_user_d
 
 
 def update_account_property(
-    executor: UserDataModel,
-    required_permission: Permission,
     target_id: ObjectId,
-    update: dict[str, Any],
+    update: Callable[[ObjectId], dict[str, Any] | None],
 ) -> AccountData:
-    require_permission(executor.id, required_permission)
-
-    updated_account = auth_db_users.find_one_and_update(
-        {"_id": target_id},
-        update,
-        return_document=ReturnDocument.AFTER
-    )
+    updated_account = update(target_id)
 
     if not updated_account:
         raise generate_bad_request_exception(f"No matching account to update ({target_id})")
 
     return user_data_dict_to_account_data(
         updated_account,
-        online=lambda user_data: user_db_session.find_one({"account_id": user_data.id}) is not None,
+        online=lambda user_data: session_repository.get(user_data.id) is not None,
     )
 
 
 def update_account_expiry(
-    executor: UserDataModel = Depends(get_active_user_by_user_data),
+    _: UserDataModel = Depends(get_active_user_with_permissions("account:expiry")),
     expiry_update_data: ExpiryUpdateModel = Body(...),
 ) -> AccountData:
     return update_account_property(
-        executor,
-        "account:expiry",
         ObjectId(expiry_update_data.id),
-        {"$set": {"expiry": expiry_update_data.expiry}}
+        lambda account_id: user_repository.update_fields(account_id, {"expiry": expiry_update_data.expiry})
     )
 
 
 def update_account_blocked(
-    executor: UserDataModel = Depends(get_active_user_by_user_data),
+    _: UserDataModel = Depends(get_active_user_with_permissions("account:block")),
     blocked_update_data: BlockedUpdateModel = Body(...),
 ) -> AccountData:
     return update_account_property(
-        executor,
-        "account:block",
         ObjectId(blocked_update_data.id),
-        {"$set": {"blocked": blocked_update_data.blocked}}
+        lambda account_id: user_repository.update_fields(account_id, {"blocked": blocked_update_data.blocked})
     )
 
 
@@ -104,28 +92,46 @@ def update_account_permission(
     executor: UserDataModel = Depends(get_active_user_by_user_data),
     permission_update_data: PermissionUpdateModel = Body(...),
 ) -> AccountData:
-    updated_account_data: AccountData | None = None
-
-    # Error if `$addToSet` and `$pullAll` happens in one update operator
-    # Therefore splitting operations into 2
+    required_permissions: list[Permission] = []
 
     if permission_update_data.add:
-        updated_account_data = update_account_property(
-            executor,
-            "permission:add",
-            ObjectId(permission_update_data.id),
-            {"$addToSet": {"permissions": {"$each": permission_update_data.add}}}
-        )
+        required_permissions.append("permission:add")
 
     if permission_update_data.remove:
-        updated_account_data = update_account_property(
-            executor,
-            "permission:remove",
-            ObjectId(permission_update_data.id),
-            {"$pullAll": {"permissions": permission_update_data.remove}}
-        )
+        required_permissions.append("permission:remove")
 
-    if updated_account_data is None:
+    if not required_permissions:
         raise generate_bad_request_exception("Update data should not have both empty `add` and `remove`")
 
-    return updated_account_data
+    require_permissions(executor, *required_permissions)
+
+    return update_account_property(
+        ObjectId(permission_update_data.id),
+        lambda account_id: user_repository.update_permissions(
+            account_id, permission_update_data.add, permission_update_data.remove
+        )
+    )
+
+
+def get_worker_metrics(_: UserDataModel = Depends(get_admin_user_by_oauth2_token)) -> dict[str, Any]:
+    return get_metrics()
+
+
+async def get_worker_profile(
+    _: UserDataModel = Depends(get_active_user_with_permissions("debug:profile")),
+    profile_request: ProfileRequestModel = Body(...),
+) -> str | dict[str, Any]:
+    try:
+        # Sampling thread, so the event loop keeps running and gets sampled
+        result = await asyncio.to_thread(
+            profile_threads,
+            profile_request.duration_sec,
+            interval_ms=profile_request.interval_ms,
+        )
+    except ProfilerBusy as ex:
+        raise generate_conflict_exception("Another profile is running on this worker") from ex
+
+    if profile_request.format == "collapsed":
+        return result.to_collapsed()
+
+    return result.to_speedscope()
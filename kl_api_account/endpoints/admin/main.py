@@ -1,6 +1,13 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse, Response
 
-from .db_control import get_account_list, update_account_blocked, update_account_expiry, update_account_permission
+from kl_api_common.utils import FastApiORJSONResponse
+from .db_control import (
+    get_account_list, get_worker_metrics, get_worker_profile, update_account_blocked, update_account_expiry,
+    update_account_permission,
+)
 from .model import AccountData
 
 admin_router = APIRouter(prefix="/admin")
@@ -8,11 +15,13 @@ admin_router = APIRouter(prefix="/admin")
 
 @admin_router.get(
     "/accounts",
-    description="Get a list of accounts.",
+    description="Get a list of accounts. "
+                "Only the accounts having `permission` explicitly are listed if it's given.",
     response_model=list[AccountData],
 )
-async def get_accounts(accounts: list[AccountData] = Depends(get_account_list)) -> list[AccountData]:
-    return accounts
+async def get_accounts(accounts: list[AccountData] = Depends(get_account_list)) -> FastApiORJSONResponse:
+    # Returning the response directly skips validating the accounts again, which are made from the stored data
+    return FastApiORJSONResponse(accounts)
 
 
 @admin_router.post(
@@ -20,8 +29,8 @@ async def get_accounts(accounts: list[AccountData] = Depends(get_account_list))
     description="Update the membership expiry of an account.",
     response_model=AccountData,
 )
-async def update_expiry(updated_account: AccountData = Depends(update_account_expiry)) -> AccountData:
-    return updated_account
+async def update_expiry(updated_account: AccountData = Depends(update_account_expiry)) -> FastApiORJSONResponse:
+    return FastApiORJSONResponse(updated_account)
 
 
 @admin_router.post(
@@ -29,8 +38,8 @@ async def update_expiry(updated_account: AccountData = Depends(update_account_ex
     description="Update the blocking status of an account.",
     response_model=AccountData,
 )
-async def update_blocked(updated_account: AccountData = Depends(update_account_blocked)) -> AccountData:
-    return updated_account
+async def update_blocked(updated_account: AccountData = Depends(update_account_blocked)) -> FastApiORJSONResponse:
+    return FastApiORJSONResponse(updated_account)
 
 
 @admin_router.post(
@@ -38,5 +47,30 @@ async def update_blocked(updated_account: AccountData = Depends(update_account_b
     description="Update permissions of an account.",
     response_model=AccountData,
 )
-async def update_permissions(updated_account: AccountData = Depends(update_account_permission)) -> AccountData:
-    return updated_account
+async def update_permissions(
+    updated_account: AccountData = Depends(update_account_permission)
+) -> FastApiORJSONResponse:
+    return FastApiORJSONResponse(updated_account)
+
+
+@admin_router.get(
+    "/metrics",
+    description="Get the in-process metrics of the worker handling this request. Only admin can perform this action.",
+    response_model=dict[str, Any],
+)
+async def get_metrics(metrics: dict[str, Any] = Depends(get_worker_metrics)) -> dict[str, Any]:
+    return metrics
+
+
+@admin_router.post(
+    "/profile",
+    description="Sample the stacks of all threads of the worker handling this request, "
+                "and return the collapsed stacks or a speedscope profile. "
+                "Only one profile runs at a time on each worker. Requires the permission `debug:profile`.",
+    response_model=None,
+)
+async def get_profile(profile: str | dict[str, Any] = Depends(get_worker_profile)) -> Response:
+    if isinstance(profile, str):
+        return PlainTextResponse(profile)
+
+    return FastApiORJSONResponse(profile)
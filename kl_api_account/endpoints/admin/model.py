@@ -4,6 +4,7 @@ from typing import Any, Optional
 from pydantic import BaseModel, Field, root_validator
 
 from kl_api_common.db import PyObjectId
+from kl_api_common.utils import PROFILE_MAX_DURATION_SEC, ProfileFormat
 from kl_api_account.db import Permission
 
 
@@ -48,3 +49,13 @@ class PermissionUpdateModel(BaseModel):
 
 class SessionDeleteModel(BaseModel):
     session: str = Field(...)
+
+
+class ProfileRequestModel(BaseModel):
+    duration_sec: float = Field(10, gt=0, le=PROFILE_MAX_DURATION_SEC, description="Duration to sample.")
+    interval_ms: float = Field(10, ge=1, le=1000, description="Interval between the samples.")
+    format: ProfileFormat = Field(
+        "speedscope",
+        description="`collapsed` returns the collapsed stacks for the flame graph tools. "
+                    "`speedscope` returns a profile to load in https://www.speedscope.app.",
+    )
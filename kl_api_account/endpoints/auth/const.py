@@ -1,5 +1,17 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 auth_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token-doc")
-auth_crypto_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+@lru_cache(maxsize=None)
+def get_auth_crypto_ctx() -> "CryptContext":
+    # Loaded on the first use as `passlib` and `bcrypt` are only needed when signing in or up
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
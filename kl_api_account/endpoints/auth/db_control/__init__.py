@@ -1,7 +1,8 @@
 from .account_creation import generate_account_creation_key
 from .admin import generate_validation_secrets
 from .auth_user import (
-    generate_access_token, generate_access_token_on_doc, get_active_user_by_user_data,
-    get_active_user_by_oauth2_token, get_user_data_by_oauth2_token, refresh_access_token,
+    generate_access_token, generate_access_token_on_doc, get_active_user_by_user_data, get_admin_user_by_oauth2_token,
+    get_active_user_by_oauth2_token, get_active_user_with_permissions, get_user_data_by_oauth2_token,
+    refresh_access_token, require_permissions,
 )
 from .signup import signup_user
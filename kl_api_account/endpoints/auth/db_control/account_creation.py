@@ -4,7 +4,7 @@ from datetime import datetime, timedelta, timezone
 from fastapi import Body, Depends
 
 from kl_api_common.const import ACCOUNT_SIGNUP_KEY_EXPIRY_SEC
-from kl_api_account.db import auth_db_signup_key, SignupKeyGenerationModel, SignupKeyModel, UserDataModel
+from kl_api_account.db import signup_key_repository, SignupKeyGenerationModel, SignupKeyModel, UserDataModel
 from .auth_user import get_admin_user_by_oauth2_token
 
 
@@ -17,6 +17,6 @@ def generate_account_creation_key(
         expiry=datetime.utcnow().replace(tzinfo=timezone.utc) + timedelta(seconds=ACCOUNT_SIGNUP_KEY_EXPIRY_SEC),
         account_expiry=generation_data.account_expiry.replace(tzinfo=timezone.utc),
     )
-    auth_db_signup_key.insert_one(model.dict())
+    signup_key_repository.insert(model.dict())
 
     return model
@@ -1,44 +1,45 @@
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 
 from fastapi import Body, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import ExpiredSignatureError, JWTError
 
+from kl_api_common.db import decode_trusted
 from kl_api_common.env import DEVELOPMENT_MODE, FASTAPI_AUTH_CALLBACK, FASTAPI_AUTH_TOKEN_EXPIRY_MINS
-from kl_api_account.db import DbUserModel, UserDataModel, auth_db_users, auth_db_validation, record_session_checked
+from kl_api_account.db import (
+    DbUserModel, Permission, UserDataModel, record_session_checked, user_repository, validation_secrets_repository,
+)
 from kl_api_account.utils import (
-    generate_bad_request_exception, generate_blocked_exception,
+    generate_bad_request_exception, generate_blocked_exception, generate_insufficient_permission_exception,
     generate_unauthorized_exception,
 )
 from ..const import auth_oauth2_scheme
 from ..model import RefreshAccessTokenModel
-from ..secret import create_access_token, decode_access_token, is_password_match
+from ..secret import create_access_token, decode_access_token, is_password_match, is_secret_match
 
 
 def get_user_by_username(
     username: str
 ) -> DbUserModel | None:
-    find_one_result = auth_db_users.find_one({"username": username})
+    find_one_result = user_repository.get_by_username(username)
 
     if not find_one_result:
         return None
 
-    return DbUserModel(**find_one_result)
+    return decode_trusted(DbUserModel, find_one_result)
 
 
 def get_user_data_by_username(
     username: str
 ) -> UserDataModel | None:
-    find_one_result = auth_db_users.find_one({"username": username})
+    find_one_result = user_repository.get_by_username(username)
 
     if not find_one_result:
         return None
 
-    # Remove secrets from the returned model
-    # > This is exactly the prop difference between `DbUserModel` and `UserDataModel`
-    find_one_result.pop("hashed_password")
-
-    return UserDataModel(**find_one_result)
+    # Secrets are dropped as they are not the fields of `UserDataModel`
+    return decode_trusted(UserDataModel, find_one_result)
 
 
 def get_user_data_by_oauth2_token(
@@ -80,6 +81,13 @@ def get_active_user_by_oauth2_token(token: str) -> UserDataModel:
     return get_active_user_by_user_data(user_data)
 
 
+def require_permissions(user: UserDataModel, *permissions_required: Permission):
+    missing_permissions = [permission for permission in permissions_required if not user.has_permission(permission)]
+
+    if missing_permissions:
+        raise generate_insufficient_permission_exception(missing_permissions)
+
+
 def get_admin_user_by_oauth2_token(
     current_user: UserDataModel = Depends(get_active_user_by_user_data)
 ) -> UserDataModel:
@@ -89,6 +97,23 @@ def get_admin_user_by_oauth2_token(
     return current_user
 
 
+def get_active_user_with_permissions(*permissions_required: Permission) -> Callable[..., UserDataModel]:
+    """
+    Make a dependency returning the active user of the request, who should have all ``permissions_required``.
+
+    The user is loaded once per request, as FastAPI caches the result of each dependency in a request,
+    so the dependencies further down the chain get the same user without querying it again.
+    """
+    def get_active_user_with_permissions_dependency(
+        current_user: UserDataModel = Depends(get_active_user_by_user_data)
+    ) -> UserDataModel:
+        require_permissions(current_user, *permissions_required)
+
+        return current_user
+
+    return get_active_user_with_permissions_dependency
+
+
 def authenticate_user_by_credentials(
     form: OAuth2PasswordRequestForm = Depends()
 ) -> DbUserModel:
@@ -122,7 +147,9 @@ def authenticate_user_with_callback(
     form: OAuth2PasswordRequestForm = Depends(),
     redirect_uri: str = Body(...),
 ) -> DbUserModel:
-    if not auth_db_validation.find_one({"client_id": form.client_id}):
+    validation_secrets = validation_secrets_repository.get_all()
+
+    if not any(is_secret_match(secrets["client_id"], form.client_id) for secrets in validation_secrets):
         raise generate_bad_request_exception("Invalid client.py ID")
 
     if FASTAPI_AUTH_CALLBACK != redirect_uri:
@@ -140,11 +167,21 @@ def generate_access_token(
     )
 
 
+def is_client_match(validation_secrets: dict[str, Any], client_id: str, client_secret: str) -> bool:
+    # Both are compared regardless of the result of the other, so the time doesn't tell which one mismatches
+    is_client_id_match = is_secret_match(validation_secrets["client_id"], client_id)
+    is_client_secret_match = is_secret_match(validation_secrets["client_secret"], client_secret)
+
+    return is_client_id_match and is_client_secret_match
+
+
 def refresh_access_token(
     body: RefreshAccessTokenModel = Body(...),
     user_data: UserDataModel = Depends(get_user_data_by_oauth2_token)
 ) -> str:
-    if not auth_db_validation.find_one({"client_id": body.client_id, "client_secret": body.client_secret}):
+    validation_secrets = validation_secrets_repository.get_all()
+
+    if not any(is_client_match(secrets, body.client_id, body.client_secret) for secrets in validation_secrets):
         raise generate_bad_request_exception("Invalid client.py ID or secret")
 
     return create_access_token(
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Body, Depends, status
 
+from kl_api_common.utils import FastApiORJSONResponse
 from kl_api_account.db import SignupKeyModel, UserDataModel, ValidationSecretsModel
 from .db_control import (
     generate_access_token, generate_access_token_on_doc,
@@ -16,8 +17,10 @@ auth_router = APIRouter(prefix="/auth")
     description="Get the user data using the access token.",
     response_model=UserDataModel,
 )
-async def get_user_data(current_user: UserDataModel = Depends(get_active_user_by_user_data)) -> UserDataModel:
-    return current_user
+async def get_user_data(
+    current_user: UserDataModel = Depends(get_active_user_by_user_data)
+) -> FastApiORJSONResponse:
+    return FastApiORJSONResponse(current_user)
 
 
 @auth_router.post(
@@ -71,8 +74,8 @@ async def create_validation_secrets(
     response_model=UserDataModel,
     status_code=status.HTTP_201_CREATED
 )
-async def sign_up_user(user: UserDataModel = Depends(signup_user)) -> UserDataModel:
-    return user
+async def sign_up_user(user: UserDataModel = Depends(signup_user)) -> FastApiORJSONResponse:
+    return FastApiORJSONResponse(user, status_code=status.HTTP_201_CREATED)
 
 
 @auth_router.post(
@@ -1,19 +1,28 @@
+import hmac
 from datetime import datetime, timedelta
 
 from jose import jwt
 
 from kl_api_common.const import JWT_LEEWAY_SEC
 from kl_api_common.env import FASTAPI_AUTH_SECRET, FASTAPI_AUTH_ALGORITHM, FASTAPI_AUTH_TOKEN_EXPIRY_MINS
-from .const import auth_crypto_ctx
+from .const import get_auth_crypto_ctx
 from .type import JwtDataDict
 
 
 def is_password_match(plain_password: str, hashed_password: str) -> bool:
-    return auth_crypto_ctx.verify(plain_password, hashed_password)
+    return get_auth_crypto_ctx().verify(plain_password, hashed_password)
+
+
+def is_secret_match(expected: str, actual: str | None) -> bool:
+    """Compare in constant time, so the comparison time doesn't tell how much of ``actual`` matches."""
+    if actual is None:
+        return False
+
+    return hmac.compare_digest(expected.encode("utf-8"), actual.encode("utf-8"))
 
 
 def get_password_hash(password: str) -> str:
-    return auth_crypto_ctx.hash(password)
+    return get_auth_crypto_ctx().hash(password)
 
 
 def make_jwt_dict(username: str, expiry: datetime) -> JwtDataDict:
@@ -1,10 +1,9 @@
 from typing import Any
 
 from fastapi import Body, Depends
-from pymongo import ReturnDocument
 
-from kl_api_common.db import PyObjectId
-from kl_api_account.db import user_db_config, UserDataModel, UserConfigModel
+from kl_api_common.db import PyObjectId, decode_trusted
+from kl_api_account.db import config_repository, UserDataModel, UserConfigModel
 from .model import UpdateConfigModel
 from ..auth import get_active_user_by_user_data, get_active_user_by_oauth2_token
 
@@ -17,7 +16,7 @@ def create_new_user_config(account_id: PyObjectId) -> UserConfigModel:
         layout_config=None,
         shared_config=None,
     )
-    user_db_config.insert_one(model.dict())
+    config_repository.insert(model.dict())
 
     return model
 
@@ -25,12 +24,12 @@ def create_new_user_config(account_id: PyObjectId) -> UserConfigModel:
 def get_user_config(
     user: UserDataModel = Depends(get_active_user_by_user_data),
 ) -> UserConfigModel:
-    config_model = user_db_config.find_one({"account_id": user.id})
+    config_model = config_repository.get(user.id)
 
     if not config_model:
         return create_new_user_config(user.id)
 
-    return UserConfigModel(**config_model)
+    return decode_trusted(UserConfigModel, config_model)
 
 
 def get_user_config_by_token(token: str) -> UserConfigModel:
@@ -43,10 +42,6 @@ def update_config(
     config_og: UserConfigModel = Depends(get_user_config),
     body: UpdateConfigModel = Body(..., discriminator="key")
 ) -> Any:
-    config_model = user_db_config.find_one_and_update(
-        {"account_id": config_og.account_id},
-        {"$set": {body.key: body.data}},
-        return_document=ReturnDocument.AFTER
-    )
+    config_model = config_repository.update_field(config_og.account_id, body.key, body.data)
 
     return config_model[body.key]
@@ -2,6 +2,7 @@ from typing import TypeVar
 
 from fastapi import APIRouter, Depends
 
+from kl_api_common.utils import FastApiORJSONResponse
 from .db_control import update_config as update_config_db
 
 user_router = APIRouter(prefix="/user")
@@ -14,5 +15,5 @@ T = TypeVar("T")
     description="Update config.",
     response_model=T,
 )
-async def update_config(updated_slot_map: T = Depends(update_config_db)) -> T:
-    return updated_slot_map
+async def update_config(updated_slot_map: T = Depends(update_config_db)) -> FastApiORJSONResponse:
+    return FastApiORJSONResponse(updated_slot_map)
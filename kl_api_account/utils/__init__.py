@@ -1,5 +1,5 @@
 from .exceptions import (
-    generate_bad_request_exception, generate_blocked_exception, generate_insufficient_permission_exception,
-    generate_unauthorized_exception,
+    generate_bad_request_exception, generate_blocked_exception, generate_conflict_exception,
+    generate_insufficient_permission_exception, generate_unauthorized_exception,
 )
 from .socket import *  # noqa
@@ -31,3 +31,10 @@ def generate_bad_request_exception(message: str) -> HTTPException:
         detail=message,
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def generate_conflict_exception(message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=message,
+    )
@@ -1,12 +1,14 @@
 import collections.abc
+import json
 import os.path
-from typing import MutableMapping
-
-import yaml
-from jsonschema import validate
+from functools import lru_cache
+from typing import TYPE_CHECKING, MutableMapping
 
 from kl_api_common.env import env
 
+if TYPE_CHECKING:
+    from jsonschema.protocols import Validator
+
 _config: MutableMapping = {}
 
 
@@ -21,28 +23,54 @@ def merge_dict(map_1: MutableMapping, map_2: MutableMapping) -> MutableMapping:
     return map_1
 
 
+@lru_cache(maxsize=None)
+def get_config_validator(path_config_schema: str) -> "Validator":
+    # Imported here as `jsonschema` is slow to import
+    from jsonschema.validators import validator_for
+
+    with open(path_config_schema, "r", encoding="utf-8") as config_schema_file:
+        config_schema = json.load(config_schema_file)
+
+    validator_cls = validator_for(config_schema)
+    validator_cls.check_schema(config_schema)
+
+    return validator_cls(config_schema)
+
+
+def validate_config(config: MutableMapping, path_config_schema: str):
+    """Validate ``config`` against the schema at ``path_config_schema`` using the cached compiled validator."""
+    from jsonschema.exceptions import best_match
+
+    if error := best_match(get_config_validator(path_config_schema).iter_errors(config)):
+        raise error
+
+
 def get_config() -> MutableMapping:
     global _config
 
     if _config:
         return _config
 
+    # Imported here, so importing this module alone doesn't pay for `yaml`
+    import yaml
+
+    # `CSafeLoader` is only available if `pyyaml` is built with `libyaml`
+    yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
     path_config_base = env.str("PATH_CONFIG_BASE", "config.yaml")
     path_config_override = env.str("PATH_CONFIG_OVERRIDE", "config-override.yaml")
     path_config_schema = env.str("PATH_CONFIG_SCHEMA", "config.schema.json")
 
     # Load default config
     with open(path_config_base, "r", encoding="utf-8") as config_file:
-        config = yaml.safe_load(config_file)
+        config = yaml.load(config_file, Loader=yaml_loader)
 
     # Load overriding config
     if os.path.exists(path_config_override):
         with open(path_config_override, "r", encoding="utf-8") as config_file:
-            config = merge_dict(config, yaml.safe_load(config_file))
+            config = merge_dict(config, yaml.load(config_file, Loader=yaml_loader))
 
-    # Validate config
-    with open(path_config_schema, "r") as config_schema:
-        validate(config, yaml.safe_load(config_schema))
+    validate_config(config, path_config_schema)
 
     _config = config
 
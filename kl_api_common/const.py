@@ -1,18 +1,18 @@
 import logging
 
-import yaml
-from rich.console import Console
-
 from .config import get_config
 
-rich_console = Console()
-
 py_logger = logging.getLogger("KL.Api.Account")
 
 config = get_config()
 
 
 def print_configs():
+    # Imported here, as these are only needed for printing the config
+    import yaml
+
+    from kl_api_common.utils.log.main import rich_console
+
     # Print current config
     rich_console.print("[cyan]--- Config content ---[/]")
     rich_console.print(yaml.dump(config, default_flow_style=False))
@@ -24,6 +24,145 @@ _CONFIG_LOG = config.get("log", {})
 
 LOG_TO_DIR = _CONFIG_LOG.get("output-directory")
 
+_CONFIG_LOG_QUEUE = _CONFIG_LOG.get("queue", {})
+
+LOG_QUEUE_MAX_SIZE = _CONFIG_LOG_QUEUE.get("max-size", 10000)
+LOG_QUEUE_FULL_POLICY = _CONFIG_LOG_QUEUE.get("full-policy", "drop")
+LOG_QUEUE_BATCH_SIZE = _CONFIG_LOG_QUEUE.get("batch-size", 256)
+
+_CONFIG_LOG_FILE = _CONFIG_LOG.get("file", {})
+
+LOG_FILE_MODE = _CONFIG_LOG_FILE.get("mode", "line")
+LOG_FILE_BUFFER_SIZE_KB = _CONFIG_LOG_FILE.get("buffer-size-kb", 64)
+LOG_FILE_FLUSH_INTERVAL_SEC = _CONFIG_LOG_FILE.get("flush-interval-sec", 1)
+LOG_FILE_MAX_SIZE_MB = _CONFIG_LOG_FILE.get("max-size-mb", 0)
+LOG_FILE_COMPRESSION = _CONFIG_LOG_FILE.get("compression", "gzip")
+LOG_FILE_RETENTION_TOTAL_MB = _CONFIG_LOG_FILE.get("retention-total-mb", 0)
+
+_CONFIG_LOG_RATE_LIMIT = _CONFIG_LOG.get("rate-limit", {})
+
+LOG_RATE_LIMIT_ENABLED = _CONFIG_LOG_RATE_LIMIT.get("enabled", False)
+LOG_RATE_LIMIT_MIN_LEVEL = _CONFIG_LOG_RATE_LIMIT.get("min-level", "WARNING")
+LOG_RATE_LIMIT_RATE_PER_SEC = _CONFIG_LOG_RATE_LIMIT.get("rate-per-sec", 20)
+LOG_RATE_LIMIT_BURST = _CONFIG_LOG_RATE_LIMIT.get("burst", 100)
+LOG_RATE_LIMIT_SUMMARY_INTERVAL_SEC = _CONFIG_LOG_RATE_LIMIT.get("summary-interval-sec", 10)
+LOG_RATE_LIMIT_MAX_KEYS = _CONFIG_LOG_RATE_LIMIT.get("max-keys", 10000)
+
+# endregion
+
+# region Storage
+
+_CONFIG_STORAGE = config.get("storage", {})
+
+STORAGE_ENGINE = _CONFIG_STORAGE.get("engine", "mongo")
+
+# endregion
+
+# region Mongo
+
+_CONFIG_MONGO = config.get("mongo", {})
+
+MONGO_MONITORING_ENABLED = _CONFIG_MONGO.get("monitoring", True)
+MONGO_ENSURE_INDEXES_ON_STARTUP = _CONFIG_MONGO.get("ensure-indexes-on-startup", True)
+
+_MONGO_CLIENT_OPTION_KEYS = {
+    "max-pool-size": "maxPoolSize",
+    "min-pool-size": "minPoolSize",
+    "max-idle-time-ms": "maxIdleTimeMS",
+    "wait-queue-timeout-ms": "waitQueueTimeoutMS",
+    "server-selection-timeout-ms": "serverSelectionTimeoutMS",
+    "connect-timeout-ms": "connectTimeoutMS",
+    "socket-timeout-ms": "socketTimeoutMS",
+    "compressors": "compressors",
+}
+
+MONGO_CLIENT_OPTIONS = {
+    option: ",".join(_CONFIG_MONGO[key]) if key == "compressors" else _CONFIG_MONGO[key]
+    for key, option in _MONGO_CLIENT_OPTION_KEYS.items()
+    if key in _CONFIG_MONGO
+}
+
+_CONFIG_MONGO_SLOW_OP = _CONFIG_MONGO.get("slow-op", {})
+
+MONGO_SLOW_OP_ENABLED = _CONFIG_MONGO_SLOW_OP.get("enabled", True)
+MONGO_SLOW_OP_THRESHOLD_MS = _CONFIG_MONGO_SLOW_OP.get("threshold-ms", 100)
+MONGO_SLOW_OP_MAX_PER_MIN = _CONFIG_MONGO_SLOW_OP.get("max-per-min", 6)
+MONGO_SLOW_OP_EXPLAIN = _CONFIG_MONGO_SLOW_OP.get("explain", True)
+MONGO_SLOW_OP_OUTPUT = _CONFIG_MONGO_SLOW_OP.get("output", "collection")
+MONGO_SLOW_OP_FILE_PATH = _CONFIG_MONGO_SLOW_OP.get("file-path", "slow-ops.jsonl")
+MONGO_SLOW_OP_COLLECTION_SIZE_MB = _CONFIG_MONGO_SLOW_OP.get("collection-size-mb", 16)
+
+# endregion
+
+# region Server
+
+_CONFIG_SERVER = config.get("server", {})
+
+SERVER_HOST = _CONFIG_SERVER.get("host", "127.0.0.1")
+SERVER_PORT = _CONFIG_SERVER.get("port", 8000)
+SERVER_WORKERS = _CONFIG_SERVER.get("workers", 1)
+SERVER_LOOP = _CONFIG_SERVER.get("loop", "auto")
+SERVER_HTTP = _CONFIG_SERVER.get("http", "auto")
+SERVER_BACKLOG = _CONFIG_SERVER.get("backlog", 2048)
+SERVER_LIMIT_CONCURRENCY = _CONFIG_SERVER.get("limit-concurrency")
+SERVER_TIMEOUT_KEEP_ALIVE_SEC = _CONFIG_SERVER.get("timeout-keep-alive-sec", 5)
+SERVER_CPU_AFFINITY = _CONFIG_SERVER.get("cpu-affinity", False)
+SERVER_CPU_CORES = _CONFIG_SERVER.get("cpu-cores")
+SERVER_NICE = _CONFIG_SERVER.get("nice")
+
+# endregion
+
+# region Admission
+
+_CONFIG_ADMISSION = config.get("admission", {})
+
+ADMISSION_ENABLED = _CONFIG_ADMISSION.get("enabled", True)
+ADMISSION_MAX_CONCURRENCY = _CONFIG_ADMISSION.get("max-concurrency", 64)
+
+_CONFIG_ADMISSION_CLASSES = _CONFIG_ADMISSION.get("classes", {})
+
+_ADMISSION_CLASS_DEFAULTS = {
+    "light": {"max-concurrency": 64, "max-queue": 512, "max-wait-ms": 1000},
+    "normal": {"max-concurrency": 32, "max-queue": 256, "max-wait-ms": 2000},
+    "heavy": {"max-concurrency": 4, "max-queue": 64, "max-wait-ms": 3000},
+}
+
+ADMISSION_CLASSES = {
+    cost_class: defaults | _CONFIG_ADMISSION_CLASSES.get(cost_class, {})
+    for cost_class, defaults in _ADMISSION_CLASS_DEFAULTS.items()
+}
+ADMISSION_ROUTES = _CONFIG_ADMISSION.get("routes", {})
+ADMISSION_SOCKET_EVENTS = _CONFIG_ADMISSION.get("socket-events", {})
+
+# endregion
+
+# region Compression
+
+_CONFIG_COMPRESSION = config.get("compression", {})
+
+COMPRESSION_ENABLED = _CONFIG_COMPRESSION.get("enabled", True)
+COMPRESSION_MIN_SIZE_BYTES = _CONFIG_COMPRESSION.get("min-size-bytes", 1024)
+COMPRESSION_GZIP_LEVEL = _CONFIG_COMPRESSION.get("gzip-level", 6)
+COMPRESSION_BROTLI_LEVEL = _CONFIG_COMPRESSION.get("brotli-level", 4)
+COMPRESSION_THREAD_MIN_SIZE_BYTES = _CONFIG_COMPRESSION.get("thread-min-size-bytes", 65536)
+
+_CONFIG_COMPRESSION_SOCKET = _CONFIG_COMPRESSION.get("socket", {})
+
+COMPRESSION_SOCKET_PER_MESSAGE_DEFLATE = _CONFIG_COMPRESSION_SOCKET.get("per-message-deflate", True)
+COMPRESSION_SOCKET_HTTP_COMPRESSION = _CONFIG_COMPRESSION_SOCKET.get("http-compression", True)
+COMPRESSION_SOCKET_THRESHOLD_BYTES = _CONFIG_COMPRESSION_SOCKET.get("threshold-bytes", 1024)
+
+# endregion
+
+# region Loop watchdog
+
+_CONFIG_LOOP_WATCHDOG = config.get("loop-watchdog", {})
+
+LOOP_WATCHDOG_ENABLED = _CONFIG_LOOP_WATCHDOG.get("enabled", True)
+LOOP_WATCHDOG_INTERVAL_MS = _CONFIG_LOOP_WATCHDOG.get("interval-ms", 100)
+LOOP_WATCHDOG_THRESHOLD_MS = _CONFIG_LOOP_WATCHDOG.get("threshold-ms", 250)
+LOOP_WATCHDOG_MAX_LOGS_PER_MIN = _CONFIG_LOOP_WATCHDOG.get("max-logs-per-min", 6)
+
 # endregion
 
 # region Account
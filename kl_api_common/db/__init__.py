@@ -1,3 +1,7 @@
-from .const import mongo_client
-from .model import PyObjectId
-from .utils import start_mongo_txn
+from .const import mongo_client, mongo_command_metrics, mongo_pool_metrics
+from .index import (
+    IndexReport, convert_to_capped, ensure_indexes, get_index_drifts, register_capped_collection, register_index,
+)
+from .memory import MemoryCollection
+from .model import PyObjectId, decode_trusted
+from .utils import run_mongo_txn, start_mongo_txn
@@ -1,5 +1,51 @@
 from pymongo import MongoClient
 
+from kl_api_common.const import (
+    MONGO_CLIENT_OPTIONS, MONGO_MONITORING_ENABLED, MONGO_SLOW_OP_COLLECTION_SIZE_MB, MONGO_SLOW_OP_ENABLED,
+    MONGO_SLOW_OP_EXPLAIN, MONGO_SLOW_OP_FILE_PATH, MONGO_SLOW_OP_MAX_PER_MIN, MONGO_SLOW_OP_OUTPUT,
+    MONGO_SLOW_OP_THRESHOLD_MS,
+)
 from kl_api_common.env import MONGO_URL
+from kl_api_common.utils.metrics import register_metrics_source
+from .monitoring import MongoCommandMetrics, MongoPoolMetrics
+from .slow_op import SlowOperationCapture
 
-mongo_client = MongoClient(MONGO_URL, tz_aware=True)
+mongo_command_metrics = MongoCommandMetrics()
+mongo_pool_metrics = MongoPoolMetrics()
+mongo_slow_op_capture = SlowOperationCapture(
+    threshold_ms=MONGO_SLOW_OP_THRESHOLD_MS,
+    max_per_min=MONGO_SLOW_OP_MAX_PER_MIN,
+    explain=MONGO_SLOW_OP_EXPLAIN,
+    output=MONGO_SLOW_OP_OUTPUT,
+    file_path=MONGO_SLOW_OP_FILE_PATH,
+    collection_size_bytes=MONGO_SLOW_OP_COLLECTION_SIZE_MB * 1024 * 1024,
+)
+
+_event_listeners = []
+if MONGO_MONITORING_ENABLED:
+    _event_listeners.extend([mongo_command_metrics, mongo_pool_metrics])
+if MONGO_SLOW_OP_ENABLED:
+    _event_listeners.append(mongo_slow_op_capture)
+
+mongo_client = MongoClient(
+    MONGO_URL,
+    tz_aware=True,
+    # Connect on the first operation instead of on import
+    connect=False,
+    event_listeners=_event_listeners,
+    **MONGO_CLIENT_OPTIONS,
+)
+mongo_slow_op_capture.attach(mongo_client)
+
+if MONGO_MONITORING_ENABLED:
+    register_metrics_source("mongo", lambda: {
+        "command": mongo_command_metrics.snapshot(),
+        "pool": mongo_pool_metrics.snapshot(),
+    })
+
+# Same as the time limit of `ClientSession.with_transaction()`, but shorter as transactions run in requests
+MONGO_TXN_RETRY_TIMEOUT_SEC: float = 10
+
+MONGO_TXN_BACKOFF_BASE_SEC: float = 0.005
+
+MONGO_TXN_BACKOFF_MAX_SEC: float = 0.5
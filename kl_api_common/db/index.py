@@ -0,0 +1,270 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal, TypeAlias, TypedDict
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+IndexKeys: TypeAlias = tuple[tuple[str, int], ...]
+
+IndexDriftType: TypeAlias = Literal["missing", "mismatched", "extra"]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: Collection
+    keys: IndexKeys
+    unique: bool = False
+    expire_after_seconds: int | None = None
+
+    @property
+    def name(self) -> str:
+        # Same as the index name generated by `pymongo`
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def to_index_model(self) -> IndexModel:
+        options: dict[str, Any] = {"name": self.name, "unique": self.unique}
+
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+
+        return IndexModel(list(self.keys), **options)
+
+    def get_options(self) -> dict[str, Any]:
+        return {"unique": self.unique, "expireAfterSeconds": self.expire_after_seconds}
+
+
+@dataclass(frozen=True)
+class CappedCollectionSpec:
+    database: Database
+    name: str
+    size: int
+    max_count: int | None = None
+
+    @property
+    def namespace(self) -> str:
+        return f"{self.database.name}.{self.name}"
+
+    def get_options(self) -> dict[str, Any]:
+        return {"capped": True, "size": self.size, "max": self.max_count}
+
+
+class IndexDrift(TypedDict):
+    namespace: str
+    name: str
+    type: IndexDriftType
+    declared: dict[str, Any] | None
+    actual: dict[str, Any] | None
+
+
+class IndexReport(TypedDict):
+    created: list[str]
+    drifts: list[IndexDrift]
+    errors: list[str]
+
+
+_index_specs: list[IndexSpec] = []
+
+_capped_collection_specs: list[CappedCollectionSpec] = []
+
+
+def register_index(
+    collection: Collection,
+    keys: str | list[tuple[str, int]], *,
+    unique: bool = False,
+    expire_after_seconds: int | None = None,
+):
+    """
+    Declare an index of ``collection``. This does not make any I/O.
+
+    Declared indexes are created by :func:`ensure_indexes`.
+    """
+    _index_specs.append(IndexSpec(
+        collection=collection,
+        keys=((keys, ASCENDING),) if isinstance(keys, str) else tuple(keys),
+        unique=unique,
+        expire_after_seconds=expire_after_seconds,
+    ))
+
+
+def register_capped_collection(
+    database: Database, name: str, *,
+    size: int,
+    max_count: int | None = None,
+) -> Collection:
+    """
+    Declare a capped collection and get it. This does not make any I/O.
+
+    Declared capped collections are created by :func:`ensure_indexes` if they don't exist.
+    Existing collections which are not capped are reported as drifts, and only converted by :func:`convert_to_capped`.
+    """
+    _capped_collection_specs.append(CappedCollectionSpec(database=database, name=name, size=size, max_count=max_count))
+
+    return database.get_collection(name)
+
+
+def _get_actual_keys(index_info: dict[str, Any]) -> IndexKeys:
+    # Direction could be returned as `float`
+    return tuple(
+        (key, int(direction) if isinstance(direction, float) else direction)
+        for key, direction in index_info["key"].items()
+    )
+
+
+def _get_actual_options(index_info: dict[str, Any]) -> dict[str, Any]:
+    return {"unique": index_info.get("unique", False), "expireAfterSeconds": index_info.get("expireAfterSeconds")}
+
+
+def _get_drifts(
+    namespace: str,
+    specs: list[IndexSpec],
+    actual_indexes: dict[IndexKeys, dict[str, Any]],
+) -> list[IndexDrift]:
+    drifts: list[IndexDrift] = []
+    declared_keys = {spec.keys for spec in specs}
+
+    for spec in specs:
+        index_info = actual_indexes.get(spec.keys)
+
+        if index_info is None:
+            drifts.append({
+                "namespace": namespace, "name": spec.name, "type": "missing",
+                "declared": spec.get_options(), "actual": None,
+            })
+        elif _get_actual_options(index_info) != spec.get_options():
+            drifts.append({
+                "namespace": namespace, "name": spec.name, "type": "mismatched",
+                "declared": spec.get_options(), "actual": _get_actual_options(index_info),
+            })
+
+    for keys, index_info in actual_indexes.items():
+        if keys not in declared_keys and index_info["name"] != "_id_":
+            drifts.append({
+                "namespace": namespace, "name": index_info["name"], "type": "extra",
+                "declared": None, "actual": _get_actual_options(index_info),
+            })
+
+    return drifts
+
+
+def _process_collection(collection: Collection, specs: list[IndexSpec], create_missing: bool) -> IndexReport:
+    report: IndexReport = {"created": [], "drifts": [], "errors": []}
+
+    try:
+        actual_indexes = {_get_actual_keys(index_info): index_info for index_info in collection.list_indexes()}
+        drifts = _get_drifts(collection.full_name, specs, actual_indexes)
+
+        if create_missing:
+            specs_missing = {drift["name"] for drift in drifts if drift["type"] == "missing"}
+            specs_to_create = [spec for spec in specs if spec.name in specs_missing]
+
+            if specs_to_create:
+                # Single round trip for all missing indexes of the collection
+                collection.create_indexes([spec.to_index_model() for spec in specs_to_create])
+                report["created"].extend(f"{collection.full_name}.{spec.name}" for spec in specs_to_create)
+
+            drifts = [drift for drift in drifts if drift["type"] != "missing"]
+
+        report["drifts"] = drifts
+    except PyMongoError as ex:
+        report["errors"].append(f"{collection.full_name}: {ex}")
+
+    return report
+
+
+def _process_capped_collection(spec: CappedCollectionSpec, create_missing: bool) -> IndexReport:
+    report: IndexReport = {"created": [], "drifts": [], "errors": []}
+
+    try:
+        if not spec.database.list_collection_names(filter={"name": spec.name}):
+            if create_missing:
+                spec.database.create_collection(spec.name, capped=True, size=spec.size, max=spec.max_count)
+                report["created"].append(f"{spec.namespace} (capped)")
+            else:
+                report["drifts"].append({
+                    "namespace": spec.namespace, "name": "(capped)", "type": "missing",
+                    "declared": spec.get_options(), "actual": None,
+                })
+        elif not (options := spec.database.get_collection(spec.name).options()).get("capped"):
+            # Converting locks the collection and drops its indexes, so it's never done implicitly
+            report["drifts"].append({
+                "namespace": spec.namespace, "name": "(capped)", "type": "mismatched",
+                "declared": spec.get_options(), "actual": options,
+            })
+    except CollectionInvalid:
+        pass  # Created by the other process concurrently
+    except PyMongoError as ex:
+        report["errors"].append(f"{spec.namespace}: {ex}")
+
+    return report
+
+
+def _run_on_collections(create_missing: bool, max_workers: int) -> IndexReport:
+    specs_by_collection: dict[str, tuple[Collection, list[IndexSpec]]] = {}
+
+    for spec in _index_specs:
+        specs_by_collection.setdefault(spec.collection.full_name, (spec.collection, []))[1].append(spec)
+
+    report: IndexReport = {"created": [], "drifts": [], "errors": []}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="MongoIndex") as executor:
+        # Capped collections are processed first, as converting drops the indexes of the collection
+        collection_reports = list(executor.map(
+            lambda spec: _process_capped_collection(spec, create_missing),
+            _capped_collection_specs
+        ))
+        collection_reports.extend(executor.map(
+            lambda item: _process_collection(*item, create_missing),
+            specs_by_collection.values()
+        ))
+
+        for collection_report in collection_reports:
+            report["created"].extend(collection_report["created"])
+            report["drifts"].extend(collection_report["drifts"])
+            report["errors"].extend(collection_report["errors"])
+
+    return report
+
+
+def ensure_indexes(*, max_workers: int = 8) -> IndexReport:
+    """
+    Create the declared capped collections and indexes which don't exist yet. Collections are processed concurrently.
+
+    Existing collections and indexes are never changed. Their differences from the declarations are reported as drifts
+    instead, including the collections declared as capped but not capped.
+    """
+    return _run_on_collections(create_missing=True, max_workers=max_workers)
+
+
+def convert_to_capped() -> IndexReport:
+    """
+    Convert the existing collections declared as capped but not capped.
+
+    Converting locks the collection exclusively and drops its indexes. ``max_count`` can't be set on conversion,
+    so the old documents of the converted collections are only removed by ``size``.
+    """
+    report: IndexReport = {"created": [], "drifts": [], "errors": []}
+
+    for spec in _capped_collection_specs:
+        try:
+            if not spec.database.list_collection_names(filter={"name": spec.name}):
+                continue
+
+            if spec.database.get_collection(spec.name).options().get("capped"):
+                continue
+
+            spec.database.command("convertToCapped", spec.name, size=spec.size)
+            report["created"].append(f"{spec.namespace} (converted to capped)")
+        except PyMongoError as ex:
+            report["errors"].append(f"{spec.namespace}: {ex}")
+
+    return report
+
+
+def get_index_drifts(*, max_workers: int = 8) -> IndexReport:
+    """
+    Get the differences between the declared and the actual indexes and capped collections without changing anything.
+    """
+    return _run_on_collections(create_missing=False, max_workers=max_workers)
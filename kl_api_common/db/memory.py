@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+MemoryFilter = dict[str, Any]
+
+
+@dataclass
+class _MemoryIndex:
+    field: str
+    unique: bool
+    # Field value to the IDs of the documents having it
+    entries: dict[Any, set[Any]] = field(default_factory=dict)
+
+    def add(self, doc_id: Any, value: Any):
+        self.entries.setdefault(value, set()).add(doc_id)
+
+    def remove(self, doc_id: Any, value: Any):
+        doc_ids = self.entries.get(value)
+
+        if doc_ids is None:
+            return
+
+        doc_ids.discard(doc_id)
+
+        if not doc_ids:
+            del self.entries[value]
+
+
+def _to_utc(value: datetime) -> datetime:
+    # Naive datetimes are stored as UTC, same as Mongo
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class MemoryCollection:
+    """
+    Collection of documents in the process memory, keyed by ``_id``.
+
+    Supports the equality filters on the top-level fields, the single field indexes with unique constraints,
+    and the TTL expiry. Unlike Mongo, expired documents are removed on the next access instead of periodically.
+    Unique constraint violations raise :class:`DuplicateKeyError`, same as Mongo.
+
+    Thread-safe. Returned documents are shallow copies, so their nested values should not be mutated.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Hold this to run multiple operations atomically
+        self.lock = threading.RLock()
+
+        self._docs: dict[Any, dict[str, Any]] = {}
+        self._indexes: dict[str, _MemoryIndex] = {}
+
+        self._ttl_field: str | None = None
+        self._ttl: timedelta | None = None
+        # Expiry time, tie breaker, document ID
+        self._expiry_heap: list[tuple[datetime, int, Any]] = []
+        self._expiry_counter = itertools.count()
+
+    def create_index(self, field_name: str, *, unique: bool = False, expire_after_seconds: int | None = None):
+        with self.lock:
+            index = _MemoryIndex(field=field_name, unique=unique)
+
+            for doc_id, doc in self._docs.items():
+                value = doc.get(field_name)
+
+                if unique and value in index.entries:
+                    raise self._duplicate_key_error(field_name, value)
+
+                index.add(doc_id, value)
+
+            self._indexes[field_name] = index
+
+            if expire_after_seconds is not None:
+                self._ttl_field = field_name
+                self._ttl = timedelta(seconds=expire_after_seconds)
+
+                for doc in self._docs.values():
+                    self._push_expiry(doc)
+
+    def _duplicate_key_error(self, field_name: str, value: Any) -> DuplicateKeyError:
+        return DuplicateKeyError(
+            f"E11000 duplicate key error collection: {self.name} index: {field_name} dup key: {value!r}", 11000
+        )
+
+    def _push_expiry(self, doc: dict[str, Any]):
+        value = doc.get(self._ttl_field)
+
+        if isinstance(value, datetime):
+            heapq.heappush(self._expiry_heap, (_to_utc(value) + self._ttl, next(self._expiry_counter), doc["_id"]))
+
+    def _remove_expired(self):
+        now = datetime.now(timezone.utc)
+
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expiry, _, doc_id = heapq.heappop(self._expiry_heap)
+            doc = self._docs.get(doc_id)
+
+            if not doc:
+                continue
+
+            # Skip if the TTL field changed after this entry was pushed
+            value = doc.get(self._ttl_field)
+            if not isinstance(value, datetime) or _to_utc(value) + self._ttl != expiry:
+                continue
+
+            self._remove(doc)
+
+    def _check_unique(self, doc: dict[str, Any], *, doc_id: Any):
+        for index in self._indexes.values():
+            if not index.unique:
+                continue
+
+            if index.entries.get(doc.get(index.field), set()) - {doc_id}:
+                raise self._duplicate_key_error(index.field, doc.get(index.field))
+
+    def _add(self, doc: dict[str, Any]):
+        doc_id = doc["_id"]
+        self._docs[doc_id] = doc
+
+        for index in self._indexes.values():
+            index.add(doc_id, doc.get(index.field))
+
+        if self._ttl_field:
+            self._push_expiry(doc)
+
+    def _remove(self, doc: dict[str, Any]):
+        doc_id = doc["_id"]
+        del self._docs[doc_id]
+
+        for index in self._indexes.values():
+            index.remove(doc_id, doc.get(index.field))
+
+    def _iter_matches(self, query: MemoryFilter | None) -> Iterable[dict[str, Any]]:
+        if not query:
+            return self._docs.values()
+
+        if "_id" in query:
+            candidates = [doc] if (doc := self._docs.get(query["_id"])) else []
+        elif indexed_fields := [field_name for field_name in query if field_name in self._indexes]:
+            doc_ids = min(
+                (self._indexes[field_name].entries.get(query[field_name], set()) for field_name in indexed_fields),
+                key=len,
+            )
+            candidates = [self._docs[doc_id] for doc_id in doc_ids]
+        else:
+            candidates = self._docs.values()
+
+        return (
+            doc for doc in candidates
+            if all(doc.get(field_name) == value for field_name, value in query.items())
+        )
+
+    def insert_one(self, doc: dict[str, Any]):
+        """Insert ``doc``. ``_id`` is added to ``doc`` if it does not have one, same as ``pymongo``."""
+        self.insert_many([doc])
+
+    def insert_many(self, docs: Iterable[dict[str, Any]]):
+        with self.lock:
+            self._remove_expired()
+
+            for doc in docs:
+                doc.setdefault("_id", ObjectId())
+                stored = dict(doc)
+
+                if stored["_id"] in self._docs:
+                    raise self._duplicate_key_error("_id", stored["_id"])
+
+                self._check_unique(stored, doc_id=stored["_id"])
+                self._add(stored)
+
+    def find(self, query: MemoryFilter | None = None) -> list[dict[str, Any]]:
+        with self.lock:
+            self._remove_expired()
+
+            return [dict(doc) for doc in self._iter_matches(query)]
+
+    def find_one(self, query: MemoryFilter | None = None) -> dict[str, Any] | None:
+        with self.lock:
+            self._remove_expired()
+
+            return next((dict(doc) for doc in self._iter_matches(query)), None)
+
+    def count(self, query: MemoryFilter | None = None) -> int:
+        with self.lock:
+            self._remove_expired()
+
+            if not query:
+                return len(self._docs)
+
+            return sum(1 for _ in self._iter_matches(query))
+
+    def update_one(
+        self,
+        query: MemoryFilter,
+        update: Callable[[dict[str, Any]], None],
+    ) -> dict[str, Any] | None:
+        """
+        Update the first document matching ``query`` by calling ``update`` with a copy of it.
+
+        Returns the updated document; ``None`` if no document matches.
+        """
+        with self.lock:
+            self._remove_expired()
+
+            if not (doc := next(iter(self._iter_matches(query)), None)):
+                return None
+
+            updated = dict(doc)
+            update(updated)
+            updated["_id"] = doc["_id"]
+
+            self._check_unique(updated, doc_id=doc["_id"])
+            self._remove(doc)
+            self._add(updated)
+
+            return dict(updated)
+
+    def delete_one(self, query: MemoryFilter) -> dict[str, Any] | None:
+        """Delete the first document matching ``query``. Returns the deleted document; ``None`` if no match."""
+        with self.lock:
+            self._remove_expired()
+
+            if not (doc := next(iter(self._iter_matches(query)), None)):
+                return None
+
+            self._remove(doc)
+
+            return doc
+
+    def delete_many(self, query: MemoryFilter | None = None) -> int:
+        with self.lock:
+            self._remove_expired()
+
+            docs = list(self._iter_matches(query))
+
+            for doc in docs:
+                self._remove(doc)
+
+            return len(docs)
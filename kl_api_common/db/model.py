@@ -1,6 +1,9 @@
-from typing import MutableMapping
+from typing import Any, Mapping, MutableMapping, TypeVar
 
 from bson import ObjectId
+from pydantic import BaseModel
+
+TModel = TypeVar("TModel", bound=BaseModel)
 
 
 class PyObjectId(ObjectId):
@@ -18,3 +21,32 @@ class PyObjectId(ObjectId):
     @classmethod
     def __modify_schema__(cls, field_schema: MutableMapping):
         field_schema.update(type="string")
+
+
+def decode_trusted(model: type[TModel], doc: Mapping[str, Any]) -> TModel:
+    """
+    Make ``model`` from ``doc`` without validation.
+
+    Only use this on the documents read from our own collections, which are written from the validated models.
+    Request bodies and other external data should still be validated.
+
+    Only the fields of ``model`` are taken, by their aliases or names, so the other keys such as secrets are dropped.
+    Missing optional fields get their defaults. Missing required fields raise :class:`ValueError`.
+    """
+    values: dict[str, Any] = {}
+    fields_set: set[str] = set()
+
+    for name, field in model.__fields__.items():
+        if field.alias in doc:
+            values[name] = doc[field.alias]
+        elif name in doc:
+            values[name] = doc[name]
+        elif field.required:
+            raise ValueError(f"Field `{name}` of `{model.__name__}` missing in the document")
+        else:
+            values[name] = field.get_default()
+            continue
+
+        fields_set.add(name)
+
+    return model.construct(_fields_set=fields_set, **values)
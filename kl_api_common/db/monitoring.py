@@ -0,0 +1,166 @@
+import threading
+import time
+from typing import Any
+
+from pymongo.monitoring import (
+    CommandFailedEvent, CommandListener, CommandStartedEvent, CommandSucceededEvent, ConnectionCheckOutFailedEvent,
+    ConnectionCheckOutStartedEvent, ConnectionCheckedInEvent, ConnectionCheckedOutEvent, ConnectionClosedEvent,
+    ConnectionCreatedEvent, ConnectionPoolListener,
+)
+
+from kl_api_common.utils.metrics import Histogram, HistogramGroup
+
+
+class MongoCommandMetrics(CommandListener):
+    """
+    Records the command latency in ms for each ``<db>.<collection>:<command>``.
+
+    Commands of the tailable cursors are recorded as ``<command>(tailable)`` and not counted as failed,
+    as they wait for the new documents and fail on the capped position lost by design.
+    """
+
+    def __init__(self):
+        self.latency_ms = HistogramGroup()
+        self.failed_count = 0
+
+        # Request ID to the key, and the cursor ID if the request is of a tailable cursor
+        self._requests: dict[int, tuple[str, int | None]] = {}
+        self._tailable_cursor_ids: set[int] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_namespace(event: CommandStartedEvent) -> str:
+        # `getMore` has the cursor ID instead
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+
+        # Commands like `ping` or `endSessions` don't target a collection
+        if not isinstance(collection, str):
+            return event.database_name
+
+        return f"{event.database_name}.{collection}"
+
+    def started(self, event: CommandStartedEvent):
+        command_name = event.command_name
+        cursor_id = None
+
+        if command_name == "find" and event.command.get("tailable"):
+            cursor_id = 0  # Not known until the reply
+        elif command_name == "getMore" and event.command["getMore"] in self._tailable_cursor_ids:
+            cursor_id = event.command["getMore"]
+        elif command_name == "killCursors":
+            with self._lock:
+                self._tailable_cursor_ids.difference_update(event.command.get("cursors", []))
+
+        if cursor_id is not None:
+            command_name += "(tailable)"
+
+        self._requests[event.request_id] = (f"{self.get_namespace(event)}:{command_name}", cursor_id)
+
+    def _pop_request(self, event: CommandSucceededEvent | CommandFailedEvent) -> tuple[str, int | None]:
+        return self._requests.pop(event.request_id, (f"{event.database_name}:{event.command_name}", None))
+
+    def succeeded(self, event: CommandSucceededEvent):
+        key, cursor_id = self._pop_request(event)
+
+        if cursor_id is not None:
+            cursor_id_reply = event.reply.get("cursor", {}).get("id", 0)
+
+            with self._lock:
+                # Cursor ID of the reply is 0 if the cursor is closed
+                if cursor_id_reply:
+                    self._tailable_cursor_ids.add(cursor_id_reply)
+                else:
+                    self._tailable_cursor_ids.discard(cursor_id)
+
+        self.latency_ms.observe(key, event.duration_micros / 1000)
+
+    def failed(self, event: CommandFailedEvent):
+        key, cursor_id = self._pop_request(event)
+
+        with self._lock:
+            if cursor_id is None:
+                self.failed_count += 1
+            else:
+                self._tailable_cursor_ids.discard(cursor_id)
+
+        self.latency_ms.observe(key, event.duration_micros / 1000)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "failedCount": self.failed_count,
+            "latencyMs": self.latency_ms.snapshot(),
+        }
+
+
+class MongoPoolMetrics(ConnectionPoolListener):
+    """Records the connection checkout wait time in ms, and the count of the connections in use."""
+
+    def __init__(self):
+        self.checkout_wait_ms = Histogram()
+        self.checkout_failed_count = 0
+        self.in_use_count = 0
+        self.in_use_count_max = 0
+        self.open_count = 0
+
+        # Checkout starts and ends on the same thread
+        self._checkout_started = threading.local()
+        self._lock = threading.Lock()
+
+    def _observe_checkout_wait(self):
+        started_at = getattr(self._checkout_started, "value", None)
+
+        if started_at is not None:
+            self.checkout_wait_ms.observe((time.perf_counter() - started_at) * 1000)
+            self._checkout_started.value = None
+
+    def connection_check_out_started(self, event: ConnectionCheckOutStartedEvent):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_checked_out(self, event: ConnectionCheckedOutEvent):
+        self._observe_checkout_wait()
+
+        with self._lock:
+            self.in_use_count += 1
+            self.in_use_count_max = max(self.in_use_count_max, self.in_use_count)
+
+    def connection_check_out_failed(self, event: ConnectionCheckOutFailedEvent):
+        self._observe_checkout_wait()
+
+        with self._lock:
+            self.checkout_failed_count += 1
+
+    def connection_checked_in(self, event: ConnectionCheckedInEvent):
+        with self._lock:
+            self.in_use_count -= 1
+
+    def connection_created(self, event: ConnectionCreatedEvent):
+        with self._lock:
+            self.open_count += 1
+
+    def connection_closed(self, event: ConnectionClosedEvent):
+        with self._lock:
+            self.open_count -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "checkoutWaitMs": self.checkout_wait_ms.snapshot(),
+            "checkoutFailedCount": self.checkout_failed_count,
+            "inUseCount": self.in_use_count,
+            "inUseCountMax": self.in_use_count_max,
+            "openCount": self.open_count,
+        }
@@ -0,0 +1,182 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Literal, TypeAlias
+
+from bson import json_util
+from pymongo import MongoClient
+from pymongo.errors import CollectionInvalid, PyMongoError
+from pymongo.monitoring import CommandFailedEvent, CommandListener, CommandStartedEvent, CommandSucceededEvent
+
+from kl_api_common.utils.log.limiter import LogRateLimiter
+
+SlowOperationOutput: TypeAlias = Literal["collection", "file"]
+
+EXPLAINABLE_COMMANDS: frozenset[str] = frozenset({
+    "find", "aggregate", "count", "distinct", "findAndModify", "delete", "update",
+})
+
+# Fields added by the driver, which should not be sent again in `explain`
+_DRIVER_FIELDS: frozenset[str] = frozenset({
+    "lsid", "txnNumber", "autocommit", "startTransaction", "$clusterTime", "$db", "$readPreference",
+    "readConcern", "writeConcern",
+})
+
+_REDACTED_FIELDS: frozenset[str] = frozenset({"hashed_password", "signup_key", "client_id", "client_secret"})
+
+_SKIPPED_CALLER_MODULES: tuple[str, ...] = ("pymongo", "bson", "kl_api_common", "threading", "concurrent")
+
+# Repositories only wrap the queries, so their callers are reported instead
+_SKIPPED_CALLER_MODULE_SUFFIXES: tuple[str, ...] = (".repository",)
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: "<redacted>" if key in _REDACTED_FIELDS else _redact(item)
+            for key, item in value.items()
+        }
+
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+
+    return value
+
+
+def get_caller_name() -> str | None:
+    """
+    Get the name of the first function in the call stack which is not in the driver, this package, or a repository.
+    """
+    frame = sys._getframe(1)  # noqa
+
+    while frame:
+        module_name = frame.f_globals.get("__name__", "")
+
+        if (
+                not module_name.startswith(_SKIPPED_CALLER_MODULES)
+                and not module_name.endswith(_SKIPPED_CALLER_MODULE_SUFFIXES)
+        ):
+            # `co_qualname` is only available since Python 3.11
+            return f"{module_name}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+
+        frame = frame.f_back
+
+    return None
+
+
+class SlowOperationCapture(CommandListener):
+    """
+    Captures the commands taking longer than ``threshold_ms``, along with the calling function.
+
+    The ``explain`` of the captured command runs on a background thread,
+    then the capture is saved to a capped collection ``diagnostics.slow_ops`` or a JSON-lines file.
+    Captures of the same command from the same caller are rate-limited to ``max_per_min``.
+    """
+
+    def __init__(
+        self, *,
+        threshold_ms: float,
+        max_per_min: int,
+        explain: bool,
+        output: SlowOperationOutput,
+        file_path: str,
+        collection_size_bytes: int,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.output = output
+        self.file_path = file_path
+        self.collection_size_bytes = collection_size_bytes
+        self.client: MongoClient | None = None
+
+        self._commands: dict[int, CommandStartedEvent] = {}
+        self._limiter = LogRateLimiter(
+            rate_per_sec=max_per_min / 60, burst=max_per_min, summary_interval_sec=60, max_keys=1000
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MongoSlowOp")
+        self._file_lock = threading.Lock()
+        self._collection_ready = False
+
+    def attach(self, client: MongoClient):
+        self.client = client
+
+    def started(self, event: CommandStartedEvent):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            self._commands[event.request_id] = event
+
+    def succeeded(self, event: CommandSucceededEvent):
+        self._on_completed(event, failed=False)
+
+    def failed(self, event: CommandFailedEvent):
+        self._on_completed(event, failed=True)
+
+    def _on_completed(self, event: CommandSucceededEvent | CommandFailedEvent, *, failed: bool):
+        started_event = self._commands.pop(event.request_id, None)
+
+        if started_event is None or event.duration_micros < self.threshold_ms * 1000:
+            return
+
+        # Events are published on the thread running the command, so the caller is still in the stack
+        caller = get_caller_name()
+        collection = started_event.command.get(started_event.command_name)
+
+        if not self._limiter.acquire((started_event.database_name, collection, event.command_name, caller)):
+            return
+
+        self._executor.submit(self._capture, started_event, {
+            "timestamp": datetime.utcnow().replace(tzinfo=timezone.utc),
+            "database": started_event.database_name,
+            "collection": collection,
+            "command": event.command_name,
+            "durationMs": event.duration_micros / 1000,
+            "failed": failed,
+            "caller": caller,
+        })
+
+    def _run_explain(self, database_name: str, command: dict[str, Any]) -> Any:
+        try:
+            explain = self.client.get_database(database_name).command("explain", command, verbosity="queryPlanner")
+        except PyMongoError as ex:
+            return {"error": str(ex)}
+
+        # Cluster info is not related, and top-level `$` fields can't be stored
+        explain.pop("$clusterTime", None)
+        explain.pop("operationTime", None)
+
+        return explain
+
+    def _save_to_collection(self, capture: dict[str, Any]):
+        database = self.client.get_database("diagnostics")
+
+        if not self._collection_ready:
+            try:
+                database.create_collection("slow_ops", capped=True, size=self.collection_size_bytes)
+            except CollectionInvalid:
+                pass  # Already exists
+
+            self._collection_ready = True
+
+        database.get_collection("slow_ops").insert_one(capture)
+
+    def _save_to_file(self, capture: dict[str, Any]):
+        with self._file_lock, open(self.file_path, "a", encoding="utf-8") as file:
+            file.write(json_util.dumps(capture) + "\n")
+
+    def _capture(self, started_event: CommandStartedEvent, capture: dict[str, Any]):
+        command = {key: value for key, value in started_event.command.items() if key not in _DRIVER_FIELDS}
+
+        if self.explain and self.client:
+            capture["explain"] = self._run_explain(started_event.database_name, command)
+
+        capture["commandDoc"] = command
+        capture = _redact(capture)
+
+        try:
+            if self.output == "collection" and self.client:
+                self._save_to_collection(capture)
+            else:
+                self._save_to_file(capture)
+        except (PyMongoError, OSError):
+            # Diagnostics should never break the app
+            pass
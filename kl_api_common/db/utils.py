@@ -1,16 +1,126 @@
+import random
 import threading
+import time
 from contextlib import contextmanager
-from typing import ContextManager
+from typing import Callable, ContextManager, Iterable, TypeVar
 
 from pymongo.client_session import ClientSession
+from pymongo.errors import PyMongoError
 
-from .const import mongo_client
+from .const import MONGO_TXN_BACKOFF_BASE_SEC, MONGO_TXN_BACKOFF_MAX_SEC, MONGO_TXN_RETRY_TIMEOUT_SEC, mongo_client
 
+T = TypeVar("T")
 
-_lock = threading.Lock()
+
+class _KeyedLocks:
+    """Locks created on demand for each key, and released from memory once no one holds or waits for them."""
+
+    def __init__(self):
+        self._locks: dict[str, tuple[threading.Lock, int]] = {}
+        self._locks_lock = threading.Lock()
+
+    def _get(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            lock, ref_count = self._locks.get(key) or (threading.Lock(), 0)
+            self._locks[key] = (lock, ref_count + 1)
+
+            return lock
+
+    def _release(self, key: str):
+        with self._locks_lock:
+            lock, ref_count = self._locks[key]
+
+            if ref_count > 1:
+                self._locks[key] = (lock, ref_count - 1)
+            else:
+                del self._locks[key]
+
+    @contextmanager
+    def hold(self, keys: Iterable[str]) -> ContextManager[None]:
+        # Sorted to always acquire in the same order, so holding multiple keys can't deadlock
+        keys = sorted(set(keys))
+        acquired: list[tuple[str, threading.Lock]] = []
+
+        try:
+            for key in keys:
+                lock = self._get(key)
+                lock.acquire()
+                acquired.append((key, lock))
+
+            yield
+        finally:
+            for key, lock in reversed(acquired):
+                lock.release()
+                self._release(key)
+
+
+_key_locks = _KeyedLocks()
+
+
+def _has_error_label(ex: Exception, label: str) -> bool:
+    return isinstance(ex, PyMongoError) and ex.has_error_label(label)
+
+
+def _sleep_backoff(attempt: int):
+    # Full jitter, so the conflicting transactions don't retry at the same time again
+    time.sleep(random.uniform(0, min(MONGO_TXN_BACKOFF_MAX_SEC, MONGO_TXN_BACKOFF_BASE_SEC * 2 ** attempt)))
+
+
+def run_mongo_txn(callback: Callable[[ClientSession], T], *, lock_keys: Iterable[str] = ()) -> T:
+    """
+    Run ``callback`` in a transaction and return its result.
+
+    The transaction is retried with jittered backoff on ``TransientTransactionError``,
+    and the commit is retried on ``UnknownTransactionCommitResult``, until ``MONGO_TXN_RETRY_TIMEOUT_SEC`` passes.
+    ``callback`` could be called multiple times, so it should not have side effects other than the database operations.
+
+    Transactions run concurrently.
+    Only the transactions sharing any of ``lock_keys`` exclude each other in this process.
+    """
+    with _key_locks.hold(lock_keys), mongo_client.start_session(causal_consistency=True) as session:
+        start_sec = time.monotonic()
+        attempt = 0
+
+        def can_retry() -> bool:
+            return time.monotonic() - start_sec < MONGO_TXN_RETRY_TIMEOUT_SEC
+
+        while True:
+            session.start_transaction()
+
+            try:
+                result = callback(session)
+            except Exception as ex:
+                if session.in_transaction:
+                    session.abort_transaction()
+
+                if _has_error_label(ex, "TransientTransactionError") and can_retry():
+                    _sleep_backoff(attempt)
+                    attempt += 1
+                    continue
+
+                raise
+
+            while True:
+                try:
+                    session.commit_transaction()
+                    return result
+                except PyMongoError as ex:
+                    if _has_error_label(ex, "UnknownTransactionCommitResult") and can_retry():
+                        _sleep_backoff(attempt)
+                        attempt += 1
+                        continue
+
+                    if _has_error_label(ex, "TransientTransactionError") and can_retry():
+                        break
+
+                    raise
+
+            _sleep_backoff(attempt)
+            attempt += 1
 
 
 @contextmanager
 def start_mongo_txn() -> ContextManager[ClientSession]:
-    with _lock, mongo_client.start_session(causal_consistency=True) as session, session.start_transaction():
+    """Start a transaction without retries. Use :func:`run_mongo_txn` instead if possible."""
+    with mongo_client.start_session(causal_consistency=True) as session, session.start_transaction():
         yield session
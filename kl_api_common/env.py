@@ -1,5 +1,4 @@
 from environs import Env
-from jose.constants import Algorithms
 
 env = Env(expand_vars=True)
 env.read_env()
@@ -7,7 +6,7 @@ env.read_env()
 with env.prefixed("FASTAPI_"):
     with env.prefixed("AUTH_"):
         FASTAPI_AUTH_SECRET: str = env.str("SECRET")
-        FASTAPI_AUTH_ALGORITHM: str = env.str("ALGORITHM", Algorithms.HS256)
+        FASTAPI_AUTH_ALGORITHM: str = env.str("ALGORITHM", "HS256")
         FASTAPI_AUTH_TOKEN_EXPIRY_MINS: int = env.int("TOKEN_EXPIRY_MINS", 15)
         FASTAPI_AUTH_CALLBACK: str = env.str("CALLBACK")
 
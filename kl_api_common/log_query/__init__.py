@@ -0,0 +1,2 @@
+from .index import FileIndex, get_index
+from .query import LogQuery, LogQueryStats, query_logs
@@ -0,0 +1,177 @@
+import json
+import os
+from typing import Any, Iterable, TypedDict
+
+from .reader import is_compressed, iter_lines
+
+INDEX_VERSION: int = 1
+
+INDEX_DIR_NAME: str = ".index"
+
+INDEX_BLOCK_LINES: int = 1000
+
+INDEXED_FIELDS: tuple[str, ...] = ("level", "socket.event", "socket.id", "accountId", "sessionId")
+
+
+class BlockIndex(TypedDict):
+    offset: int  # Offset of the block start, in the decompressed content if the file is compressed
+    end: int
+    tsMin: int | None
+    tsMax: int | None
+    fields: dict[str, list[str]]
+
+
+class FileIndex(TypedDict):
+    version: int
+    size: int
+    mtime: float
+    blocks: list[BlockIndex]
+
+
+def get_field_values(entry: dict[str, Any], path: str) -> list[str]:
+    """
+    Get the values of ``path`` in ``entry`` as strings.
+
+    ``path`` could be a dotted path like ``socket.event``.
+    If the value is a dict or a list (for example, ``sessionId`` of a replaced session),
+    all of its values are returned.
+    """
+    value: Any = entry
+
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return []
+
+        value = value[key]
+
+    if value is None:
+        return []
+
+    if isinstance(value, dict):
+        return [str(item) for item in value.values()]
+
+    if isinstance(value, list):
+        return [str(item) for item in value]
+
+    return [str(value)]
+
+
+def get_index_path(path: str) -> str:
+    dir_name, file_name = os.path.split(path)
+
+    return os.path.join(dir_name, INDEX_DIR_NAME, f"{file_name}.idx.json")
+
+
+def _make_block(lines: list[tuple[int, bytes]]) -> BlockIndex:
+    ts_min: int | None = None
+    ts_max: int | None = None
+    fields: dict[str, set[str]] = {field: set() for field in INDEXED_FIELDS}
+
+    for _, line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+
+        if not isinstance(entry, dict):
+            continue
+
+        if isinstance(timestamp := entry.get("timestamp"), int):
+            ts_min = timestamp if ts_min is None else min(ts_min, timestamp)
+            ts_max = timestamp if ts_max is None else max(ts_max, timestamp)
+
+        for field in INDEXED_FIELDS:
+            fields[field].update(get_field_values(entry, field))
+
+    offset_last, line_last = lines[-1]
+
+    return {
+        "offset": lines[0][0],
+        "end": offset_last + len(line_last) + 1,
+        "tsMin": ts_min,
+        "tsMax": ts_max,
+        "fields": {field: sorted(values) for field, values in fields.items() if values},
+    }
+
+
+def _make_blocks(lines: Iterable[tuple[int, bytes]]) -> list[BlockIndex]:
+    blocks: list[BlockIndex] = []
+    block_lines: list[tuple[int, bytes]] = []
+
+    for line in lines:
+        block_lines.append(line)
+
+        if len(block_lines) >= INDEX_BLOCK_LINES:
+            blocks.append(_make_block(block_lines))
+            block_lines = []
+
+    if block_lines:
+        blocks.append(_make_block(block_lines))
+
+    return blocks
+
+
+def load_index(path: str) -> FileIndex | None:
+    try:
+        with open(get_index_path(path), "r", encoding="utf-8") as index_file:
+            index: FileIndex = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+
+    if index.get("version") != INDEX_VERSION:
+        return None
+
+    return index
+
+
+def save_index(path: str, index: FileIndex):
+    index_path = get_index_path(path)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+
+    with open(index_path + ".tmp", "w", encoding="utf-8") as index_file:
+        json.dump(index, index_file, separators=(",", ":"))
+
+    os.replace(index_path + ".tmp", index_path)
+
+
+def get_index(path: str) -> FileIndex:
+    """
+    Get the index of the log file at ``path``, building or updating the sidecar index file if needed.
+
+    Uncompressed files are append-only, so only the lines appended after the last indexed block are indexed.
+    """
+    stat = os.stat(path)
+    index = load_index(path)
+
+    if index and index["size"] == stat.st_size and index["mtime"] == stat.st_mtime:
+        return index
+
+    blocks: list[BlockIndex] = []
+    start = 0
+
+    if index and index["blocks"] and not is_compressed(path) and stat.st_size > index["size"]:
+        # Last block could be partial, so index from its start again
+        blocks = index["blocks"][:-1]
+        start = index["blocks"][-1]["offset"]
+
+    index = {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "blocks": blocks + _make_blocks(iter_lines(path, start)),
+    }
+    save_index(path, index)
+
+    return index
+
+
+def remove_orphan_indexes(dir_name: str):
+    """Remove the index files whose log file no longer exists, for example, after compression or retention."""
+    index_dir = os.path.join(dir_name, INDEX_DIR_NAME)
+
+    if not os.path.isdir(index_dir):
+        return
+
+    for entry in os.scandir(index_dir):
+        if entry.name.endswith(".idx.json") and not os.path.exists(os.path.join(dir_name, entry.name[:-9])):
+            os.remove(entry.path)
@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+
+from .query import LogQuery, LogQueryStats, query_logs
+
+
+def to_epoch_ms(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+
+    timestamp = datetime.fromisoformat(value)
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    return int(timestamp.timestamp() * 1000)
+
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m kl_api_common.log_query",
+        description="Query the JSON-lines log files using the sidecar sparse indexes.",
+    )
+    parser.add_argument("dir", help="Directory of the log files.")
+    parser.add_argument("--prefix", default="", help="Only query the log files starting with this, such as app name.")
+    parser.add_argument("--since", type=to_epoch_ms, help="Start time. Epoch milliseconds or ISO 8601 (UTC if naive).")
+    parser.add_argument("--until", type=to_epoch_ms, help="End time. Epoch milliseconds or ISO 8601 (UTC if naive).")
+    parser.add_argument("--account", help="Account ID to match (`accountId`).")
+    parser.add_argument("--session", help="Session ID to match (`sessionId`).")
+    parser.add_argument("--event", help="Socket event to match (`socket.event`).")
+    parser.add_argument("--level", help="Log level to match.")
+    parser.add_argument(
+        "--where", action="append", default=[], metavar="FIELD=VALUE",
+        help="Additional field to match. Dotted path is allowed. Could be specified multiple times."
+    )
+    parser.add_argument("--limit", type=int, help="Max count of the log entries to output.")
+    parser.add_argument("--stats", action="store_true", help="Print the count of the files and blocks scanned.")
+
+    return parser.parse_args(args)
+
+
+def main(args: list[str] | None = None):
+    parsed = parse_args(args)
+
+    equals = dict(condition.split("=", 1) for condition in parsed.where)
+
+    for path, value in (
+            ("accountId", parsed.account),
+            ("sessionId", parsed.session),
+            ("socket.event", parsed.event),
+            ("level", parsed.level),
+    ):
+        if value is not None:
+            equals[path] = value
+
+    stats = LogQueryStats()
+    query = LogQuery(since_ms=parsed.since, until_ms=parsed.until, equals=equals)
+
+    for entry in query_logs(parsed.dir, query, prefix=parsed.prefix, stats=stats):
+        print(json.dumps(entry, ensure_ascii=False))
+
+        if parsed.limit and stats.lines_matched >= parsed.limit:
+            break
+
+    if parsed.stats:
+        print(
+            f"Matched {stats.lines_matched} entries. "
+            f"Scanned {stats.files_scanned} / {stats.files_total} files, "
+            f"{stats.blocks_scanned} / {stats.blocks_total} blocks.",
+            file=sys.stderr
+        )
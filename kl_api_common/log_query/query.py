@@ -0,0 +1,128 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from .index import BlockIndex, FileIndex, INDEXED_FIELDS, get_field_values, get_index, remove_orphan_indexes
+from .reader import COMPRESSED_EXTS, is_compressed, iter_lines_compressed, iter_lines_mapped, open_mmap
+
+LOG_FILE_EXTS: tuple[str, ...] = (".log",) + tuple(f".log{ext}" for ext in COMPRESSED_EXTS)
+
+
+@dataclass
+class LogQuery:
+    since_ms: int | None = None
+    until_ms: int | None = None
+    # Field path (could be dotted, for example, `socket.event`) to the value to match
+    equals: dict[str, str] = field(default_factory=dict)
+
+    def is_block_match(self, block: BlockIndex) -> bool:
+        if self.since_ms is not None and block["tsMax"] is not None and block["tsMax"] < self.since_ms:
+            return False
+
+        if self.until_ms is not None and block["tsMin"] is not None and block["tsMin"] > self.until_ms:
+            return False
+
+        for path, value in self.equals.items():
+            if path in INDEXED_FIELDS and value not in block["fields"].get(path, []):
+                return False
+
+        return True
+
+    def is_entry_match(self, entry: dict[str, Any]) -> bool:
+        timestamp = entry.get("timestamp")
+
+        if self.since_ms is not None and (not isinstance(timestamp, int) or timestamp < self.since_ms):
+            return False
+
+        if self.until_ms is not None and (not isinstance(timestamp, int) or timestamp > self.until_ms):
+            return False
+
+        return all(value in get_field_values(entry, path) for path, value in self.equals.items())
+
+
+@dataclass
+class LogQueryStats:
+    files_total: int = 0
+    files_scanned: int = 0
+    blocks_total: int = 0
+    blocks_scanned: int = 0
+    lines_matched: int = 0
+
+
+def get_log_files(dir_name: str, prefix: str = "") -> list[str]:
+    return sorted(
+        os.path.join(dir_name, file_name) for file_name in os.listdir(dir_name)
+        if file_name.startswith(prefix) and file_name.endswith(LOG_FILE_EXTS)
+    )
+
+
+def _iter_matched_lines(path: str, blocks: list[BlockIndex]) -> Iterator[bytes]:
+    if is_compressed(path):
+        # Compressed files can't be seeked, but decompression stops after the last matched block
+        block_iter = iter(blocks)
+        block = next(block_iter)
+
+        for offset, line in iter_lines_compressed(path, block["offset"]):
+            while offset >= block["end"]:
+                block = next(block_iter, None)
+
+                if block is None:
+                    return
+
+            if offset >= block["offset"]:
+                yield line
+
+        return
+
+    with open_mmap(path) as mapped:
+        for block in blocks:
+            for _, line in iter_lines_mapped(mapped, block["offset"], block["end"]):
+                yield line
+
+
+def _get_file_ts_range(index: FileIndex) -> tuple[int, int]:
+    ts_mins = [block["tsMin"] for block in index["blocks"] if block["tsMin"] is not None]
+    ts_maxes = [block["tsMax"] for block in index["blocks"] if block["tsMax"] is not None]
+
+    return min(ts_mins, default=0), max(ts_maxes, default=0)
+
+
+def query_logs(
+    dir_name: str,
+    query: LogQuery, *,
+    prefix: str = "",
+    stats: LogQueryStats | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield the log entries in the log files under ``dir_name`` matching ``query``, ordered by the file time range.
+
+    The sidecar indexes are built or updated on the fly, then only the blocks possibly matching ``query`` are read.
+    """
+    stats = stats or LogQueryStats()
+    remove_orphan_indexes(dir_name)
+
+    indexes = [(path, get_index(path)) for path in get_log_files(dir_name, prefix)]
+    indexes.sort(key=lambda item: _get_file_ts_range(item[1]))
+
+    for path, index in indexes:
+        stats.files_total += 1
+        stats.blocks_total += len(index["blocks"])
+
+        blocks = [block for block in index["blocks"] if query.is_block_match(block)]
+
+        if not blocks:
+            continue
+
+        stats.files_scanned += 1
+        stats.blocks_scanned += len(blocks)
+
+        for line in _iter_matched_lines(path, blocks):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            if isinstance(entry, dict) and query.is_entry_match(entry):
+                stats.lines_matched += 1
+                yield entry
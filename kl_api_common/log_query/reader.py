@@ -0,0 +1,90 @@
+import gzip
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, ContextManager, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_EXTS: tuple[str, ...] = (".gz", ".zst")
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(COMPRESSED_EXTS)
+
+
+@contextmanager
+def open_compressed(path: str) -> ContextManager[BinaryIO]:
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError(f"`zstandard` is required for reading {path}")
+
+        with open(path, "rb") as file, zstandard.ZstdDecompressor().stream_reader(file) as stream:
+            # zstd stream reader doesn't support iterating lines
+            yield io.BufferedReader(stream)
+        return
+
+    with gzip.open(path, "rb") as stream:
+        yield stream
+
+
+@contextmanager
+def open_mmap(path: str) -> ContextManager[mmap.mmap | bytes]:
+    with open(path, "rb") as file:
+        if not os.fstat(file.fileno()).st_size:
+            # Empty file can't be memory-mapped
+            yield b""
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def iter_lines_mapped(mapped: mmap.mmap | bytes, start: int, end: int | None = None) -> Iterator[tuple[int, bytes]]:
+    """
+    Yield the offset and the content of each complete line in ``mapped`` between ``start`` and ``end``.
+
+    The last line without a line break is not yielded, as it could be still being written.
+    """
+    end = len(mapped) if end is None else end
+    pos = start
+
+    while pos < end:
+        line_end = mapped.find(b"\n", pos, end)
+
+        if line_end == -1:
+            break
+
+        yield pos, mapped[pos:line_end]
+        pos = line_end + 1
+
+
+def iter_lines_compressed(path: str, start: int = 0) -> Iterator[tuple[int, bytes]]:
+    """Yield the offset in the decompressed content and the content of each complete line in ``path``."""
+    with open_compressed(path) as stream:
+        pos = 0
+
+        for line in stream:
+            line_start = pos
+            pos += len(line)
+
+            if line_start < start:
+                continue
+
+            if not line.endswith(b"\n"):
+                break
+
+            yield line_start, line[:-1]
+
+
+def iter_lines(path: str, start: int = 0) -> Iterator[tuple[int, bytes]]:
+    if is_compressed(path):
+        yield from iter_lines_compressed(path, start)
+        return
+
+    with open_mmap(path) as mapped:
+        yield from iter_lines_mapped(mapped, start)
@@ -0,0 +1,32 @@
+from typing import Callable
+
+import uvicorn
+from fastapi import FastAPI
+
+from kl_api_common.const import (
+    COMPRESSION_SOCKET_PER_MESSAGE_DEFLATE, SERVER_BACKLOG, SERVER_HOST, SERVER_HTTP, SERVER_LIMIT_CONCURRENCY,
+    SERVER_LOOP, SERVER_PORT, SERVER_TIMEOUT_KEEP_ALIVE_SEC, SERVER_WORKERS,
+)
+
+
+def run_server(get_app: Callable[[], FastAPI], app_import_path: str):
+    """
+    Run the app from ``get_app`` using the settings in the ``server`` section of the config.
+
+    ``app_import_path`` (for example, ``main:fast_api``) is used instead, without calling ``get_app``,
+    if running multiple workers, as each worker imports the app in its own process.
+
+    CPU affinity and nice value are applied by each worker on startup.
+    """
+    uvicorn.run(
+        get_app() if SERVER_WORKERS == 1 else app_import_path,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=SERVER_WORKERS,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        backlog=SERVER_BACKLOG,
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY,
+        timeout_keep_alive=SERVER_TIMEOUT_KEEP_ALIVE_SEC,
+        ws_per_message_deflate=COMPRESSION_SOCKET_PER_MESSAGE_DEFLATE,
+    )
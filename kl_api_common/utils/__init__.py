@@ -1,5 +1,13 @@
+from .admission import (
+    AdmissionClassLimit, AdmissionController, AdmissionCostClass, AdmissionMiddleware, AdmissionRejected,
+)
+from .compression import CompressionMiddleware
 from .func_exec import execute_async_function
-from .json_serializing import FastApiSioJSONSerializer, JSONEncoder
-from .log import print_log, print_socket_event
-from .system import set_current_process_to_highest_priority
+from .json_serializing import FastApiORJSONResponse, FastApiSioJSONSerializer, JSONEncoder
+from .metrics import Histogram, HistogramGroup, get_metrics, register_metrics_source
+from .profiler import PROFILE_MAX_DURATION_SEC, ProfileFormat, ProfileResult, ProfilerBusy, profile_threads
+from .log import get_log_dropped_count, print_log, print_log_event, print_socket_event
+from .loop_watchdog import LoopActivityMiddleware, LoopStallWatchdog, set_loop_activity
+from .single_flight import SingleFlight, get_single_flight_metrics
+from .system import set_current_process_scheduling
 from .timer import ExecTimer
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Literal, TypeAlias
+
+from .metrics import HistogramGroup
+
+AdmissionCostClass: TypeAlias = Literal["light", "normal", "heavy"]
+
+AdmissionRejectReason: TypeAlias = Literal["queue-full", "wait-timeout"]
+
+# Cost classes in the order of priority
+ADMISSION_COST_CLASSES: tuple[AdmissionCostClass, ...] = ("light", "normal", "heavy")
+
+
+@dataclass(frozen=True)
+class AdmissionClassLimit:
+    max_concurrency: int
+    max_queue: int
+    max_wait_ms: float
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, cost_class: AdmissionCostClass, reason: AdmissionRejectReason):
+        super().__init__(f"Admission of `{cost_class}` rejected: {reason}")
+
+        self.cost_class = cost_class
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Limits the count of the concurrent requests in total and in each cost class.
+
+    Requests over the limits wait in a bounded FIFO queue of their class.
+    When a slot frees up, the waiting requests of the cheaper classes are admitted first.
+    Requests are rejected with :class:`AdmissionRejected` if their queue is full,
+    or if they wait longer than ``max_wait_ms`` of their class.
+
+    Not thread-safe. It should only be used in the event loop thread.
+    """
+
+    def __init__(self, *, max_concurrency: int, class_limits: dict[AdmissionCostClass, AdmissionClassLimit]):
+        self.max_concurrency = max_concurrency
+        self.class_limits = class_limits
+
+        self._in_flight_total = 0
+        self._in_flight: dict[AdmissionCostClass, int] = dict.fromkeys(ADMISSION_COST_CLASSES, 0)
+        self._waiters: dict[AdmissionCostClass, deque[asyncio.Future]] = {
+            cost_class: deque() for cost_class in ADMISSION_COST_CLASSES
+        }
+
+        self._queue_time_ms = HistogramGroup()
+        self._admitted_count: dict[AdmissionCostClass, int] = dict.fromkeys(ADMISSION_COST_CLASSES, 0)
+        self._rejected_count: dict[str, int] = {}
+
+    def _can_run(self, cost_class: AdmissionCostClass) -> bool:
+        return (
+            self._in_flight_total < self.max_concurrency
+            and self._in_flight[cost_class] < self.class_limits[cost_class].max_concurrency
+        )
+
+    def _start(self, cost_class: AdmissionCostClass):
+        self._in_flight_total += 1
+        self._in_flight[cost_class] += 1
+        self._admitted_count[cost_class] += 1
+
+    def _dispatch(self):
+        for cost_class in ADMISSION_COST_CLASSES:
+            waiters = self._waiters[cost_class]
+
+            while waiters and self._can_run(cost_class):
+                self._start(cost_class)
+                waiters.popleft().set_result(None)
+
+            if self._in_flight_total >= self.max_concurrency:
+                return
+
+    def _reject(self, cost_class: AdmissionCostClass, reason: AdmissionRejectReason) -> AdmissionRejected:
+        key = f"{cost_class}:{reason}"
+        self._rejected_count[key] = self._rejected_count.get(key, 0) + 1
+
+        return AdmissionRejected(cost_class, reason)
+
+    async def acquire(self, cost_class: AdmissionCostClass):
+        waiters = self._waiters[cost_class]
+
+        # Requests of the same class don't skip the waiting ones
+        if not waiters and self._can_run(cost_class):
+            self._start(cost_class)
+            self._queue_time_ms.observe(cost_class, 0)
+            return
+
+        class_limit = self.class_limits[cost_class]
+
+        if len(waiters) >= class_limit.max_queue:
+            raise self._reject(cost_class, "queue-full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        start_sec = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), class_limit.max_wait_ms / 1000)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as ex:
+            if waiter.done():
+                # Admitted right before timing out or getting cancelled
+                if isinstance(ex, asyncio.CancelledError):
+                    self.release(cost_class)
+                    raise
+
+                self._queue_time_ms.observe(cost_class, (time.perf_counter() - start_sec) * 1000)
+                return
+
+            waiter.cancel()
+            waiters.remove(waiter)
+
+            if isinstance(ex, asyncio.CancelledError):
+                raise
+
+            raise self._reject(cost_class, "wait-timeout") from None
+
+        self._queue_time_ms.observe(cost_class, (time.perf_counter() - start_sec) * 1000)
+
+    def release(self, cost_class: AdmissionCostClass):
+        self._in_flight_total -= 1
+        self._in_flight[cost_class] -= 1
+
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, cost_class: AdmissionCostClass) -> AsyncIterator[None]:
+        await self.acquire(cost_class)
+
+        try:
+            yield
+        finally:
+            self.release(cost_class)
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            "inFlight": {"total": self._in_flight_total, **self._in_flight},
+            "queued": {cost_class: len(waiters) for cost_class, waiters in self._waiters.items()},
+            "admittedCount": self._admitted_count,
+            "rejectedCount": self._rejected_count,
+            "queueTimeMs": self._queue_time_ms.snapshot(),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting HTTP requests through :class:`AdmissionController`.
+
+    The cost class of a request is given by ``get_cost_class`` using the request path.
+    Requests of the paths starting with any of ``excluded_path_prefixes`` are passed through.
+    Rejected requests get 503 immediately.
+    """
+
+    def __init__(
+        self, app, *,
+        controller: AdmissionController,
+        get_cost_class: Callable[[str], AdmissionCostClass],
+        excluded_path_prefixes: tuple[str, ...] = (),
+        retry_after_sec: int = 1,
+    ):
+        self.app = app
+        self.controller = controller
+        self.get_cost_class = get_cost_class
+        self.excluded_path_prefixes = excluded_path_prefixes
+        self.retry_after_sec = retry_after_sec
+
+    async def _send_rejected(self, send, ex: AdmissionRejected):
+        body = json.dumps({"detail": f"Server busy ({ex.reason})"}).encode("utf-8")
+
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(self.retry_after_sec).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        cost_class = self.get_cost_class(scope["path"])
+
+        try:
+            await self.controller.acquire(cost_class)
+        except AdmissionRejected as ex:
+            await self._send_rejected(send, ex)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cost_class)
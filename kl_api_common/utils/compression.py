@@ -0,0 +1,177 @@
+import asyncio
+import gzip
+from typing import Any, Literal, TypeAlias
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ContentEncoding: TypeAlias = Literal["br", "gzip"]
+
+# Compressing these doesn't shrink them meaningfully
+_INCOMPRESSIBLE_CONTENT_TYPE_PREFIXES = (b"image/", b"video/", b"audio/", b"application/zip", b"application/gzip")
+
+
+def get_accepted_encodings(accept_encoding: str) -> set[str]:
+    """Content codings in ``accept_encoding`` having non-zero quality values."""
+    accepted = set()
+
+    for item in accept_encoding.split(","):
+        coding, *params = item.strip().lower().split(";")
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+
+        if coding and quality > 0:
+            accepted.add(coding)
+
+    return accepted
+
+
+def is_compressible(headers: list[tuple[bytes, bytes]]) -> bool:
+    """Check if the response having ``headers`` is not encoded already, and its content type compresses well."""
+    headers = dict(headers)
+
+    return (
+        b"content-encoding" not in headers
+        and not headers.get(b"content-type", b"").startswith(_INCOMPRESSIBLE_CONTENT_TYPE_PREFIXES)
+    )
+
+
+def add_vary_accept_encoding(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    """Merge ``Accept-Encoding`` into the ``Vary`` header of ``headers``, as the response depends on it."""
+    vary = [value for name, value in headers if name == b"vary"]
+    vary_fields = {field.strip().lower() for value in vary for field in value.split(b",")}
+
+    if b"accept-encoding" in vary_fields or b"*" in vary_fields:
+        return headers
+
+    return [(name, value) for name, value in headers if name != b"vary"] + [
+        (b"vary", b", ".join(vary + [b"Accept-Encoding"]))
+    ]
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing the HTTP responses in brotli or gzip, as negotiated by ``Accept-Encoding``.
+
+    Brotli is preferred if ``brotli`` is installed. Only the complete responses of at least ``min_size_bytes``
+    are compressed, and streamed responses are passed through as-is.
+    Responses of at least ``thread_min_size_bytes`` are compressed in a thread to not block the event loop.
+
+    ``Vary: Accept-Encoding`` is added to every response that could have been compressed, including the ones
+    passed through uncompressed, so caches don't serve a response to a client not accepting its encoding.
+    """
+
+    def __init__(
+        self, app, *,
+        min_size_bytes: int = 1024,
+        gzip_level: int = 6,
+        brotli_level: int = 4,
+        thread_min_size_bytes: int = 65536,
+        excluded_path_prefixes: tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.min_size_bytes = min_size_bytes
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.thread_min_size_bytes = thread_min_size_bytes
+        self.excluded_path_prefixes = excluded_path_prefixes
+
+    def _negotiate(self, scope) -> ContentEncoding | None:
+        for name, value in scope["headers"]:
+            if name != b"accept-encoding":
+                continue
+
+            accepted = get_accepted_encodings(value.decode("latin-1"))
+
+            if brotli is not None and "br" in accepted:
+                return "br"
+
+            if "gzip" in accepted:
+                return "gzip"
+
+        return None
+
+    def _compress(self, body: bytes, encoding: ContentEncoding) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_level)
+
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate(scope)
+
+        if not encoding:
+            async def send_with_vary(message):
+                if message["type"] == "http.response.start" and is_compressible(message.get("headers", [])):
+                    message = message | {"headers": add_vary_accept_encoding(message.get("headers", []))}
+
+                await send(message)
+
+            await self.app(scope, receive, send_with_vary)
+            return
+
+        start_message: dict[str, Any] | None = None
+        # Set once the response is decided to be passed through
+        passing_through = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passing_through
+
+            if passing_through:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if not is_compressible(message.get("headers", [])):
+                    passing_through = True
+                    await send(message)
+                    return
+
+                # Held until the body is known
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+
+            if message.get("more_body", False) or len(body) < self.min_size_bytes:
+                passing_through = True
+                await send(start_message | {"headers": add_vary_accept_encoding(start_message.get("headers", []))})
+                await send(message)
+                return
+
+            if len(body) >= self.thread_min_size_bytes:
+                compressed = await asyncio.to_thread(self._compress, body, encoding)
+            else:
+                compressed = self._compress(body, encoding)
+
+            headers = [
+                (name, value) for name, value in add_vary_accept_encoding(start_message.get("headers", []))
+                if name != b"content-length"
+            ]
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+            ]
+
+            await send(start_message | {"headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,6 +1,9 @@
 import json
+from typing import Any
 
+import orjson
 from bson import ObjectId
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 
@@ -23,3 +26,26 @@ class FastApiSioJSONSerializer:
     @staticmethod
     def loads(*args, **kwargs):
         return json.loads(*args, **kwargs)
+
+
+def _orjson_default(o: Any) -> Any:
+    if isinstance(o, ObjectId):
+        return str(o)
+
+    if isinstance(o, BaseModel):
+        return o.dict()
+
+    raise TypeError(f"Type is not JSON serializable: {type(o).__name__}")
+
+
+class FastApiORJSONResponse(ORJSONResponse):
+    """
+    JSON response rendered by ``orjson``, which also serializes ``ObjectId`` and pydantic models.
+
+    Endpoints returning this directly skip the validation and the encoding against their ``response_model``,
+    so only return this on the data which already matches the ``response_model``, such as the decoded documents.
+    ``response_model`` is still used for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
@@ -1,3 +1,4 @@
+from .attach_handlers import get_log_dropped_count
 from .logger import LogLevels, log_message_via_logger
 from .types import LogData
-from .main import print_log, print_socket_event
+from .main import print_log, print_log_event, print_socket_event
@@ -1,18 +1,65 @@
+import atexit
 import logging
 import os
+import queue
 
-from kl_api_common.const import LOG_TO_DIR
+from kl_api_common.const import (
+    LOG_FILE_BUFFER_SIZE_KB, LOG_FILE_COMPRESSION, LOG_FILE_FLUSH_INTERVAL_SEC, LOG_FILE_MAX_SIZE_MB, LOG_FILE_MODE,
+    LOG_FILE_RETENTION_TOTAL_MB, LOG_QUEUE_BATCH_SIZE, LOG_QUEUE_FULL_POLICY, LOG_QUEUE_MAX_SIZE, LOG_TO_DIR,
+    SERVER_WORKERS,
+)
 from kl_api_common.env import APP_NAME
-from .handlers import ParallelTimedRotatingFileHandler
+from ..metrics import register_metrics_source
+from .handlers import (
+    BatchQueueListener, BoundedQueueHandler, BufferedRotatingFileHandler, ParallelTimedRotatingFileHandler,
+)
 
+_queue_handlers: list[BoundedQueueHandler] = []
 
-def attach_file_handler(logger: logging.Logger):
-    handler = ParallelTimedRotatingFileHandler(
-        filename=os.path.join(LOG_TO_DIR, APP_NAME),
+
+def get_log_dropped_count() -> int:
+    return sum(handler.dropped_count for handler in _queue_handlers)
+
+
+register_metrics_source("log", lambda: {"droppedCount": get_log_dropped_count()})
+
+
+def make_file_handler() -> logging.Handler:
+    filename = os.path.join(LOG_TO_DIR, APP_NAME)
+
+    if LOG_FILE_MODE == "buffered":
+        return BufferedRotatingFileHandler(
+            filename=filename,
+            encoding="utf-8",
+            when="D",
+            buffer_size=LOG_FILE_BUFFER_SIZE_KB * 1024,
+            flush_interval_sec=LOG_FILE_FLUSH_INTERVAL_SEC,
+            max_bytes=LOG_FILE_MAX_SIZE_MB * 1024 * 1024,
+            compression=None if LOG_FILE_COMPRESSION == "none" else LOG_FILE_COMPRESSION,
+            retention_bytes=LOG_FILE_RETENTION_TOTAL_MB * 1024 * 1024,
+            # Each worker is a separate process
+            per_process=SERVER_WORKERS > 1,
+        )
+
+    return ParallelTimedRotatingFileHandler(
+        filename=filename,
         encoding="utf-8",
         when="D",
         backup_count=14,
     )
+
+
+def attach_file_handler(logger: logging.Logger):
+    handler = make_file_handler()
     handler.setFormatter(logging.Formatter(fmt="%(message)s"))
 
-    logger.addHandler(handler)  # All messages should be logged
+    # File writes happen on the listener thread, so the callers never wait on disk I/O
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+    queue_handler = BoundedQueueHandler(log_queue, full_policy=LOG_QUEUE_FULL_POLICY)
+    listener = BatchQueueListener(log_queue, handler, batch_size=LOG_QUEUE_BATCH_SIZE)
+    listener.start()
+    # Drain the queue on exit - registered after `logging`, so this runs before `logging.shutdown()`
+    atexit.register(listener.stop)
+
+    _queue_handlers.append(queue_handler)
+    logger.addHandler(queue_handler)  # All messages should be logged
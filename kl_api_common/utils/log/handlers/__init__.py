@@ -1 +1,3 @@
+from .buffered_file import BufferedRotatingFileHandler, LogFileCompression
 from .parallel_file import ParallelTimedRotatingFileHandler
+from .queued import BatchQueueListener, BoundedQueueHandler, LogQueueFullPolicy
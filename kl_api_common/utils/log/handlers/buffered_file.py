@@ -0,0 +1,301 @@
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Literal, TypeAlias
+
+from .parallel_file import ParallelTimedRotatingFileHandler
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LogFileCompression: TypeAlias = Literal["gzip", "zstd"]
+
+_COMPRESSED_EXT: dict[LogFileCompression, str] = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+_ARCHIVED_EXTS = tuple(_COMPRESSED_EXT.values())
+
+
+class _RotatedFileArchiver:
+    """
+    Compresses the rotated log files and enforces the retention on a background thread.
+
+    The retention counts the log files of all processes, but the uncompressed files of the other processes
+    are never deleted, as they could still be written.
+    """
+
+    def __init__(
+        self, file_name_prefix: str, compression: LogFileCompression | None, retention_bytes: int, *,
+        process_id: int | None,
+    ):
+        self.dir_name, self.file_name_prefix = os.path.split(file_name_prefix)
+        self.file_name_prefix += "."
+        self.own_file_name_prefix = f"{self.file_name_prefix}{process_id}." if process_id else self.file_name_prefix
+        self.compression = compression
+        self.retention_bytes = retention_bytes
+
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._active_file_name: str | None = None
+        self._thread = threading.Thread(target=self._monitor, name="LogFileArchiver", daemon=True)
+        self._thread.start()
+
+    @property
+    def compressed_ext(self) -> str:
+        return _COMPRESSED_EXT[self.compression] if self.compression else ""
+
+    def submit(self, rotated_file_name: str | None, active_file_name: str):
+        """Queue ``rotated_file_name`` to be compressed, then enforce the retention."""
+        self._active_file_name = active_file_name
+        self._queue.put(rotated_file_name or "")
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _monitor(self):
+        while True:
+            rotated_file_name = self._queue.get()
+
+            if rotated_file_name is None:
+                break
+
+            try:
+                if rotated_file_name:
+                    self._compress(rotated_file_name)
+
+                self._enforce_retention()
+            except OSError:
+                # Nothing much to do if the log file can't be archived, retry on the next rollover
+                pass
+
+    def _compress(self, file_name: str):
+        if not self.compression or not os.path.exists(file_name):
+            return
+
+        file_name_compressed = file_name + self.compressed_ext
+        file_name_temp = file_name_compressed + ".tmp"
+
+        with open(file_name, "rb") as file_src, open(file_name_temp, "wb") as file_dst:
+            if self.compression == "zstd":
+                zstandard.ZstdCompressor().copy_stream(file_src, file_dst)
+            else:
+                with gzip.GzipFile(fileobj=file_dst, mode="wb") as file_dst_gzip:
+                    shutil.copyfileobj(file_src, file_dst_gzip)
+
+        os.replace(file_name_temp, file_name_compressed)
+        os.remove(file_name)
+
+    def _enforce_retention(self):
+        if not self.retention_bytes:
+            return
+
+        files: list[tuple[float, int, str]] = []
+        total_bytes = 0
+
+        for entry in os.scandir(self.dir_name or "."):
+            if not entry.name.startswith(self.file_name_prefix) or not entry.is_file():
+                continue
+
+            stat = entry.stat()
+            total_bytes += stat.st_size
+
+            if entry.path == self._active_file_name or entry.name.endswith(".tmp"):
+                continue
+
+            if entry.name.startswith(self.own_file_name_prefix) or entry.name.endswith(_ARCHIVED_EXTS):
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        files.sort()  # Oldest first
+
+        for _, size, path in files:
+            if total_bytes <= self.retention_bytes:
+                break
+
+            os.remove(path)
+            total_bytes -= size
+
+
+class BufferedRotatingFileHandler(ParallelTimedRotatingFileHandler):
+    """
+    Rotating file handler which buffers the writes, and rotates by both time and size.
+
+    Buffered messages are written on full buffer, on every ``flush_interval_sec``, or on close.
+    Only complete lines are written at once, so multiple processes can still append to the same file.
+
+    Rotated files are compressed and the total size of the log files is bounded on a background thread.
+
+    Rotation is decided by each process on its own, so processes sharing the log files would rotate and compress
+    the files still written by the others. Set ``per_process`` if multiple processes log, so each of them writes
+    to its own files suffixed by the process ID.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        when="D",
+        interval=1,
+        encoding=None,
+        utc=False,
+        suffix=".log", *,
+        buffer_size: int = 65536,
+        flush_interval_sec: float = 1,
+        max_bytes: int = 0,
+        compression: LogFileCompression | None = None,
+        retention_bytes: int = 0,
+        per_process: bool = False,
+    ):
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("`zstandard` is required for compressing log files in zstd")
+
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+
+        self._buffer: list[str] = []
+        self._buffer_len = 0
+        self._file_size = 0
+        self._size_index = 0
+        self._archiver = _RotatedFileArchiver(
+            filename, compression, retention_bytes, process_id=os.getpid() if per_process else None
+        )
+
+        if per_process:
+            filename = f"{filename}.{os.getpid()}"
+
+        # Retention is enforced by the archiver instead, so `backup_count` is always 0
+        super().__init__(filename, when, interval, backup_count=0, encoding=encoding, utc=utc, suffix=suffix)
+
+        self._archiver.submit(None, self.baseFilename)
+
+        self._flusher_stopped = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, args=(flush_interval_sec,), name="LogFileFlusher", daemon=True
+        )
+        self._flusher.start()
+
+    def calc_file_name(self, current_time):
+        self._period_time = current_time
+        file_name = super().calc_file_name(current_time)
+
+        while True:
+            if self._size_index:
+                file_name_indexed = f"{file_name[:-len(self.postfix)]}.{self._size_index}{self.postfix}"
+            else:
+                file_name_indexed = file_name
+
+            # Skip the files archived earlier, possibly before a restart
+            if not os.path.exists(file_name_indexed + self._archiver.compressed_ext):
+                return file_name_indexed
+
+            self._size_index += 1
+
+    def _open(self):
+        stream = super()._open()
+        self._file_size = os.fstat(stream.fileno()).st_size
+
+        return stream
+
+    def _should_rollover_for(self, message: str) -> bool:
+        if int(time.time()) >= self.rolloverAt:
+            return True
+
+        size_written = self._file_size + self._buffer_len
+
+        return bool(self.max_bytes) and size_written > 0 and size_written + len(message) > self.max_bytes
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+
+        if self.stream is None:
+            self.stream = self._open()
+
+        data = "".join(self._buffer)
+        self.stream.write(data)
+        self.stream.flush()
+
+        # Log messages are ASCII-only JSON, so the length is the byte count
+        self._file_size += len(data)
+        self._buffer.clear()
+        self._buffer_len = 0
+
+    def _emit_buffered(self, record: logging.LogRecord):
+        message = self.format(record) + self.terminator
+
+        if self._should_rollover_for(message):
+            self.doRollover()
+
+        self._buffer.append(message)
+        self._buffer_len += len(message)
+
+        if self._buffer_len >= self.buffer_size:
+            self._write_buffer()
+
+    def _flush_periodically(self, flush_interval_sec: float):
+        while not self._flusher_stopped.wait(flush_interval_sec):
+            self.flush()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._emit_buffered(record)
+        except Exception:  # noqa
+            self.handleError(record)
+
+    def handle_batch(self, records: list[logging.LogRecord]):
+        self.acquire()
+        try:
+            for record in records:
+                if self.filter(record):
+                    self.emit(record)
+        finally:
+            self.release()
+
+    def flush(self):
+        self.acquire()
+        try:
+            self._write_buffer()
+        finally:
+            self.release()
+
+    def doRollover(self):
+        self._write_buffer()
+        file_name_rotated = self.baseFilename
+
+        if int(time.time()) >= self.rolloverAt:
+            # The first rollover right after start stays in the same period, so the size index is kept
+            if super().calc_file_name(self.rolloverAt) != super().calc_file_name(self._period_time):
+                self._size_index = 0
+
+            super().doRollover()
+        else:
+            self._size_index += 1
+
+            if self.stream:
+                self.stream.close()
+                # noinspection PyTypeChecker
+                self.stream = None
+
+            self.baseFilename = os.path.abspath(self.calc_file_name(self._period_time))
+            self.stream = self._open()
+
+        if self.baseFilename != file_name_rotated:
+            self._archiver.submit(file_name_rotated, self.baseFilename)
+
+    def close(self):
+        self._flusher_stopped.set()
+
+        self.acquire()
+        try:
+            self._write_buffer()
+            super().close()
+        finally:
+            self.release()
+
+        self._archiver.stop()
@@ -115,6 +115,29 @@ class ParallelTimedRotatingFileHandler(TimedRotatingFileHandler):
 
         return result
 
+    def handle_batch(self, records: list[logging.LogRecord]):
+        """Write ``records`` and flush the stream once for the whole batch."""
+        self.acquire()
+        try:
+            for record in records:
+                if not self.filter(record):
+                    continue
+
+                try:
+                    if self.shouldRollover(record):
+                        self.doRollover()
+
+                    if self.stream is None:
+                        self.stream = self._open()
+
+                    self.stream.write(self.format(record) + self.terminator)
+                except Exception:  # noqa
+                    self.handleError(record)
+
+            self.flush()
+        finally:
+            self.release()
+
     def doRollover(self):
         if self.stream:
             self.stream.close()
@@ -0,0 +1,102 @@
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Literal, TypeAlias
+
+LogQueueFullPolicy: TypeAlias = Literal["drop", "block"]
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler which never lets the caller wait on disk I/O.
+
+    When the queue is full, the record is either dropped (``drop``) or the caller waits for a free slot (``block``).
+    """
+
+    def __init__(self, queue_: queue.Queue, *, full_policy: LogQueueFullPolicy = "drop"):
+        super().__init__(queue_)
+
+        self.full_policy = full_policy
+
+        self._dropped_count = 0
+        self._dropped_count_lock = threading.Lock()
+
+    @property
+    def dropped_count(self) -> int:
+        return self._dropped_count
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.full_policy == "block":
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_count_lock:
+                self._dropped_count += 1
+
+
+class BatchQueueListener(QueueListener):
+    """
+    Queue listener which dequeues the records in batches.
+
+    Handlers having ``handle_batch()`` receive the whole batch at once, so they can flush once per batch.
+    """
+
+    def __init__(self, queue_: queue.Queue, *handlers: logging.Handler, batch_size: int = 256):
+        super().__init__(queue_, *handlers, respect_handler_level=True)
+
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self):
+        # Blocking `put()` so the sentinel is still delivered when the queue is full
+        self.queue.put(self._sentinel)
+
+    def dequeue_batch(self) -> tuple[list[logging.LogRecord], bool]:
+        """Returns the records dequeued, and if the sentinel is reached."""
+        batch = [self.dequeue(True)]
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.dequeue(False))
+            except queue.Empty:
+                break
+
+        if self._sentinel in batch:
+            return batch[:batch.index(self._sentinel)], True
+
+        return batch, False
+
+    def handle_batch(self, records: list[logging.LogRecord]):
+        records = [self.prepare(record) for record in records]
+
+        for handler in self.handlers:
+            records_to_handle = [record for record in records if record.levelno >= handler.level]
+
+            if not records_to_handle:
+                continue
+
+            if hasattr(handler, "handle_batch"):
+                handler.handle_batch(records_to_handle)
+                continue
+
+            for record in records_to_handle:
+                handler.handle(record)
+
+    def _monitor(self):
+        has_task_done = hasattr(self.queue, "task_done")
+
+        while True:
+            records, sentinel_reached = self.dequeue_batch()
+
+            if records:
+                self.handle_batch(records)
+
+            if has_task_done:
+                for _ in range(len(records) + sentinel_reached):
+                    self.queue.task_done()
+
+            if sentinel_reached:
+                break
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+
+@dataclass
+class _LogKeyState:
+    tokens: float
+    updated_at: float
+    suppressed: int = 0
+
+
+class LogRateLimiter:
+    """
+    Token bucket rate limiter for each log message key.
+
+    Every key has a bucket of ``burst`` tokens, refilled at ``rate_per_sec``.
+    Messages of a key are suppressed when its bucket is empty, and the suppressed count is reported by
+    :meth:`pop_summaries`, which should be called every ``summary_interval_sec``.
+
+    Only the ``max_keys`` least recently used keys are tracked.
+    """
+
+    def __init__(self, *, rate_per_sec: float, burst: int, summary_interval_sec: float, max_keys: int):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.summary_interval_sec = summary_interval_sec
+        self.max_keys = max_keys
+
+        self._states: OrderedDict[Hashable, _LogKeyState] = OrderedDict()
+        self._suppressed_keys: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> bool:
+        """Returns ``True`` if the message of ``key`` should be logged."""
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._states.get(key)
+
+            if state is None:
+                state = self._states[key] = _LogKeyState(tokens=self.burst, updated_at=now)
+
+                if len(self._states) > self.max_keys:
+                    key_evicted, _ = self._states.popitem(last=False)
+                    self._suppressed_keys.discard(key_evicted)
+            else:
+                self._states.move_to_end(key)
+                state.tokens = min(self.burst, state.tokens + (now - state.updated_at) * self.rate_per_sec)
+                state.updated_at = now
+
+            if state.tokens >= 1:
+                state.tokens -= 1
+                return True
+
+            state.suppressed += 1
+            self._suppressed_keys.add(key)
+
+            return False
+
+    def pop_summaries(self) -> list[tuple[Hashable, int]]:
+        """Get the keys having messages suppressed, and the count of the suppressed messages since the last summary."""
+        with self._lock:
+            summaries: list[tuple[Hashable, int]] = []
+
+            for key in self._suppressed_keys:
+                state = self._states[key]
+                summaries.append((key, state.suppressed))
+                state.suppressed = 0
+
+            self._suppressed_keys.clear()
+
+            return summaries
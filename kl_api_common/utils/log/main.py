@@ -1,33 +1,56 @@
+import atexit
 import threading
 import time
 from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Hashable, get_args
 
 from rich.console import Console, Text
+from rich.markup import escape
 
-from kl_api_common.const import rich_console
+from kl_api_common.const import (
+    LOG_RATE_LIMIT_BURST, LOG_RATE_LIMIT_ENABLED, LOG_RATE_LIMIT_MAX_KEYS, LOG_RATE_LIMIT_MIN_LEVEL,
+    LOG_RATE_LIMIT_RATE_PER_SEC, LOG_RATE_LIMIT_SUMMARY_INTERVAL_SEC,
+)
 from kl_api_common.env import APP_NAME, DEVELOPMENT_MODE
+from .limiter import LogRateLimiter
 from .logger import log_message_via_logger
 from .types import LogData, LogLevels
 
+rich_console = Console()
+
+_rate_limiter: LogRateLimiter | None = LogRateLimiter(
+    rate_per_sec=LOG_RATE_LIMIT_RATE_PER_SEC,
+    burst=LOG_RATE_LIMIT_BURST,
+    summary_interval_sec=LOG_RATE_LIMIT_SUMMARY_INTERVAL_SEC,
+    max_keys=LOG_RATE_LIMIT_MAX_KEYS,
+) if LOG_RATE_LIMIT_ENABLED else None
+
+# `LogLevels` is ordered from the highest level
+_LOG_LEVELS: tuple[LogLevels, ...] = get_args(LogLevels)
+_RATE_LIMITED_LEVELS: set[LogLevels] = set(_LOG_LEVELS[:_LOG_LEVELS.index(LOG_RATE_LIMIT_MIN_LEVEL) + 1])
+
 
 def _get_current_timestamp() -> str:
     return datetime.now().isoformat()[:-3]
 
 
-def _print_console(
-    rich_console: Console, level: LogLevels, message: str, *,
+@lru_cache(maxsize=1024)
+def _strip_markup(template: str) -> str:
+    return Text.from_markup(template).plain
+
+
+def _log_message(
+    rich_console: Console, level: LogLevels, message_plain: str, message_markup: Callable[[], str], *,
     timestamp_color: str, identifier: str | None, **data
 ):
-    if level == "DEBUG" and not DEVELOPMENT_MODE:
-        return
-
     epoch_ms = int(time.time() * 1000)
     log_data: LogData = {
         "application": APP_NAME,
         "level": level,
         "timestamp": epoch_ms,
         "threadId": threading.get_ident(),
-        "message": Text.from_markup(message).plain,
+        "message": message_plain,
         **data
     }
 
@@ -40,24 +63,99 @@ def _print_console(
         return
 
     message = f"{level:>8} [{timestamp_color}]{datetime.fromtimestamp(epoch_ms / 1000).isoformat()[:-3]}[/] " \
-              f"\[{log_data['threadId']:>6}]: {f'[{identifier}]' if identifier else ''} {message}"  # noqa: W605
+              f"\[{log_data['threadId']:>6}]: {f'[{identifier}]' if identifier else ''} " \
+              f"{message_markup()}"  # noqa: W605
 
     rich_console.print(message, soft_wrap=True)  # Disable soft wrapping
 
 
-def print_log(message: str, *, identifier: str | None = None, **data):
-    _print_console(rich_console, "INFO", message, timestamp_color="green", identifier=identifier, **data)
+def _log_suppressed_summaries():
+    for (level, identifier, template_plain), suppressed_count in _rate_limiter.pop_summaries():
+        summary_plain = f"{template_plain} (repeated {suppressed_count} times, suppressed)"
 
+        _log_message(
+            rich_console, level, summary_plain, lambda: escape(summary_plain),
+            timestamp_color="green", identifier=identifier, suppressedCount=suppressed_count
+        )
 
-def print_socket_event(event: str, *, session_id: str, **data):
-    message = f"Received `[purple]{event}[/]`"
 
-    if session_id:
-        message += f" - SID: [yellow]{session_id}[/]"
+def _log_suppressed_summaries_periodically():
+    while True:
+        time.sleep(_rate_limiter.summary_interval_sec)
+        _log_suppressed_summaries()
+
 
+if _rate_limiter:
+    threading.Thread(target=_log_suppressed_summaries_periodically, name="LogSummarizer", daemon=True).start()
+    # Registered after the file handler, so this runs before its queue is drained
+    atexit.register(_log_suppressed_summaries)
+
+
+def _print_console(
+    rich_console: Console, level: LogLevels, message_plain: str, message_markup: Callable[[], str], *,
+    timestamp_color: str, identifier: str | None, rate_limit_key: Hashable | None, **data
+):
+    if level == "DEBUG" and not DEVELOPMENT_MODE:
+        return
+
+    # Checked before encoding and writing the log, so repeated messages are cheap
+    if rate_limit_key and _rate_limiter and not _rate_limiter.acquire(rate_limit_key):
+        return
+
+    _log_message(
+        rich_console, level, message_plain, message_markup,
+        timestamp_color=timestamp_color, identifier=identifier, **data
+    )
+
+
+def print_log(message: str, *, identifier: str | None = None, **data):
+    # Not rate limited, as `message` is already formatted and the repeated messages can't be told
+    _print_console(
+        rich_console, "INFO", Text.from_markup(message).plain, lambda: message,
+        timestamp_color="green", identifier=identifier, rate_limit_key=None, **data
+    )
+
+
+def print_log_event(
+    template: str, *,
+    level: LogLevels = "INFO",
+    identifier: str | None = None,
+    fields: dict[str, Any] | None = None,
+    **data
+):
+    """
+    Log ``template`` formatted by :meth:`str.format` using ``data`` and ``fields``.
+
+    ``template`` should be static (not an f-string), so its markup is stripped only once.
+    ``data`` is included in the log data, while ``fields`` is only used to format the message.
+    """
+    values = data | fields if fields else data
+    template_plain = _strip_markup(template)
+
+    _print_console(
+        rich_console, level,
+        template_plain.format_map(values),
+        lambda: template.format_map({key: escape(value) if isinstance(value, str) else value
+                                     for key, value in values.items()}),
+        timestamp_color="green", identifier=identifier,
+        # Keyed by the template, so messages formatted with different values share the same limit
+        rate_limit_key=(level, identifier, template_plain) if level in _RATE_LIMITED_LEVELS else None,
+        **data
+    )
+
+
+def print_socket_event(event: str, *, session_id: str, **data):
     data["socket"] = {
         "event": event,
         "id": session_id
     }
 
-    print_log(message, **data)
+    if session_id:
+        print_log_event(
+            "Received `[purple]{event}[/]` - SID: [yellow]{sessionId}[/]",
+            fields={"event": event, "sessionId": session_id},
+            **data
+        )
+        return
+
+    print_log_event("Received `[purple]{event}[/]`", fields={"event": event}, **data)
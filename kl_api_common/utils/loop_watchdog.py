@@ -0,0 +1,149 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+from .log import print_log_event
+from .log.limiter import LogRateLimiter
+from .metrics import Histogram
+
+# Name of the socket event or the route handled by each task, to tell what stalled the loop
+_task_activities: dict[asyncio.Task, str] = {}
+
+
+def _on_task_done(task: asyncio.Task):
+    _task_activities.pop(task, None)
+
+
+def set_loop_activity(activity: str):
+    """Mark the current task as handling ``activity``, which is logged if the event loop stalls during the task."""
+    task = asyncio.current_task()
+
+    if task is None:
+        return
+
+    if task not in _task_activities:
+        task.add_done_callback(_on_task_done)
+
+    _task_activities[task] = activity
+
+
+class LoopStallWatchdog:
+    """
+    Detects the event loop stalls, which happen when the loop runs blocking code.
+
+    A heartbeat coroutine on the loop records its wake-up time every ``interval_ms``.
+    A watchdog thread checks the last heartbeat, and if the loop has not woken up for ``threshold_ms``,
+    logs the innermost ``stack_depth`` frames of the loop thread along with the activity of the running task.
+    Stack logs are limited to ``max_logs_per_min``.
+    """
+
+    def __init__(self, *, interval_ms: float, threshold_ms: float, max_logs_per_min: int, stack_depth: int = 15):
+        self.interval_sec = interval_ms / 1000
+        self.threshold_sec = threshold_ms / 1000
+        self.stack_depth = stack_depth
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._last_beat_sec = time.monotonic()
+        self._stall_reported_beat_sec: float | None = None
+        self._limiter = LogRateLimiter(
+            rate_per_sec=max_logs_per_min / 60, burst=max_logs_per_min, summary_interval_sec=60, max_keys=1
+        )
+
+        self._stall_count = 0
+        self._max_lag_ms = 0.0
+        self._stall_lag_ms = Histogram()
+
+    def start(self):
+        """Start the heartbeat on the running event loop and the watchdog thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat_sec = time.monotonic()
+
+        self._loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="LoopWatchdog", daemon=True).start()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval_sec)
+
+            now = time.monotonic()
+            lag_sec = now - self._last_beat_sec - self.interval_sec
+            self._last_beat_sec = now
+
+            if lag_sec < self.threshold_sec:
+                continue
+
+            lag_ms = lag_sec * 1000
+            self._stall_count += 1
+            self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+            self._stall_lag_ms.observe(lag_ms)
+
+    def _get_activity(self) -> str | None:
+        # Read from another thread, but the loop thread is blocked during a stall
+        task = asyncio.current_task(self._loop)
+
+        if task is None:
+            return None
+
+        return _task_activities.get(task) or task.get_name()
+
+    def _report_stall(self, last_beat_sec: float, lag_sec: float):
+        self._stall_reported_beat_sec = last_beat_sec
+
+        if not self._limiter.acquire(None):
+            return
+
+        frame = sys._current_frames().get(self._loop_thread_id)  # noqa
+
+        if frame is None:
+            return
+
+        # The outer frames are mostly the same event loop and server frames, so only the innermost ones are logged
+        stack = traceback.extract_stack(frame, limit=self.stack_depth)
+        location = f"{stack[-1].filename}:{stack[-1].lineno} ({stack[-1].name})" if stack else "unknown"
+
+        print_log_event(
+            "[red]Event loop stalled[/] for over [yellow]{lagMs:.0f}[/] ms in [purple]{activity}[/] at {location}",
+            level="WARNING",
+            lagMs=lag_sec * 1000,
+            activity=self._get_activity() or "(idle)",
+            location=location,
+            stack="".join(stack.format()),
+        )
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval_sec)
+
+            last_beat_sec = self._last_beat_sec
+            lag_sec = time.monotonic() - last_beat_sec - self.interval_sec
+
+            # Reported once for each stall
+            if lag_sec >= self.threshold_sec and self._stall_reported_beat_sec != last_beat_sec:
+                self._report_stall(last_beat_sec, lag_sec)
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            "stallCount": self._stall_count,
+            "maxLagMs": self._max_lag_ms,
+            "stallLagMs": self._stall_lag_ms.snapshot(),
+        }
+
+
+class LoopActivityMiddleware:
+    """
+    ASGI middleware marking the task of each HTTP request with its method and path for :class:`LoopStallWatchdog`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            set_loop_activity(f"{scope['method']} {scope['path']}")
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,103 @@
+import bisect
+import threading
+from typing import Any, Callable, TypedDict
+
+DEFAULT_BUCKETS_MS: tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class HistogramSnapshot(TypedDict):
+    count: int
+    sum: float
+    max: float
+    p50: float
+    p95: float
+    p99: float
+    # Upper bound of the bucket (`+Inf` for the last one) to the count of the values in it
+    buckets: dict[str, int]
+
+
+class Histogram:
+    """Thread-safe histogram with fixed buckets. Percentiles are estimated by the bucket upper bounds."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.bucket_bounds = buckets
+
+        self._counts = [0] * (len(buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        idx = bisect.bisect_left(self.bucket_bounds, value)
+
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def _get_percentile(self, percentile: float) -> float:
+        if not self._count:
+            return 0
+
+        target = self._count * percentile
+        accumulated = 0
+
+        for idx, count in enumerate(self._counts):
+            accumulated += count
+
+            if accumulated >= target:
+                return self.bucket_bounds[idx] if idx < len(self.bucket_bounds) else self._max
+
+        return self._max
+
+    def snapshot(self) -> HistogramSnapshot:
+        with self._lock:
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "max": self._max,
+                "p50": self._get_percentile(0.5),
+                "p95": self._get_percentile(0.95),
+                "p99": self._get_percentile(0.99),
+                "buckets": {
+                    str(bound): count for bound, count
+                    in zip([*self.bucket_bounds, "+Inf"], self._counts)
+                },
+            }
+
+
+class HistogramGroup:
+    """Histograms created on demand for each key."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = buckets
+
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, value: float):
+        histogram = self._histograms.get(key)
+
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+
+        histogram.observe(value)
+
+    def snapshot(self) -> dict[str, HistogramSnapshot]:
+        return {key: histogram.snapshot() for key, histogram in list(self._histograms.items())}
+
+
+_metrics_sources: dict[str, Callable[[], dict[str, Any]]] = {}
+
+
+def register_metrics_source(name: str, get_metrics_of_source: Callable[[], dict[str, Any]]):
+    """Register ``get_metrics_of_source`` to provide the metrics under ``name`` in :func:`get_metrics`."""
+    _metrics_sources[name] = get_metrics_of_source
+
+
+def get_metrics() -> dict[str, Any]:
+    """Get the metrics of all registered sources in this process."""
+    return {name: get_metrics_of_source() for name, get_metrics_of_source in _metrics_sources.items()}
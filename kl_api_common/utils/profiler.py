@@ -0,0 +1,134 @@
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any, Literal, TypeAlias
+
+ProfileFormat: TypeAlias = Literal["collapsed", "speedscope"]
+
+# Frame as (function name, file name, first line number)
+ProfileFrame: TypeAlias = tuple[str, str, int]
+
+PROFILE_MAX_DURATION_SEC = 60
+
+# Max ratio of the time spent on sampling, the sampling interval is extended to stay within this
+PROFILE_OVERHEAD_BUDGET = 0.02
+
+_PROFILE_MAX_DEPTH = 128
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+@dataclass
+class ProfileResult:
+    duration_sec: float
+    sample_count: int
+    interval_ms: float
+    # Thread name to the stacks (outermost frame first) and their sample counts
+    stacks: dict[str, Counter[tuple[ProfileFrame, ...]]] = field(default_factory=dict)
+
+    def to_collapsed(self) -> str:
+        """Collapsed stacks, which can be loaded by the flame graph tools."""
+        return "\n".join(
+            ";".join([thread_name, *(f"{name} ({file_name}:{line_no})" for name, file_name, line_no in stack)])
+            + f" {count}"
+            for thread_name, stack_counts in self.stacks.items()
+            for stack, count in stack_counts.most_common()
+        )
+
+    def to_speedscope(self) -> dict[str, Any]:
+        """Profile in the file format of https://www.speedscope.app, with a sampled profile for each thread."""
+        frame_indexes: dict[ProfileFrame, int] = {}
+        profiles: list[dict[str, Any]] = []
+
+        for thread_name, stack_counts in self.stacks.items():
+            samples: list[list[int]] = []
+            weights: list[float] = []
+
+            for stack, count in stack_counts.items():
+                samples.append([frame_indexes.setdefault(frame, len(frame_indexes)) for frame in stack])
+                weights.append(count * self.interval_ms)
+
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {
+                "frames": [
+                    {"name": name, "file": file_name, "line": line_no}
+                    for name, file_name, line_no in frame_indexes
+                ],
+            },
+            "profiles": profiles,
+            "exporter": "kl-api-account",
+        }
+
+
+def _get_stack(frame: FrameType | None) -> tuple[ProfileFrame, ...]:
+    stack: list[ProfileFrame] = []
+
+    while frame and len(stack) < _PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        # `co_qualname` is only available since Python 3.11
+        stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+
+    stack.reverse()
+
+    return tuple(stack)
+
+
+def profile_threads(duration_sec: float, *, interval_ms: float) -> ProfileResult:
+    """
+    Sample the stacks of all threads except the calling one every ``interval_ms`` for ``duration_sec``.
+
+    The sampling interval is extended if sampling takes more than ``PROFILE_OVERHEAD_BUDGET`` of the time.
+    Raises :class:`ProfilerBusy` if another profile is running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+
+    try:
+        self_thread_id = threading.get_ident()
+        interval_sec = interval_ms / 1000
+        result = ProfileResult(duration_sec=0, sample_count=0, interval_ms=interval_ms)
+
+        start_sec = time.perf_counter()
+        end_sec = start_sec + min(duration_sec, PROFILE_MAX_DURATION_SEC)
+
+        while (sample_start_sec := time.perf_counter()) < end_sec:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():  # noqa
+                if thread_id == self_thread_id:
+                    continue
+
+                thread_name = thread_names.get(thread_id, str(thread_id))
+                result.stacks.setdefault(thread_name, Counter())[_get_stack(frame)] += 1
+
+            result.sample_count += 1
+
+            sample_cost_sec = time.perf_counter() - sample_start_sec
+            time.sleep(max(interval_sec, sample_cost_sec / PROFILE_OVERHEAD_BUDGET) - sample_cost_sec)
+
+        result.duration_sec = time.perf_counter() - start_sec
+        # Actual average interval, which could be longer than requested because of the overhead budget
+        result.interval_ms = result.duration_sec * 1000 / max(result.sample_count, 1)
+
+        return result
+    finally:
+        _profile_lock.release()
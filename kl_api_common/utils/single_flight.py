@@ -0,0 +1,95 @@
+import threading
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_single_flights: dict[str, "SingleFlight"] = {}
+
+
+class _Call(Generic[T]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    Collapses the concurrent calls of the same key into one execution, and gives its result to all of them.
+
+    Calls of a key made while another call of it is running wait for that call instead of executing again.
+    If that call raises, all of them raise the same exception. Results are shared, so they should not be mutated.
+
+    Thread-safe. Calls made in the event loop thread block the loop while waiting, same as executing by themselves.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call[T]] = {}
+        self._executed_count = 0
+        self._collapsed_count = 0
+
+        _single_flights[name] = self
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self._executed_count += 1
+            else:
+                self._collapsed_count += 1
+
+        if not is_leader:
+            call.done.wait()
+
+            if call.error:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                # Could be forgotten and replaced by a newer call already
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+            call.done.set()
+
+        return call.result
+
+    def forget(self, key: Hashable):
+        """
+        Make the later calls of ``key`` execute again instead of waiting for the running call.
+
+        Call this after writing the data read by the calls, so the calls made after the write
+        don't get the result read before it.
+        """
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def forget_all(self):
+        """Same as :meth:`forget`, but for all keys."""
+        with self._lock:
+            self._calls.clear()
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "executedCount": self._executed_count,
+                "collapsedCount": self._collapsed_count,
+                "inFlight": len(self._calls),
+            }
+
+
+def get_single_flight_metrics() -> dict[str, Any]:
+    return {name: single_flight.get_metrics() for name, single_flight in _single_flights.items()}
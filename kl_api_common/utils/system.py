@@ -1,6 +1,87 @@
 import os
-import subprocess
+import tempfile
+from typing import IO
 
+from kl_api_common.const import SERVER_CPU_AFFINITY, SERVER_CPU_CORES, SERVER_NICE, SERVER_PORT
+from kl_api_common.env import APP_NAME
+from .log import print_log_event
 
-def set_current_process_to_highest_priority():
-    subprocess.check_output(f"wmic process where processid={os.getpid()} CALL setpriority realtime")
+# Kept open for the lifetime of the process, so the claimed CPU slot stays locked
+_cpu_slot_lock_file: IO | None = None
+
+
+def _claim_cpu_slot(slot_count: int) -> int | None:
+    """
+    Claim the first CPU slot not claimed by the other workers, and return its index.
+
+    Slots are claimed by locking a file, which is released by the OS when the process exits,
+    so the respawned worker gets the slot of the dead one.
+    """
+    import fcntl
+
+    global _cpu_slot_lock_file
+
+    for slot in range(slot_count):
+        lock_file = open(os.path.join(tempfile.gettempdir(), f"{APP_NAME}.{SERVER_PORT}.cpu-{slot}.lock"), "w")
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+
+        _cpu_slot_lock_file = lock_file
+        return slot
+
+    return None
+
+
+def _set_cpu_affinity():
+    if not hasattr(os, "sched_setaffinity"):
+        print_log_event("[yellow]CPU affinity is not supported on this platform[/]")
+        return
+
+    cpu_cores = sorted(SERVER_CPU_CORES or os.sched_getaffinity(0))
+    slot = _claim_cpu_slot(len(cpu_cores))
+
+    if slot is None:
+        print_log_event(
+            "[yellow]All CPU cores are claimed by the other workers, not pinning[/] - Cores: {cpuCores}",
+            cpuCores=cpu_cores
+        )
+        return
+
+    try:
+        os.sched_setaffinity(0, {cpu_cores[slot]})
+    except OSError as ex:
+        # For example, the configured core is not available to the process
+        print_log_event(
+            "[yellow]Failed to pin to CPU core {cpuCore}, not pinning[/] - {error}",
+            level="WARNING", cpuCore=cpu_cores[slot], fields={"error": str(ex)}
+        )
+        return
+
+    print_log_event("Pinned to CPU core [yellow]{cpuCore}[/]", cpuCore=cpu_cores[slot])
+
+
+def _set_nice():
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, SERVER_NICE)
+    except AttributeError:
+        print_log_event("[yellow]Nice value is not supported on this platform[/]")
+    except PermissionError:
+        print_log_event(
+            "[yellow]No permission to set nice value[/] to {nice} - Current: {niceCurrent}",
+            nice=SERVER_NICE, niceCurrent=os.getpriority(os.PRIO_PROCESS, 0)
+        )
+    else:
+        print_log_event("Nice value set to [yellow]{nice}[/]", nice=SERVER_NICE)
+
+
+def set_current_process_scheduling():
+    """Apply the CPU affinity and the nice value configured in the ``server`` section to the current process."""
+    if SERVER_CPU_AFFINITY:
+        _set_cpu_affinity()
+
+    if SERVER_NICE is not None:
+        _set_nice()